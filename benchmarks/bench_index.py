@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""bench_index.py - sdd_index scaling on synthetic .sdd trees.
+
+For each size, generates a tree with corpus.generate (setup, not timed) and
+measures:
+
+- rebuild_cold: rebuild_all with no index yet (every document hashed,
+  parsed, upserted and derived). The OS page cache is warm from generation;
+  "cold" refers to the index.
+- rebuild_warm: rebuild_all again with nothing changed (the stat walk).
+- upsert: one document edited, then scan_document + upsert_document +
+  commit, i.e. the per-edit write path without the derive. It should stay
+  roughly flat as the index grows (per-path child indexes, batched inserts).
+- update_one: one document edited and re-indexed, including the incremental
+  derive; a different document each time, spread over the tree.
+- update_batch: BATCH_SIZE documents edited together and re-indexed by one
+  update_many call (a multi-file edit), i.e. one transaction and one derive.
+- derive_full / derive_one: derive_index over every document, and for a
+  single changed path.
+
+Output is JSON Lines: a header describing the environment (Python, SQLite,
+git commit, index schema), then one record per size with milliseconds per
+phase (median and p95 where an operation repeats). ``--baseline`` takes a
+previous run's output and adds a ``vs_baseline`` ratio (current / baseline)
+per metric; ``--max-regression`` makes the run exit 1 when any ratio exceeds
+1 + the given fraction.
+
+Usage: python3 benchmarks/bench_index.py [--sizes 100,1000,10000,50000]
+           [--repeat 20] [--workers 1] [--baseline old.jsonl] [--max-regression 0.2]
+"""
+
+import argparse
+import json
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import corpus
+
+sys.path.insert(0, str(corpus.SCRIPTS_DIR))
+import sdd_index  # noqa: E402
+
+# Timings compared against --baseline (the medians; p95s are too noisy to gate on).
+GATED_METRICS = ("rebuild_cold_ms", "rebuild_warm_ms", "upsert_ms_median", "update_one_ms_median",
+                 "update_batch_ms_median", "derive_full_ms_median", "derive_one_ms_median")
+
+# Documents per update_many call in the update_batch measurement.
+BATCH_SIZE = 20
+
+
+def _timed(fn: Callable[[], Any]) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1000
+
+
+def _p95(values: List[float]) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, -(-len(ordered) * 95 // 100) - 1)]
+
+
+def _summary(name: str, values: List[float]) -> Dict[str, float]:
+    return {
+        f"{name}_ms_median": round(statistics.median(values), 3),
+        f"{name}_ms_p95": round(_p95(values), 3),
+    }
+
+
+def git_commit() -> str:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=str(corpus.SCRIPTS_DIR),
+            capture_output=True, text=True, check=True,
+        )
+        return result.stdout.strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return ""
+
+
+def header() -> Dict[str, Any]:
+    return {
+        "benchmark": "bench_index",
+        "commit": git_commit(),
+        "schema": sdd_index.SCHEMA_VERSION,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+    }
+
+
+def bench(size: int, repeat: int, workers: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        project = Path(tmp)
+        root = str(project)
+        t0 = time.perf_counter()
+        paths = corpus.generate(project, size)
+        setup_s = time.perf_counter() - t0
+        corpus_bytes = sum((project / corpus.SDD_ROOT / p).stat().st_size for p in paths)
+
+        result: Dict[str, Any] = {
+            "documents": size,
+            "corpus_bytes": corpus_bytes,
+            "setup_s": round(setup_s, 2),
+            "workers": workers,
+        }
+        result["rebuild_cold_ms"] = round(
+            _timed(lambda: sdd_index.rebuild_all(root, workers=workers)), 3)
+        result["rebuild_warm_ms"] = round(min(
+            _timed(lambda: sdd_index.rebuild_all(root, workers=workers)) for _ in range(3)), 3)
+
+        step = max(1, len(paths) // repeat)
+        upsert_ms = []
+        db_file = sdd_index.db_path(root, corpus.SDD_ROOT)
+        for i in range(repeat):
+            rel = paths[(i * step + step // 2) % len(paths)]
+            corpus.touch_document(project, rel, i)
+            conn = sdd_index.connect(db_file)
+            try:
+                t0 = time.perf_counter()
+                rec = sdd_index.scan_document(str(project / corpus.SDD_ROOT / rel), root,
+                                              corpus.SDD_ROOT)
+                sdd_index.upsert_document(conn, rec)
+                conn.commit()
+                upsert_ms.append((time.perf_counter() - t0) * 1000)
+            finally:
+                conn.close()
+        result.update(_summary("upsert", upsert_ms))
+
+        update_ms = []
+        for i in range(repeat):
+            rel = paths[(i * step) % len(paths)]
+            corpus.touch_document(project, rel, i)
+            update_ms.append(_timed(lambda: sdd_index.update_one(
+                root, f"{corpus.SDD_ROOT}/{rel}")))
+        result.update(_summary("update_one", update_ms))
+
+        batch_ms = []
+        for i in range(max(1, min(repeat, 5))):
+            batch = [paths[(i * BATCH_SIZE + k) * step % len(paths)] for k in range(BATCH_SIZE)]
+            for rel in batch:
+                corpus.touch_document(project, rel, repeat + i)
+            batch_ms.append(_timed(lambda: sdd_index.update_many(
+                root, [f"{corpus.SDD_ROOT}/{rel}" for rel in batch])))
+        result.update(_summary("update_batch", batch_ms))
+
+        conn = sdd_index.connect(db_file)
+        try:
+            derive_runs = max(1, min(repeat, 3))
+            full_ms = [_timed(lambda: sdd_index.derive_index(conn, root, corpus.SDD_ROOT))
+                       for _ in range(derive_runs)]
+            one_ms = [_timed(lambda: sdd_index.derive_index(
+                          conn, root, corpus.SDD_ROOT, [paths[i % len(paths)]]))
+                      for i in range(repeat)]
+        finally:
+            conn.close()
+        result.update(_summary("derive_full", full_ms))
+        result.update(_summary("derive_one", one_ms))
+        return result
+
+
+def load_baseline(path: str) -> Dict[int, Dict[str, Any]]:
+    baseline: Dict[int, Dict[str, Any]] = {}
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(rec, dict) and "documents" in rec:
+                baseline[rec["documents"]] = rec
+    return baseline
+
+
+def compare(result: Dict[str, Any], base: Optional[Dict[str, Any]]) -> Dict[str, float]:
+    ratios: Dict[str, float] = {}
+    if not base:
+        return ratios
+    for metric in GATED_METRICS:
+        old, new = base.get(metric), result.get(metric)
+        if isinstance(old, (int, float)) and isinstance(new, (int, float)) and old > 0:
+            ratios[metric] = round(new / old, 3)
+    return ratios
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark sdd_index on synthetic .sdd trees.")
+    parser.add_argument("--sizes", default="100,1000,10000,50000",
+                        help="Comma-separated document counts")
+    parser.add_argument("--repeat", type=int, default=20,
+                        help="upsert and update_one edits (and incremental derives) timed per size")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="rebuild_all worker processes (0 = one per CPU)")
+    parser.add_argument("--baseline", default="",
+                        help="Previous bench_index output to compare against")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="Exit 1 if a median exceeds the baseline by more than this "
+                             "fraction (e.g. 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline) if args.baseline else {}
+    print(json.dumps(header()), flush=True)
+    regressed = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        result = bench(size, args.repeat, args.workers)
+        ratios = compare(result, baseline.get(size))
+        if ratios:
+            result["vs_baseline"] = ratios
+        print(json.dumps(result), flush=True)
+        if args.max_regression is not None:
+            regressed += [f"{size}:{metric}" for metric, ratio in ratios.items()
+                          if ratio > 1 + args.max_regression]
+    if regressed:
+        print(f"regressions over {args.max_regression:.0%}: {', '.join(regressed)}",
+              file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
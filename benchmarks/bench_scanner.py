@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""bench_scanner.py - extract_sections_and_scan throughput on a large spec.
+
+Generates a synthetic specification of about --size-mb megabytes (prose,
+bullet lists, requirement tables, API lines, mermaid and data model blocks),
+then times the current scanner against the previous per-line implementation
+kept below (legacy_*). Both must produce identical output; the run fails
+otherwise.
+
+Usage: python3 benchmarks/bench_scanner.py [--size-mb 5] [--repeat 3]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "plugins" / "sdd-workflow" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+import sdd_index  # noqa: E402
+from sdd_index import (  # noqa: E402
+    DATA_MODEL_LANGS, DEFINE_HINT_RE, FENCE_RE, HEADING_RE, HTTP_RE, REQ_ID_RE,
+    SYSML_REL_RE, TABLE_ROW_ID_RE, _clean_heading, _extract_data_model_fields,
+    _extract_sysml_elements, _flush_section,
+)
+
+PROSE = [
+    "The system shall keep the session alive while the user is active.",
+    "- Retries use exponential backoff capped at thirty seconds.",
+    "- See the error handling section for failure modes.",
+    "Requests are authenticated with a bearer token issued at login.",
+    "Pagination follows the cursor model described in the API guide.",
+    "",
+    "> Note: the cache is best effort and may be evicted at any time.",
+    "* Non-functional targets are listed at the end of this document.",
+]
+
+
+def make_spec(size_bytes: int, seed: int = 1) -> str:
+    rnd = random.Random(seed)
+    out: List[str] = ["# Large API catalogue", ""]
+    size = 0
+    n = 0
+    while size < size_bytes:
+        n += 1
+        block = [f"## Endpoint group {n}", ""]
+        block += [rnd.choice(PROSE) for _ in range(rnd.randint(20, 40))]
+        block += [
+            "| ID | Requirement |",
+            "|----|-------------|",
+            f"| **FR-{n % 1000:03d}** | handles group {n} |",
+            f"| NFR-{n % 1000:03d} | refers UR-{n % 1000:03d} |",
+            "",
+            f"GET /api/v1/group/{n}",
+            f"POST /api/v1/group/{n}/items",
+            "",
+            "```mermaid",
+            "requirementDiagram",
+            f'    requirement "R{n}" {{ id: UR-{n % 1000:03d}; text: x; risk: high; verifymethod: test }}',
+            f"    element comp_{n} {{ type: simulation }}",
+            f"    comp_{n} - satisfy -> R{n}",
+            "```",
+            "",
+            "```ts",
+            f"interface Group{n} {{",
+            "  id: string;",
+            "  readonly name?: string;",
+            "  createdAt: string;",
+            "}",
+            "```",
+            "",
+        ]
+        text = "\n".join(block) + "\n"
+        out.append(text)
+        size += len(text)
+    return "".join(out)
+
+
+# --- previous implementation (reference for identical output) --------------
+
+def legacy_extract_sections_and_scan(body: str) -> Dict[str, List[Dict[str, Any]]]:
+    req_ids: Dict[str, Dict[str, Any]] = {}
+    data_models: List[Dict[str, Any]] = []
+    data_model_fields: List[Dict[str, Any]] = []
+    api_sigs: List[Dict[str, Any]] = []
+    sysml_rels: List[Dict[str, Any]] = []
+    sysml_elems: List[Dict[str, Any]] = []
+    sections: List[Dict[str, str]] = []
+    text_lines: List[str] = []
+    section = ""
+    in_fence = False
+    fence_lang = ""
+    fence_section = ""
+    fence_lines: List[str] = []
+    for idx, line in enumerate(body.splitlines(), start=1):
+        fence_m = FENCE_RE.match(line.strip())
+        if fence_m:
+            if not in_fence:
+                in_fence = True
+                fence_lang = fence_m.group(1).lower()
+                fence_section = section
+                fence_lines = []
+            else:
+                block = "\n".join(fence_lines)
+                if fence_lang == "mermaid":
+                    _legacy_extract_sysml_relationships(block, fence_section, sysml_rels)
+                    _extract_sysml_elements(block, fence_section, sysml_elems)
+                elif fence_lang in DATA_MODEL_LANGS and block.strip():
+                    data_models.append({"section": fence_section, "lang": fence_lang,
+                                        "body": block})
+                    for fname in _extract_data_model_fields(fence_lang, block):
+                        data_model_fields.append({"model_section": fence_section,
+                                                  "field_name": fname})
+                for fl in fence_lines:
+                    _legacy_collect_api(fl, fence_section, api_sigs)
+                in_fence = False
+                fence_lang = ""
+                fence_lines = []
+            continue
+        if in_fence:
+            fence_lines.append(line)
+            text_lines.append(line)
+            _legacy_collect_req_ids(line, section, idx, req_ids)
+            continue
+        heading_m = HEADING_RE.match(line)
+        if heading_m:
+            _flush_section(section, text_lines, sections)
+            text_lines = []
+            section = _clean_heading(heading_m.group(2))
+            _legacy_collect_req_ids(line, section, idx, req_ids, heading=True)
+            continue
+        text_lines.append(line)
+        _legacy_collect_req_ids(line, section, idx, req_ids)
+        _legacy_collect_api(line, section, api_sigs)
+    _flush_section(section, text_lines, sections)
+    return {
+        "req_ids": list(req_ids.values()), "data_models": data_models,
+        "data_model_fields": data_model_fields, "api_signatures": api_sigs,
+        "sysml_relationships": sysml_rels, "sysml_elements": sysml_elems,
+        "sections": sections,
+    }
+
+
+def _legacy_collect_req_ids(line: str, section: str, line_no: int,
+                            acc: Dict[str, Dict[str, Any]], heading: bool = False) -> None:
+    matches = REQ_ID_RE.findall(line)
+    if not matches:
+        return
+    is_def_ctx = (heading or bool(TABLE_ROW_ID_RE.match(line.strip()))
+                  or bool(DEFINE_HINT_RE.search(line)))
+    for rid in matches:
+        kind = "def" if is_def_ctx else "ref"
+        existing = acc.get(rid)
+        if existing is None:
+            acc[rid] = {"req_id": rid, "kind": kind, "section": section, "line": line_no}
+        elif kind == "def" and existing["kind"] != "def":
+            existing["kind"] = "def"
+            existing["section"] = section
+            existing["line"] = line_no
+
+
+def _legacy_collect_api(line: str, section: str, acc: List[Dict[str, Any]]) -> None:
+    for m in HTTP_RE.finditer(line):
+        acc.append({"section": section, "signature": f"{m.group(1)} {m.group(2)}"})
+
+
+def _legacy_extract_sysml_relationships(block: str, section: str,
+                                        acc: List[Dict[str, Any]]) -> None:
+    if "requirementDiagram" not in block:
+        return
+    for line in block.splitlines():
+        m = SYSML_REL_RE.search(line)
+        if m:
+            acc.append({"source_id": m.group(1), "rel_type": m.group(2),
+                        "target_id": m.group(3), "section": section})
+
+
+def best_of(fn, body: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(body)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark extract_sections_and_scan.")
+    parser.add_argument("--size-mb", type=float, default=5.0, help="Spec size in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per implementation (best kept)")
+    args = parser.parse_args()
+
+    body = make_spec(int(args.size_mb * 1024 * 1024))
+    if sdd_index.extract_sections_and_scan(body) != legacy_extract_sections_and_scan(body):
+        print("output differs from the legacy scanner", file=sys.stderr)
+        sys.exit(1)
+    legacy_s = best_of(legacy_extract_sections_and_scan, body, args.repeat)
+    current_s = best_of(sdd_index.extract_sections_and_scan, body, args.repeat)
+    print(json.dumps({
+        "bytes": len(body),
+        "lines": body.count("\n"),
+        "legacy_ms": round(legacy_s * 1000, 1),
+        "current_ms": round(current_s * 1000, 1),
+        "speedup": round(legacy_s / current_s, 2),
+    }))
+
+
+if __name__ == "__main__":
+    main()
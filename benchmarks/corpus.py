@@ -0,0 +1,271 @@
+"""corpus.py - Synthetic .sdd trees for the indexer benchmarks.
+
+generate(project, documents) writes a deterministic .sdd tree of exactly
+``documents`` files that looks like a real AI-SDD project:
+
+    .sdd/requirement/<domain>/index.md               domain overview (prd)
+    .sdd/requirement/<domain>/<feature>.md           PRD
+    .sdd/specification/<domain>/index_spec.md        domain overview (spec)
+    .sdd/specification/<domain>/<feature>_spec.md    abstract specification
+    .sdd/specification/<domain>/<feature>_design.md  technical design
+
+Every path is checked against naming.validate_naming and document IDs follow
+naming.feature_name, so the tree passes the pre-tool-use hook. PRDs define
+UR/FR/NFR IDs in requirement tables and a mermaid requirementDiagram; specs
+and designs reference them, list API signatures and carry fenced data models
+(ts, json, sql, python). About one PRD in a hundred is ten times longer, to
+keep a realistic long tail of document sizes.
+
+Requirement IDs use the hierarchical form (UR-123_04, FR-123_04_02) so they
+stay unique well past 1,000 features.
+"""
+
+import random
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "plugins" / "sdd-workflow" / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+from naming import feature_name, validate_naming  # noqa: E402
+
+SDD_ROOT = ".sdd"
+REQUIREMENT_DIR = "requirement"
+SPECIFICATION_DIR = "specification"
+
+# Features per domain directory; each feature is a PRD, a spec and a design.
+FEATURES_PER_DOMAIN = 20
+
+DOMAINS = ["auth", "billing", "catalog", "search", "orders", "shipping", "reports",
+           "notify", "admin", "media"]
+NOUNS = ["session", "invoice", "product", "query", "order", "parcel", "report",
+         "message", "account", "asset", "coupon", "token", "profile", "export"]
+VERBS = ["create", "update", "archive", "review", "sync", "approve", "import",
+         "schedule", "validate", "publish"]
+STATUSES = ["draft", "review", "approved"]
+IMPL_STATUSES = ["not-implemented", "in-progress", "implemented"]
+LEVELS = ["low", "medium", "high"]
+VERIFY = ["test", "inspection", "analysis", "demonstration"]
+
+PROSE = [
+    "The system shall keep the user's work safe when the connection drops.",
+    "Operators need an audit trail for every state transition of this entity.",
+    "Retries use exponential backoff capped at thirty seconds.",
+    "Requests are authenticated with a bearer token issued at login.",
+    "Pagination follows the cursor model described in the API guidelines.",
+    "The cache is best effort and may be evicted at any time.",
+    "Validation errors are reported per field so the client can highlight them.",
+    "Bulk operations are processed asynchronously and report progress.",
+    "Deleting a record is a soft delete; a nightly job purges old rows.",
+    "All timestamps are stored in UTC and rendered in the user's time zone.",
+    "The feature is rolled out behind a flag and enabled per tenant.",
+    "Read paths must not block on the write path under normal load.",
+]
+
+
+def _paragraph(rnd: random.Random, sentences: int) -> str:
+    return " ".join(rnd.choice(PROSE) for _ in range(sentences))
+
+
+def _base_id(feature_no: int) -> str:
+    return f"{feature_no % 1000:03d}_{feature_no // 1000:02d}"
+
+
+def _leaf(feature: str) -> str:
+    return feature.rsplit("/", 1)[-1]
+
+
+def _camel(name: str) -> str:
+    return "".join(part.capitalize() for part in name.replace("/", "-").split("-"))
+
+
+def _front_matter(doc_id: str, title: str, doc_type: str, rnd: random.Random,
+                  depends_on: List[str], tags: List[str], extra: str = "") -> str:
+    day = 1 + rnd.randrange(28)
+    deps = ", ".join(f'"{d}"' for d in depends_on)
+    tag_list = ", ".join(f'"{t}"' for t in tags)
+    return (
+        "---\n"
+        f'id: "{doc_id}"\n'
+        f'title: "{title}"\n'
+        f'type: "{doc_type}"\n'
+        f'status: "{rnd.choice(STATUSES)}"\n'
+        f"{extra}"
+        f'created: "2025-01-{day:02d}"\n'
+        f'updated: "2025-03-{day:02d}"\n'
+        f"depends-on: [{deps}]\n"
+        f"tags: [{tag_list}]\n"
+        f'category: "{tags[0]}"\n'
+        f'priority: "{rnd.choice(LEVELS)}"\n'
+        f'risk: "{rnd.choice(LEVELS)}"\n'
+        "---\n"
+    )
+
+
+def _prd(feature: str, feature_no: int, domain: str, rnd: random.Random,
+         related: List[int]) -> str:
+    base = _base_id(feature_no)
+    title = _leaf(feature).replace("-", " ").title()
+    fr_count = rnd.randint(3, 8)
+    long_tail = feature_no % 97 == 0
+    out = [_front_matter(f"prd-{_leaf(feature)}", title, "prd", rnd,
+                         [f"prd-{domain}"], [domain, "prd"])]
+    out.append(f"\n# {title} Requirements Specification\n\n## Overview\n\n")
+    out.append(_paragraph(rnd, rnd.randint(4, 10) * (10 if long_tail else 1)) + "\n\n")
+    out.append("## User Requirements\n\n| ID | Requirement | Priority |\n|----|-------------|----------|\n")
+    out.append(f"| UR-{base} | As a user I can {rnd.choice(VERBS)} a {rnd.choice(NOUNS)} | high |\n\n")
+    out.append("## Functional Requirements\n\n| ID | Requirement | Source |\n|----|-------------|--------|\n")
+    for k in range(1, fr_count + 1):
+        out.append(f"| FR-{base}_{k:02d} | The system shall {rnd.choice(VERBS)} the "
+                   f"{rnd.choice(NOUNS)} | UR-{base} |\n")
+    out.append("\n## Non-Functional Requirements\n\n| ID | Requirement |\n|----|-------------|\n")
+    out.append(f"| NFR-{base}_01 | p95 latency below {rnd.choice([100, 200, 500])} ms |\n\n")
+    out.append("## Requirements Diagram\n\n```mermaid\nrequirementDiagram\n")
+    out.append(f"    requirement Need{feature_no} {{\n        id: UR-{base}\n"
+               f'        text: "{title} user need"\n        risk: high\n'
+               "        verifymethod: demonstration\n    }\n\n")
+    for k in range(1, fr_count + 1):
+        out.append(f"    functionalRequirement Fn{feature_no}_{k} {{\n"
+                   f"        id: FR-{base}_{k:02d}\n        text: \"Function {k}\"\n"
+                   f"        risk: {rnd.choice(LEVELS)}\n"
+                   f"        verifymethod: {rnd.choice(VERIFY)}\n    }}\n\n")
+    out.append(f"    performanceRequirement Perf{feature_no} {{\n        id: NFR-{base}_01\n"
+               '        text: "Latency budget"\n        risk: medium\n'
+               "        verifymethod: test\n    }\n\n")
+    out.append(f'    element {_camel(_leaf(feature))}Service {{\n        type: "service"\n    }}\n\n')
+    for k in range(1, fr_count + 1):
+        out.append(f"    Need{feature_no} - deriveReqt -> Fn{feature_no}_{k}\n")
+        out.append(f"    {_camel(_leaf(feature))}Service - satisfy -> Fn{feature_no}_{k}\n")
+    out.append(f"    {_camel(_leaf(feature))}Service - satisfy -> Perf{feature_no}\n```\n\n")
+    if related:
+        out.append("## Related Requirements\n\n")
+        for other in related:
+            out.append(f"- Builds on UR-{_base_id(other)} and FR-{_base_id(other)}_01.\n")
+        out.append("\n")
+    out.append("## Out of Scope\n\n" + _paragraph(rnd, rnd.randint(1, 3)) + "\n")
+    return "".join(out)
+
+
+def _spec(feature: str, feature_no: int, domain: str, rnd: random.Random) -> str:
+    base = _base_id(feature_no)
+    title = _leaf(feature).replace("-", " ").title()
+    noun = rnd.choice(NOUNS)
+    model = _camel(_leaf(feature))
+    out = [_front_matter(f"spec-{_leaf(feature)}", title, "spec", rnd,
+                         [f"prd-{_leaf(feature)}"], [domain, "spec"], 'sdd-phase: "specify"\n')]
+    out.append(f"\n# {title}\n\n**Related PRD:** requirement/{feature}.md\n\n"
+               "## Purpose\n\n" + _paragraph(rnd, rnd.randint(3, 6)) + "\n\n")
+    out.append("## Functional Requirements Coverage\n\n")
+    for k in range(1, rnd.randint(3, 6)):
+        out.append(f"- FR-{base}_{k:02d}: covered by the {noun} workflow\n")
+    out.append(f"- NFR-{base}_01: see Performance\n\n## Public API\n\n")
+    out.append(f"GET /api/v1/{domain}/{noun}s\n"
+               f"POST /api/v1/{domain}/{noun}s\n"
+               f"GET /api/v1/{domain}/{noun}s/{{id}}\n"
+               f"PATCH /api/v1/{domain}/{noun}s/{{id}}\n\n")
+    out.append("## Data Model\n\n```ts\n"
+               f"interface {model} {{\n  id: string;\n  readonly tenantId: string;\n"
+               f"  status: \"active\" | \"archived\";\n  {noun}Count?: number;\n"
+               "  createdAt: string;\n  updatedAt: string;\n}\n```\n\n")
+    out.append("```json\n{\n"
+               f'  "id": "{noun}-1",\n  "status": "active",\n  "createdAt": "2025-01-01T00:00:00Z"\n'
+               "}\n```\n\n")
+    out.append("## Performance\n\n" + _paragraph(rnd, rnd.randint(1, 3)) + "\n")
+    return "".join(out)
+
+
+def _design(feature: str, feature_no: int, domain: str, rnd: random.Random) -> str:
+    base = _base_id(feature_no)
+    title = _leaf(feature).replace("-", " ").title()
+    table = _leaf(feature).replace("-", "_")
+    model = _camel(_leaf(feature))
+    out = [_front_matter(f"design-{_leaf(feature)}", title, "design", rnd,
+                         [f"spec-{_leaf(feature)}"], [domain, "design"],
+                         f'sdd-phase: "plan"\nimpl-status: "{rnd.choice(IMPL_STATUSES)}"\n')]
+    out.append(f"\n# {title} Design\n\n## Architecture\n\n"
+               + _paragraph(rnd, rnd.randint(4, 8)) + "\n\n")
+    out.append("## Storage\n\n```sql\n"
+               f"CREATE TABLE {table} (\n  id TEXT PRIMARY KEY,\n  tenant_id TEXT NOT NULL,\n"
+               "  status TEXT NOT NULL,\n  created_at TIMESTAMP NOT NULL,\n"
+               "  updated_at TIMESTAMP NOT NULL\n);\n```\n\n")
+    out.append("## Domain Objects\n\n```python\n@dataclass\n"
+               f"class {model}Record:\n    id: str\n    tenant_id: str\n    status: str = \"active\"\n```\n\n")
+    out.append(f"## Traceability\n\n| Requirement | Component |\n|---|---|\n"
+               f"| FR-{base}_01 | {model}Service |\n| NFR-{base}_01 | {model}Cache |\n\n")
+    out.append("## Decisions\n\n" + _paragraph(rnd, rnd.randint(2, 5)) + "\n")
+    return "".join(out)
+
+
+def _domain_index(domain: str, doc_type: str, features: List[str], rnd: random.Random) -> str:
+    title = domain.replace("-", " ").title()
+    out = [_front_matter(f"{doc_type}-{domain}", title, doc_type, rnd, [], [domain, doc_type])]
+    out.append(f"\n# {title}\n\n" + _paragraph(rnd, 3) + "\n\n## Features\n\n")
+    for feature in features:
+        out.append(f"- {feature}\n")
+    return "".join(out)
+
+
+def _feature_slug(feature_no: int) -> str:
+    return (f"{VERBS[feature_no % len(VERBS)]}-"
+            f"{NOUNS[(feature_no // len(VERBS)) % len(NOUNS)]}-{feature_no:05d}")
+
+
+def plan(documents: int) -> List[Tuple[str, str, int]]:
+    """Return (sdd-relative path, kind, feature number) for a tree of ``documents`` files."""
+    entries: List[Tuple[str, str, int]] = []
+    feature_no = 0
+    domain_no = 0
+    while len(entries) < documents:
+        domain = f"{DOMAINS[domain_no % len(DOMAINS)]}-{domain_no // len(DOMAINS):03d}"
+        entries.append((f"{REQUIREMENT_DIR}/{domain}/index.md", "prd-index", domain_no))
+        entries.append((f"{SPECIFICATION_DIR}/{domain}/index_spec.md", "spec-index", domain_no))
+        for _ in range(FEATURES_PER_DOMAIN):
+            name = f"{domain}/{_feature_slug(feature_no)}"
+            entries.append((f"{REQUIREMENT_DIR}/{name}.md", "prd", feature_no))
+            entries.append((f"{SPECIFICATION_DIR}/{name}_spec.md", "spec", feature_no))
+            entries.append((f"{SPECIFICATION_DIR}/{name}_design.md", "design", feature_no))
+            feature_no += 1
+        domain_no += 1
+    return entries[:documents]
+
+
+def render(rel: str, kind: str, number: int, seed: int = 1) -> str:
+    """Render one planned document. Deterministic for a given (rel, seed)."""
+    rnd = random.Random(f"{seed}:{rel}")
+    domain = rel.split("/")[1]
+    if kind in ("prd-index", "spec-index"):
+        doc_type = kind.split("-")[0]
+        features = [f"{domain}/{_feature_slug(number * FEATURES_PER_DOMAIN + i)}"
+                    for i in range(FEATURES_PER_DOMAIN)]
+        return _domain_index(domain, doc_type, features, rnd)
+    feature = feature_name(rel.split("/", 1)[1])
+    if kind == "prd":
+        related = sorted({rnd.randrange(number) for _ in range(2)}) if number else []
+        return _prd(feature, number, domain, rnd, related)
+    if kind == "spec":
+        return _spec(feature, number, domain, rnd)
+    return _design(feature, number, domain, rnd)
+
+
+def generate(project: Path, documents: int, seed: int = 1) -> List[str]:
+    """Write a synthetic tree of ``documents`` files; return their sdd-relative paths."""
+    base = project / SDD_ROOT
+    requirement_prefix = f"{SDD_ROOT}/{REQUIREMENT_DIR}"
+    specification_prefix = f"{SDD_ROOT}/{SPECIFICATION_DIR}"
+    paths: List[str] = []
+    for rel, kind, number in plan(documents):
+        error = validate_naming(f"{SDD_ROOT}/{rel}", requirement_prefix, specification_prefix)
+        if error:
+            raise ValueError(error)
+        target = base / rel
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(render(rel, kind, number, seed), encoding="utf-8")
+        paths.append(rel)
+    return paths
+
+
+def touch_document(project: Path, rel: str, revision: int) -> None:
+    """Make a content change to one document (a new paragraph with a fresh reference)."""
+    target = project / SDD_ROOT / rel
+    with open(target, "a", encoding="utf-8") as fh:
+        fh.write(f"\n## Revision {revision}\n\nSee UR-{_base_id(revision)} for context.\n")
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""replay_hooks.py - End-to-end hook latency from recorded payload traces.
+
+Replays JSONL traces of hook payloads (the stdin JSON Claude Code sends:
+``hook_event_name``, ``tool_name``, ``tool_input``, ...) against a fixture
+project. Each payload is dispatched exactly as a session would: the command is
+looked up in the plugin's hooks/hooks.json by event and matcher and run
+through ``sh -c`` with CLAUDE_PLUGIN_ROOT / CLAUDE_PROJECT_DIR set, so the
+timings include interpreter start-up and imports.
+
+Trace strings may contain ``{project}``, replaced by the fixture root. Before a
+PostToolUse payload is dispatched, the tool's effect is applied to the fixture
+(Write stores ``content``; Edit swaps ``old_string`` for ``new_string``, or
+back again on the next replay), so post-tool-use re-indexes real changes.
+Session IDs get a per-replay suffix, so once-per-session behavior (the
+CONSTITUTION.md injection) repeats on every replay.
+
+The fixture is a corpus.generate tree of ``--documents`` files with a
+CONSTITUTION.md, prepared by one untimed session-start run. Each trace is
+replayed sequentially and then with N concurrent hook processes
+(``--concurrency 1,4``). Output is JSON Lines: a header, then one record per
+(trace, concurrency) with p50/p95/p99/max latency per hook event.
+
+Canned traces live in benchmarks/traces/:
+- session_start.jsonl: a SessionStart (index rebuild over an unchanged tree)
+- doc_editing.jsonl: prompts plus Write/Edit of PRD, spec and design documents,
+  including a naming-rule denial
+- code_editing.jsonl: source edits (design-doc lookup, constitution injection)
+
+Usage: python3 benchmarks/replay_hooks.py [--trace FILE ...] [--documents 1000]
+           [--concurrency 1,4] [--iterations 5] [--index-options '{"daemon": true}']
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import corpus
+from bench_index import git_commit
+
+PLUGIN_ROOT = corpus.SCRIPTS_DIR.parent
+HOOKS_JSON = PLUGIN_ROOT / "hooks" / "hooks.json"
+TRACES_DIR = Path(__file__).resolve().parent / "traces"
+
+CONSTITUTION = """# Project Constitution
+
+## Principles
+
+1. Every behavior change starts from a requirement ID (UR/FR/NFR).
+2. Public APIs are versioned; breaking changes need a new major path.
+3. Errors are returned as structured problem details, never as bare strings.
+"""
+
+# (event, payload) pairs after placeholder substitution.
+Step = Tuple[str, Dict[str, Any]]
+
+
+def load_hooks() -> Dict[str, List[Tuple[Optional[str], List[str]]]]:
+    """Map event name -> [(matcher or None, [command, ...])] from hooks.json."""
+    raw = json.loads(HOOKS_JSON.read_text(encoding="utf-8"))
+    hooks: Dict[str, List[Tuple[Optional[str], List[str]]]] = {}
+    for event, entries in raw.get("hooks", {}).items():
+        for entry in entries:
+            commands = [h["command"] for h in entry.get("hooks", []) if h.get("type") == "command"]
+            hooks.setdefault(event, []).append((entry.get("matcher"), commands))
+    return hooks
+
+
+def commands_for(hooks: Dict[str, List[Tuple[Optional[str], List[str]]]],
+                 payload: Dict[str, Any]) -> List[str]:
+    tool = payload.get("tool_name", "")
+    commands: List[str] = []
+    for matcher, entry_commands in hooks.get(payload.get("hook_event_name", ""), []):
+        if matcher and not re.fullmatch(matcher, tool):
+            continue
+        commands.extend(entry_commands)
+    return commands
+
+
+def _substitute(value: Any, project: str) -> Any:
+    if isinstance(value, str):
+        return value.replace("{project}", project)
+    if isinstance(value, list):
+        return [_substitute(v, project) for v in value]
+    if isinstance(value, dict):
+        return {k: _substitute(v, project) for k, v in value.items()}
+    return value
+
+
+def load_trace(path: Path, project: str) -> List[Dict[str, Any]]:
+    payloads = []
+    with open(path, encoding="utf-8") as fh:
+        for n, line in enumerate(fh, start=1):
+            if not line.strip():
+                continue
+            payload = json.loads(line)
+            if not isinstance(payload, dict) or "hook_event_name" not in payload:
+                raise ValueError(f"{path}:{n}: not a hook payload")
+            payloads.append(_substitute(payload, project))
+    return payloads
+
+
+def apply_tool(payload: Dict[str, Any]) -> None:
+    """Apply a PostToolUse payload's Write/Edit to the fixture before the hook runs."""
+    tool_input = payload.get("tool_input", {})
+    edits = tool_input.get("edits") or [tool_input]
+    for edit in edits:
+        target = Path(edit.get("file_path", ""))
+        if not edit.get("file_path"):
+            continue
+        if "content" in edit:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(edit["content"], encoding="utf-8")
+            continue
+        old, new = edit.get("old_string", ""), edit.get("new_string", "")
+        if not old or not target.is_file():
+            continue
+        text = target.read_text(encoding="utf-8")
+        if old in text and new not in text:
+            target.write_text(text.replace(old, new, 1), encoding="utf-8")
+        elif new in text:
+            target.write_text(text.replace(new, old, 1), encoding="utf-8")
+
+
+def hook_env(project: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env["CLAUDE_PLUGIN_ROOT"] = str(PLUGIN_ROOT)
+    env["CLAUDE_PROJECT_DIR"] = project
+    env["CLAUDE_ENV_FILE"] = str(Path(project) / ".replay" / "env.sh")
+    return env
+
+
+def run_step(step: Step, commands: List[str], env: Dict[str, str]) -> Tuple[str, float, int]:
+    """Dispatch one payload; return (event, milliseconds, worst exit code)."""
+    event, payload = step
+    if event == "PostToolUse":
+        apply_tool(payload)
+    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    worst = 0
+    t0 = time.perf_counter()
+    for command in commands:
+        proc = subprocess.run(["sh", "-c", command], input=data, env=env,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if proc.returncode:
+            worst = max(worst, proc.returncode)
+            if proc.returncode != 2:  # 2 = blocking decision, a normal outcome
+                sys.stderr.write(proc.stderr.decode("utf-8", "replace"))
+    return event, (time.perf_counter() - t0) * 1000, worst
+
+
+def _distribution(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+
+    def pct(q: int) -> float:
+        return round(ordered[max(0, -(-len(ordered) * q // 100) - 1)], 3)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def replay(payloads: List[Dict[str, Any]], hooks: Dict[str, Any], project: str,
+           iterations: int, concurrency: int, run_id: str) -> Dict[str, Any]:
+    env = hook_env(project)
+    steps: List[Tuple[Step, List[str]]] = []
+    for i in range(iterations):
+        for payload in payloads:
+            payload = dict(payload)
+            if "session_id" in payload:
+                payload["session_id"] = f"{payload['session_id']}-{run_id}-c{concurrency}-{i}"
+            commands = commands_for(hooks, payload)
+            if commands:
+                steps.append(((payload["hook_event_name"], payload), commands))
+
+    t0 = time.perf_counter()
+    if concurrency <= 1:
+        results = [run_step(step, commands, env) for step, commands in steps]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(lambda sc: run_step(sc[0], sc[1], env), steps))
+    wall_s = time.perf_counter() - t0
+
+    latencies: Dict[str, List[float]] = {}
+    failures: Dict[str, int] = {}
+    for event, ms, code in results:
+        latencies.setdefault(event, []).append(ms)
+        if code not in (0, 2):
+            failures[event] = failures.get(event, 0) + 1
+    return {
+        "concurrency": concurrency,
+        "iterations": iterations,
+        "wall_s": round(wall_s, 3),
+        "events": {event: _distribution(values) for event, values in sorted(latencies.items())},
+        "failures": failures,
+    }
+
+
+def prepare_fixture(project: Path, documents: int, index_options: Dict[str, Any]) -> None:
+    corpus.generate(project, documents)
+    (project / corpus.SDD_ROOT / "CONSTITUTION.md").write_text(CONSTITUTION, encoding="utf-8")
+    (project / ".replay").mkdir(exist_ok=True)
+    config = {
+        "root": corpus.SDD_ROOT,
+        "lang": "en",
+        "directories": {"requirement": corpus.REQUIREMENT_DIR,
+                        "specification": corpus.SPECIFICATION_DIR, "task": "task"},
+        "index": True,
+    }
+    if index_options:
+        config["index_options"] = index_options
+    (project / ".sdd-config.json").write_text(json.dumps(config, indent=2) + "\n",
+                                              encoding="utf-8")
+    # Untimed warm-up: builds the index (and starts the daemon when enabled).
+    start = {"session_id": "replay-setup", "cwd": str(project),
+             "hook_event_name": "SessionStart", "source": "startup"}
+    hooks = load_hooks()
+    run_step(("SessionStart", start), commands_for(hooks, start), hook_env(str(project)))
+
+
+def stop_daemon(project: str) -> None:
+    sys.path.insert(0, str(corpus.SCRIPTS_DIR))
+    import sdd_daemon
+    sdd_daemon.request(project, {"op": "shutdown"}, timeout=5.0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay hook payload traces and time each hook.")
+    parser.add_argument("--trace", action="append", default=[],
+                        help="JSONL trace to replay (repeatable; default: benchmarks/traces/*.jsonl)")
+    parser.add_argument("--documents", type=int, default=1000, help="Fixture size in documents")
+    parser.add_argument("--concurrency", default="1,4",
+                        help="Comma-separated hook process counts (1 = sequential)")
+    parser.add_argument("--iterations", type=int, default=5,
+                        help="Replays of each trace per concurrency level")
+    parser.add_argument("--index-options", default="{}",
+                        help="JSON merged into the fixture's index_options "
+                             "(e.g. '{\"daemon\": true}')")
+    args = parser.parse_args()
+
+    traces = [Path(t) for t in args.trace] or sorted(TRACES_DIR.glob("*.jsonl"))
+    index_options = json.loads(args.index_options)
+    levels = [int(c) for c in args.concurrency.split(",")]
+    hooks = load_hooks()
+    run_id = uuid.uuid4().hex[:8]
+
+    print(json.dumps({
+        "benchmark": "replay_hooks",
+        "commit": git_commit(),
+        "documents": args.documents,
+        "index_options": index_options,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }), flush=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        project = str(Path(tmp).resolve())
+        prepare_fixture(Path(project), args.documents, index_options)
+        try:
+            for trace in traces:
+                payloads = load_trace(trace, project)
+                for level in levels:
+                    result = replay(payloads, hooks, project, args.iterations, level, run_id)
+                    print(json.dumps({"trace": trace.stem, **result}), flush=True)
+        finally:
+            if index_options.get("daemon"):
+                stop_daemon(project)
+            # Constitution-injection markers of the replayed sessions.
+            for marker in glob.glob(os.path.join(tempfile.gettempdir(),
+                                                 f"sdd-constitution-injected-*-{run_id}-*")):
+                os.unlink(marker)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,9 @@
 Single source of truth for front matter detection and parsing, consumed by
 sdd_index.py (indexing) and the recommend-front-matter skill (scan-documents.py).
 
+split_front_matter_head works on the head of a file only, so large documents
+can be indexed without holding the whole text (see sdd_index.scan_document).
+
 Delimiter detection uses ``str.strip()`` so that a trailing CR (CRLF files) and
 incidental surrounding whitespace on the ``---`` fence are both tolerated. The
 50-line window bounds how far a closing fence is searched.
@@ -48,6 +51,23 @@ def split_front_matter(text: str) -> Tuple[str, str]:
     return fm, body
 
 
+def split_front_matter_head(head: str) -> Tuple[str, int]:
+    """Split the front matter off the head of a document.
+
+    ``head`` must hold at least the first ``FM_MAX_LINES`` lines (or the whole
+    document). Returns ``(front_matter, body_offset)``: the body is
+    ``head[body_offset:]`` followed by the rest of the document, i.e. the same
+    lines :func:`split_front_matter` yields, without reading the whole file.
+    """
+    lines = head.splitlines(keepends=True)[:FM_MAX_LINES]
+    has_fm, closing = find_front_matter_bounds(lines)
+    if not has_fm:
+        return "", 0
+    fm = "\n".join(line.rstrip("\r\n\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029")
+                   for line in lines[1:closing])
+    return fm, sum(len(line) for line in lines[:closing + 1])
+
+
 def _strip_scalar(value: str) -> str:
     value = value.strip()
     if len(value) >= 2 and value[0] in "\"'" and value[-1] == value[0]:
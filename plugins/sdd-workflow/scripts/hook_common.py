@@ -93,6 +93,23 @@ def load_naming_ignore_patterns(project_root: str) -> Tuple[str, ...]:
     return tuple(p for p in patterns if isinstance(p, str))
 
 
+def load_index_options(project_root: str) -> Dict[str, Any]:
+    """Return the index_options object from .sdd-config.json, or {} if absent.
+
+    Holds indexer tuning knobs (e.g. ``workers``). Values are validated by
+    sdd_index, which owns their defaults.
+    """
+    config_path = Path(project_root) / ".sdd-config.json"
+    if not config_path.is_file():
+        return {}
+    try:
+        raw = json.loads(config_path.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError):
+        return {}
+    options = raw.get("index_options", {})
+    return options if isinstance(options, dict) else {}
+
+
 SOURCE_EXTENSIONS = (
     ".py", ".ts", ".tsx", ".js", ".jsx", ".go", ".rs", ".java",
     ".kt", ".swift", ".cs", ".rb", ".php", ".c", ".cc", ".cpp", ".h",
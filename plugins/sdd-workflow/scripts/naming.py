@@ -4,9 +4,10 @@ The AI-SDD naming rule:
 - requirement/: plain ``.md`` files; a ``_spec`` / ``_design`` suffix is forbidden.
 - specification/: files require a ``_spec.md`` or ``_design.md`` suffix.
 
-Consumed by the pre-tool-use hook (write-time validation via ``validate_naming``)
-and the recommend-front-matter skill (document classification via
-``determine_type``), so the rule is defined exactly once.
+Consumed by the pre-tool-use hook (write-time validation via ``validate_naming``),
+the recommend-front-matter skill (document classification via
+``determine_type``) and sdd_index (per-feature shards via ``feature_name``), so
+the rule is defined exactly once.
 """
 
 import fnmatch
@@ -81,3 +82,28 @@ def determine_type(
             return "implementation-log"
         return "task"
     return "unknown"
+
+
+def feature_name(doc_path: str) -> str:
+    """Return the feature a document belongs to.
+
+    ``doc_path`` is relative to the requirement/ or specification/ directory.
+    The ``_spec`` / ``_design`` suffix is dropped, and a hierarchical
+    ``index`` document names its parent feature directory::
+
+        user-login.md, user-login_spec.md        -> user-login
+        auth/user-login_design.md                -> auth/user-login
+        auth/index.md, auth/index_spec.md        -> auth
+    """
+    rel = Path(doc_path)
+    stem = rel.stem
+    for suffix in SPEC_SUFFIXES:
+        if stem.endswith(suffix):
+            stem = stem[: -len(suffix)]
+            break
+    parent = rel.parent.as_posix()
+    if parent == ".":
+        return stem
+    if stem == "index":
+        return parent
+    return f"{parent}/{stem}"
@@ -2,12 +2,15 @@
 """post-tool-use.py - PostToolUse hook script (Write|Edit).
 
 Detects potential document update omissions after a file edit:
-- .sdd document edited: reminds to check PRD <-> spec <-> design consistency
+- .sdd document edited: re-indexes it and lists the downstream documents and
+  requirement IDs the edit affects (from update_one's impact), falling back to
+  a generic PRD <-> spec <-> design reminder when the index is unavailable
 - source file edited with a matching *_design.md: reminds to keep the design doc in sync
 """
 
 import sys
 from pathlib import Path
+from typing import Optional
 
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 from hook_common import (  # noqa: E402
@@ -19,15 +22,68 @@ from hook_common import (  # noqa: E402
     relative_to_project,
 )
 from doc_walker import find_design_doc  # noqa: E402,F401
+import sdd_metrics  # noqa: E402
 
 
-def try_update_index(project_root: str, rel_path: str) -> None:
+# Downstream documents listed in the hook message; the rest are counted.
+IMPACT_LIST_MAX = 20
+
+_CHANGE_LABELS = (
+    ("defined_ids", "requirement IDs"),
+    ("referenced_ids", "ID references"),
+    ("depends_on", "depends-on"),
+    ("sysml", "SysML relations"),
+)
+
+
+def try_update_index(project_root: str, rel_paths: list) -> dict:
+    """Re-index ``rel_paths`` as one batch; return update_many's impacts
+    ({} when the index is unavailable)."""
     try:
-        import sdd_index
-        sdd_index.update_one(project_root, rel_path)
+        import sdd_daemon
+        with sdd_metrics.phase("daemon"):
+            done, impacts = sdd_daemon.request_update(project_root, rel_paths)
+            if done:
+                return impacts
+        with sdd_metrics.phase("import"):
+            import sdd_index
+        return sdd_index.update_many(project_root, rel_paths)
     except Exception as e:  # noqa: BLE001
-        print(f"[AI-SDD] Warning: index update failed for '{rel_path}': {e}",
+        print(f"[AI-SDD] Warning: index update failed for {', '.join(rel_paths)}: {e}",
               file=sys.stderr)
+        return {}
+
+
+def describe_impact(impact: dict, sdd_root: str) -> str:
+    """What the edit changed and exactly which documents downstream to verify."""
+    changes = []
+    for key, label in _CHANGE_LABELS:
+        diff = impact.get("changed", {}).get(key, {})
+        for side in ("added", "removed"):
+            if diff.get(side):
+                changes.append(f"{side} {label}: {', '.join(diff[side])}")
+    lines = []
+    if changes:
+        lines.append("Changed: " + "; ".join(changes) + ".")
+    if impact.get("ids"):
+        lines.append("Affected requirement IDs: " + ", ".join(impact["ids"]) + ".")
+    documents = impact.get("documents", [])
+    if not documents:
+        lines.append("No indexed document depends on it or references the changed IDs.")
+        return "\n".join(lines)
+    lines.append("Downstream documents to verify:")
+    for doc in documents[:IMPACT_LIST_MAX]:
+        reasons = []
+        hops = doc.get("depends_on_depth", 0)
+        if hops:
+            reasons.append("direct dependent" if hops == 1
+                           else f"transitive dependent, {hops} hops")
+        if doc.get("references"):
+            reasons.append("references " + ", ".join(doc["references"]))
+        lines.append(f"- {Path(sdd_root) / doc['path']} ({'; '.join(reasons)})")
+    if len(documents) > IMPACT_LIST_MAX:
+        lines.append(f"- ... and {len(documents) - IMPACT_LIST_MAX} more")
+    return "\n".join(lines)
 
 
 def _extract_file_paths(payload: dict) -> list:
@@ -51,52 +107,56 @@ def _extract_file_paths(payload: dict) -> list:
     return result
 
 
+def _is_sdd_document(rel: Path, requirement_prefix: str, specification_prefix: str) -> bool:
+    return rel.suffix == ".md" and (rel.is_relative_to(requirement_prefix)
+                                    or rel.is_relative_to(specification_prefix))
+
+
 def _process_single_file(rel_path: str, project_root: str,
                          sdd_root: str, requirement_prefix: str,
-                         specification_prefix: str) -> None:
+                         specification_prefix: str, impacts: dict) -> Optional[str]:
+    """Return the reminder for one edited file, if any.
+
+    .sdd documents were already re-indexed as a batch; ``impacts`` holds
+    their results.
+    """
     rel = Path(rel_path)
+    suggestion = ("Consider running the doc-consistency-checker skill and "
+                  "/constitution validate to check for principle violations.")
+    impact = impacts.get(rel_path)
     if rel.is_relative_to(specification_prefix) and rel.suffix == ".md":
-        try_update_index(project_root, rel_path)
-        emit_additional_context(
-            "PostToolUse",
-            f"[AI-SDD] '{rel_path}' was updated. Verify consistency across "
-            "PRD <-> *_spec.md <-> *_design.md (requirement ID references, data models, "
-            "API definitions). Consider running the doc-consistency-checker skill and "
-            "/constitution validate to check for principle violations.",
-        )
-        return
+        if impact is not None:
+            return (f"[AI-SDD] '{rel_path}' was updated. {describe_impact(impact, sdd_root)}\n"
+                    f"{suggestion}")
+        return (f"[AI-SDD] '{rel_path}' was updated. Verify consistency across "
+                "PRD <-> *_spec.md <-> *_design.md (requirement ID references, data models, "
+                f"API definitions). {suggestion}")
 
     if rel.is_relative_to(requirement_prefix) and rel.suffix == ".md":
-        try_update_index(project_root, rel_path)
-        emit_additional_context(
-            "PostToolUse",
-            f"[AI-SDD] '{rel_path}' (PRD) was updated. Verify that downstream "
-            "*_spec.md / *_design.md documents reflect the change "
-            "(new/changed UR/FR/NFR must propagate). Consider running the "
-            "doc-consistency-checker skill and /constitution validate to check for "
-            "principle violations.",
-        )
-        return
+        if impact is not None:
+            return (f"[AI-SDD] '{rel_path}' (PRD) was updated. "
+                    f"{describe_impact(impact, sdd_root)}\n{suggestion}")
+        return (f"[AI-SDD] '{rel_path}' (PRD) was updated. Verify that downstream "
+                "*_spec.md / *_design.md documents reflect the change "
+                f"(new/changed UR/FR/NFR must propagate). {suggestion}")
 
     if rel.is_relative_to(sdd_root):
-        return
+        return None
 
     if rel.suffix not in SOURCE_EXTENSIONS:
-        return
+        return None
 
     spec_dir = Path(project_root) / specification_prefix
     if not spec_dir.is_dir():
-        return
+        return None
 
     design_doc = find_design_doc(str(spec_dir), rel.stem)
     if design_doc:
         design_rel = str(Path(design_doc).relative_to(Path(project_root)))
-        emit_additional_context(
-            "PostToolUse",
-            f"[AI-SDD] '{rel_path}' was updated and a matching design document "
-            f"'{design_rel}' exists. If the implementation behavior changed, "
-            "update the design document to keep it as the source of truth.",
-        )
+        return (f"[AI-SDD] '{rel_path}' was updated and a matching design document "
+                f"'{design_rel}' exists. If the implementation behavior changed, "
+                "update the design document to keep it as the source of truth.")
+    return None
 
 
 def main() -> None:
@@ -110,14 +170,22 @@ def main() -> None:
     requirement_prefix = str(Path(sdd_root) / requirement_dir)
     specification_prefix = str(Path(sdd_root) / specification_dir)
 
-    for file_path in file_paths:
-        rel_path = relative_to_project(file_path, project_root)
-        if not rel_path:
-            continue
-        _process_single_file(
-            rel_path, project_root, sdd_root,
-            requirement_prefix, specification_prefix,
-        )
+    rel_paths = [rel for rel in (relative_to_project(fp, project_root) for fp in file_paths)
+                 if rel]
+    with sdd_metrics.record(project_root, "post-tool-use"):
+        # All edited .sdd documents in one update: one transaction, one derive.
+        documents = [rel for rel in rel_paths
+                     if _is_sdd_document(Path(rel), requirement_prefix, specification_prefix)]
+        impacts = try_update_index(project_root, documents) if documents else {}
+        messages = [
+            message for message in (
+                _process_single_file(rel_path, project_root, sdd_root,
+                                     requirement_prefix, specification_prefix, impacts)
+                for rel_path in rel_paths)
+            if message
+        ]
+        if messages:
+            emit_additional_context("PostToolUse", "\n\n".join(messages))
 
 
 if __name__ == "__main__":
@@ -32,6 +32,7 @@ from hook_common import (  # noqa: E402
     relative_to_project,
 )
 from naming import validate_naming  # noqa: E402,F401
+import sdd_metrics  # noqa: E402
 
 CONSTITUTION_MAX_CHARS = 3000
 
@@ -83,17 +84,7 @@ def maybe_inject_constitution(rel_path: str, project_root: str, sdd_root: str, s
     )
 
 
-def main() -> None:
-    payload = read_stdin_json()
-    file_path = payload.get("tool_input", {}).get("file_path", "")
-    if not file_path:
-        return
-
-    project_root = get_project_root(payload)
-    rel_path = relative_to_project(file_path, project_root)
-    if not rel_path:
-        return
-
+def check_file(rel_path: str, project_root: str, session_id: str) -> None:
     sdd_root, requirement_dir, specification_dir = load_sdd_paths(project_root)
     requirement_prefix = str(Path(sdd_root) / requirement_dir)
     specification_prefix = str(Path(sdd_root) / specification_dir)
@@ -105,7 +96,22 @@ def main() -> None:
         return
 
     if not Path(rel_path).is_relative_to(sdd_root):
-        maybe_inject_constitution(rel_path, project_root, sdd_root, payload.get("session_id", ""))
+        maybe_inject_constitution(rel_path, project_root, sdd_root, session_id)
+
+
+def main() -> None:
+    payload = read_stdin_json()
+    file_path = payload.get("tool_input", {}).get("file_path", "")
+    if not file_path:
+        return
+
+    project_root = get_project_root(payload)
+    rel_path = relative_to_project(file_path, project_root)
+    if not rel_path:
+        return
+
+    with sdd_metrics.record(project_root, "pre-tool-use"):
+        check_file(rel_path, project_root, payload.get("session_id", ""))
 
 
 if __name__ == "__main__":
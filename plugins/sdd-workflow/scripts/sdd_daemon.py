@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""sdd_daemon.py - Optional long-lived index server for the hook scripts.
+
+Every post-tool-use edit otherwise pays for importing sdd_index, opening
+SQLite and checking the schema before it can re-index one file. When
+``index_options.daemon`` is enabled in .sdd-config.json, session-start starts
+this server in the background. It listens on a Unix socket at
+.sdd/.cache/index.sock and keeps sdd_index (compiled regexes), one SQLite
+connection and its page cache (document rows and derived fragments) warm
+between requests.
+
+Protocol: one JSON object per connection, newline-terminated, answered with
+one JSON line ``{"ok": true, "result": ...}`` or ``{"ok": false, "error": ...}``.
+
+- {"op": "ping"}                               -> {"stamp": ...}
+- {"op": "update", "paths": ["<relpath>", ...]} -> update_many's impacts
+- {"op": "query", "lookup": "req", "value": "UR-001", "type": "", "depth": 0}
+- {"op": "search", "terms": "...", "limit": 20}
+- {"op": "shutdown"}
+
+Requests are served one at a time, and updates still take the index writer
+lock, so the daemon and in-process writers (CLI, hooks without a daemon) can
+run side by side. The client helpers below only import socket/json; callers
+treat a None reply as "no daemon" and fall back to the in-process path.
+
+With ``index_options.lazy_derive`` an update replies once the upsert is
+committed; the derive it deferred runs DERIVE_DELAY_S after the last request.
+
+The server exits after DAEMON_IDLE_TIMEOUT_S without requests, when its
+socket file is removed, or when a newer plugin build asks it to shut down.
+A second server for the same project exits immediately (.cache/daemon.lock).
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:  # clients stay on socket/json; only the server opens SQLite
+    import sqlite3
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock (and usually no AF_UNIX).
+    fcntl = None  # type: ignore[assignment]
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from hook_common import (  # noqa: E402
+    load_index_options,
+    load_sdd_paths,
+    resolve_project_root,
+)
+
+DAEMON_IDLE_TIMEOUT_S = 1800
+# How often the accept loop wakes to check its socket file and idle time.
+ACCEPT_POLL_S = 60.0
+# With index_options.lazy_derive, how long requests must go quiet after an
+# update before the daemon regenerates the derived files (coalesces bursts).
+DERIVE_DELAY_S = 0.2
+# How long a client waits for a reply. An update may queue behind another
+# writer, so this matches sdd_index.BUSY_TIMEOUT_S.
+CLIENT_TIMEOUT_S = 30.0
+# How long session-start waits for a freshly spawned server to answer.
+STARTUP_TIMEOUT_S = 2.0
+# Requests larger than this are rejected.
+MAX_REQUEST_BYTES = 1 << 20
+# Unix socket paths are limited to ~104-108 bytes depending on the platform.
+MAX_SOCKET_PATH = 100
+
+
+def socket_path(project_root: str, sdd_root: str) -> str:
+    return str(Path(project_root) / sdd_root / ".cache" / "index.sock")
+
+
+def daemon_lock_path(project_root: str, sdd_root: str) -> str:
+    return str(Path(project_root) / sdd_root / ".cache" / "daemon.lock")
+
+
+def code_stamp() -> str:
+    """Identify the plugin build serving requests (module paths + mtimes).
+
+    session-start restarts a daemon whose stamp differs, so a plugin upgrade
+    never leaves an old server answering with stale code or schema.
+    """
+    here = Path(__file__).resolve().parent
+    parts = []
+    for name in ("sdd_daemon.py", "sdd_index.py", "sdd_metrics.py", "sdd_parse_cache.py",
+                 "fm_parser.py", "naming.py"):
+        p = here / name
+        try:
+            parts.append(f"{p}:{p.stat().st_mtime_ns}")
+        except OSError:
+            parts.append(f"{p}:-")
+    return "|".join(parts)
+
+
+def daemon_enabled(project_root: str) -> bool:
+    return (
+        hasattr(socket, "AF_UNIX")
+        and load_index_options(project_root).get("daemon") is True
+    )
+
+
+# --- client ---------------------------------------------------------------
+
+def request(project_root: str, payload: Dict[str, Any],
+            timeout: float = CLIENT_TIMEOUT_S) -> Optional[Dict[str, Any]]:
+    """Send one request to the project's daemon; None if none is listening."""
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    sdd_root, _req_dir, _spec_dir = load_sdd_paths(project_root)
+    sock_file = socket_path(project_root, sdd_root)
+    if not os.path.exists(sock_file):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(sock_file)
+            sock.sendall(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+            reply = _read_line(sock)
+    except OSError:
+        return None
+    if not reply:
+        return None
+    try:
+        data = json.loads(reply)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def request_update(project_root: str,
+                   rel_paths: List[str]) -> Tuple[bool, Dict[str, Any]]:
+    """Ask the daemon to re-index ``rel_paths`` as one batch.
+
+    Returns (done, impacts): done is False when no daemon handled it;
+    impacts is update_many's result.
+    """
+    reply = request(project_root, {"op": "update", "paths": rel_paths})
+    if not (reply and reply.get("ok")):
+        return False, {}
+    return True, reply.get("result") or {}
+
+
+def ensure_running(project_root: str) -> bool:
+    """Start the daemon for ``project_root`` unless a current one is running.
+
+    Returns True when a daemon with this build's code stamp answers.
+    """
+    if not daemon_enabled(project_root):
+        return False
+    sdd_root, _req_dir, _spec_dir = load_sdd_paths(project_root)
+    if len(socket_path(project_root, sdd_root).encode()) > MAX_SOCKET_PATH:
+        print("[AI-SDD] Warning: index daemon disabled: socket path too long.",
+              file=sys.stderr)
+        return False
+    stamp = code_stamp()
+    reply = request(project_root, {"op": "ping"}, timeout=STARTUP_TIMEOUT_S)
+    if reply and reply.get("ok"):
+        if (reply.get("result") or {}).get("stamp") == stamp:
+            return True
+        request(project_root, {"op": "shutdown"}, timeout=STARTUP_TIMEOUT_S)
+
+    subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve()), "--serve",
+         "--project-root", project_root],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL, start_new_session=True, close_fds=True,
+    )
+    deadline = time.monotonic() + STARTUP_TIMEOUT_S
+    while time.monotonic() < deadline:
+        reply = request(project_root, {"op": "ping"}, timeout=STARTUP_TIMEOUT_S)
+        if reply and reply.get("ok") and (reply.get("result") or {}).get("stamp") == stamp:
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def _read_line(sock: socket.socket, limit: Optional[int] = None) -> bytes:
+    chunks = []
+    size = 0
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+        if chunk.endswith(b"\n") or (limit is not None and size > limit):
+            break
+    return b"".join(chunks)
+
+
+# --- server ---------------------------------------------------------------
+
+class _Server:
+    """Holds the warm sdd_index state between requests."""
+
+    def __init__(self, project_root: str) -> None:
+        import sdd_index
+
+        self.sdd_index = sdd_index
+        self.project_root = project_root
+        self.sdd_root, _req_dir, _spec_dir = load_sdd_paths(project_root)
+        self.db_file = sdd_index.db_path(project_root, self.sdd_root)
+        self.stamp = code_stamp()
+        self.conn: Optional["sqlite3.Connection"] = None
+        self.conn_ino: Optional[int] = None
+        self.running = True
+        self.derive_due = False
+
+    def connection(self) -> Optional["sqlite3.Connection"]:
+        """Return the warm connection, reopening it if the database was replaced."""
+        try:
+            ino = os.stat(self.db_file).st_ino
+        except OSError:
+            ino = None
+        if self.conn is not None and ino == self.conn_ino:
+            return self.conn
+        self.close()
+        if ino is None:
+            return None
+        self.conn = self.sdd_index.connect(self.db_file)
+        self.conn_ino = ino
+        return self.conn
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+            self.conn_ino = None
+
+    def derive(self) -> None:
+        """Regenerate the derived files a lazy update left dirty."""
+        self.derive_due = False
+        conn = self.connection()
+        if conn is not None:
+            self.sdd_index.ensure_derived(self.project_root, conn=conn)
+
+    def handle(self, req: Dict[str, Any]) -> Any:
+        op = req.get("op")
+        if op == "ping":
+            return {"stamp": self.stamp, "pid": os.getpid()}
+        if op == "shutdown":
+            self.running = False
+            return None
+        conn = self.connection()
+        if op == "update":
+            if conn is None:
+                return None
+            self.derive_due = True
+            return self.sdd_index.update_many(
+                self.project_root, [str(p) for p in req.get("paths", [])], conn=conn)
+        if conn is None or self.sdd_index._get_schema_version(conn) != self.sdd_index.SCHEMA_VERSION:
+            raise RuntimeError("no .sdd index found; run sdd_index.py --rebuild first")
+        if op == "query":
+            return self.sdd_index.dispatch_query(
+                conn, str(req.get("lookup", "")), str(req.get("value", "")),
+                str(req.get("type", "")), int(req.get("depth", 0)))
+        if op == "search":
+            return self.sdd_index.search_sections(
+                conn, str(req.get("terms", "")), int(req.get("limit", 20)))
+        raise ValueError(f"unknown op: {op}")
+
+
+def serve(project_root: str) -> None:
+    """Run the daemon for ``project_root`` until idle, replaced or shut down."""
+    sdd_root, _req_dir, _spec_dir = load_sdd_paths(project_root)
+    sock_file = socket_path(project_root, sdd_root)
+    Path(sock_file).parent.mkdir(parents=True, exist_ok=True)
+
+    lock_fd = os.open(daemon_lock_path(project_root, sdd_root), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None and not _try_lock(lock_fd):
+            return  # another daemon owns this project
+        try:
+            os.unlink(sock_file)
+        except FileNotFoundError:
+            pass
+        server = _Server(project_root)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock_ino = None
+        try:
+            listener.bind(sock_file)
+            listener.listen(64)
+            sock_ino = os.stat(sock_file).st_ino
+            _serve_loop(server, listener, sock_file, sock_ino)
+        finally:
+            listener.close()
+            server.close()
+            try:
+                if os.stat(sock_file).st_ino == sock_ino:
+                    os.unlink(sock_file)
+            except OSError:
+                pass
+    finally:
+        os.close(lock_fd)
+
+
+def _try_lock(lock_fd: int) -> bool:
+    """Take the daemon lock, giving a server that was just told to shut down
+    STARTUP_TIMEOUT_S to release it."""
+    deadline = time.monotonic() + STARTUP_TIMEOUT_S
+    while True:
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.02)
+
+
+def _serve_loop(server: _Server, listener: socket.socket,
+                sock_file: str, sock_ino: int) -> None:
+    idle = 0.0
+    while server.running:
+        listener.settimeout(DERIVE_DELAY_S if server.derive_due else ACCEPT_POLL_S)
+        try:
+            client, _addr = listener.accept()
+        except socket.timeout:
+            if server.derive_due:
+                try:
+                    server.derive()
+                except Exception:  # noqa: BLE001 - the next ensure_derived retries
+                    pass
+                continue
+            idle += listener.gettimeout() or 0.0
+            try:
+                if os.stat(sock_file).st_ino != sock_ino:
+                    return
+            except OSError:
+                return
+            if idle >= DAEMON_IDLE_TIMEOUT_S:
+                return
+            continue
+        idle = 0.0
+        with client:
+            client.settimeout(CLIENT_TIMEOUT_S)
+            try:
+                reply = _dispatch(server, _read_line(client, MAX_REQUEST_BYTES))
+                client.sendall(json.dumps(reply, ensure_ascii=False).encode("utf-8") + b"\n")
+            except OSError:
+                continue
+
+
+def _dispatch(server: _Server, raw: bytes) -> Dict[str, Any]:
+    try:
+        req = json.loads(raw)
+        if not isinstance(req, dict):
+            raise ValueError("request must be a JSON object")
+        return {"ok": True, "result": server.handle(req)}
+    except Exception as e:  # noqa: BLE001 - reported to the client, server keeps running
+        return {"ok": False, "error": str(e)}
+
+
+# --- CLI ------------------------------------------------------------------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Long-lived .sdd index server.")
+    parser.add_argument("--project-root", default="", help="Project root (defaults to env/git/cwd)")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--serve", action="store_true", help="Run the server in the foreground")
+    group.add_argument("--start", action="store_true",
+                       help="Start a background server unless one is running")
+    group.add_argument("--ping", action="store_true", help="Print the running server's status")
+    group.add_argument("--stop", action="store_true", help="Ask the running server to exit")
+    args = parser.parse_args()
+
+    project_root = resolve_project_root(args.project_root)
+    if args.serve:
+        serve(project_root)
+        return
+    if args.start:
+        if not ensure_running(project_root):
+            print("[AI-SDD] Error: index daemon not running "
+                  "(is index_options.daemon enabled?)", file=sys.stderr)
+            sys.exit(1)
+        return
+    op = "ping" if args.ping else "shutdown"
+    reply = request(project_root, {"op": op}, timeout=STARTUP_TIMEOUT_S)
+    if reply is None:
+        print("[AI-SDD] Error: no index daemon is listening.", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(reply, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -9,30 +9,112 @@ of raw Glob/Grep/Read over the whole tree.
 
 Writer entry points:
 - session-start hook: full rebuild via rebuild_all(project_root)
-- post-tool-use hook: incremental update via update_one(project_root, rel_path)
-- CLI: python3 sdd_index.py --rebuild / --update <relpath>
+- post-tool-use hook: incremental update of the edited files via
+  update_many(project_root, rel_paths) (one transaction, one derive), which
+  returns each edit's downstream impact for the hook to list
+- CLI: python3 sdd_index.py --rebuild / --update <relpath> [<relpath> ...]
+- CLI: python3 sdd_index.py --watch polls for changes made outside the agent
+  (checkout, pull) and re-indexes each burst once
+- CLI: python3 sdd_index.py --export-snapshot / --import-snapshot <file> share
+  a prebuilt index tagged with its git commit (sdd_snapshot)
+- sdd_daemon (opt-in): the same update_many on a warm connection, reached by
+  post-tool-use over a Unix socket
+
+Reader entry points:
+- CLI: python3 sdd_index.py --search "<terms>" ranks document sections through
+  an FTS5 index (doc_sections / sections_fts) maintained by upsert_document
+- CLI: python3 sdd_index.py query req|status|impl-status|field|api <value>
+  answers point lookups as compact JSON
+- CLI: python3 sdd_index.py query impact|upstream <node>, query cycles and
+  query order walk the traceability graph (graph_edges / graph_closure)
+- CLI: python3 sdd_index.py --stats summarizes profiled runs (sdd_metrics)
+
+rebuild_all can spread hashing and parsing across a process pool
+(``index_options.workers`` in .sdd-config.json, or ``--workers``). Workers only
+produce records; the calling process remains the single SQLite writer and
+upserts them in path order, so the result is identical to the serial path.
+
+Change detection is stat-based: each document row keeps a (size, mtime_ns,
+inode) fingerprint, and rebuild_all only reads and hashes files whose
+fingerprint moved. ``index_options.paranoid`` (or ``--paranoid``) restores the
+full-hash walk. Content hashes are git blob ids, so in a git work tree those
+files are not even read when git's own index vouches for them: one
+``git ls-files --stage`` supplies the hash of every clean tracked file
+(``index_options.git_hashes``, on by default).
+
+A document whose hash is new to the index (edited, moved, copied, or seen for
+the first time in a fresh worktree) is looked up in the per-user,
+content-addressed parse cache (sdd_parse_cache, ``index_options.parse_cache``)
+before it is parsed.
+
+With ``index_options.lazy_derive``, update_many (and so post-tool-use) stops
+after the upsert and marks the derived files dirty in .cache/index.dirty;
+``--ensure-derived`` (also run by the daemon once requests go quiet and by
+user-prompt-submit) regenerates them on demand.
+
+rebuild_all and update_one report per-phase timings (git, walk, hash, parse,
+cache, upsert, graph, derive, write) through sdd_metrics when profiling is enabled
+(``index_options.profile`` or SDD_INDEX_PROFILE); ``--stats`` summarizes them.
+
+Concurrent writers (several post-tool-use hooks editing in parallel) are
+serialized by an exclusive flock on .cache/index.lock held around every write
+transaction and derive. The database runs in WAL mode with a busy timeout so
+readers never block writers, and derived files are written through unique temp
+files before an atomic replace.
 """
 
 import argparse
+import codecs
+import contextlib
+import functools
 import hashlib
+import itertools
 import json
+import os
 import re
 import sqlite3
+import subprocess
 import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import (
+    Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock; fall back to SQLite's own locking.
+    fcntl = None  # type: ignore[assignment]
 
 sys.path.insert(0, str(Path(__file__).resolve().parent))
-from hook_common import load_sdd_paths, resolve_project_root  # noqa: E402,F401
+from hook_common import (  # noqa: E402,F401
+    load_index_options,
+    load_sdd_paths,
+    relative_to_project,
+    resolve_project_root,
+)
 from fm_parser import (  # noqa: E402,F401
+    FM_MAX_LINES,
     LIST_KEYS,
     _strip_scalar,
     parse_front_matter,
     split_front_matter,
+    split_front_matter_head,
 )
 from doc_walker import iter_target_files  # noqa: E402,F401
+from naming import feature_name, has_spec_suffix  # noqa: E402
+import sdd_parse_cache  # noqa: E402
+import sdd_metrics  # noqa: E402
+
+SCHEMA_VERSION = "9"
+
+# Below this many candidate files a process pool costs more to start than it saves.
+PARALLEL_MIN_FILES = 64
 
-SCHEMA_VERSION = "1"
+# How long a connection waits on a locked database before raising.
+BUSY_TIMEOUT_S = 30.0
 
 
 # --- path helpers ---------------------------------------------------------
@@ -53,11 +135,55 @@ def md_path(project_root: str, sdd_root: str) -> str:
     return str(Path(cache_dir(project_root, sdd_root)) / "index.md")
 
 
+def shard_dir(project_root: str, sdd_root: str) -> str:
+    return str(Path(cache_dir(project_root, sdd_root)) / "index")
+
+
+def shard_path(project_root: str, sdd_root: str, feature: str) -> str:
+    return str(Path(shard_dir(project_root, sdd_root)) / f"{feature}.md")
+
+
+def manifest_path(project_root: str, sdd_root: str) -> str:
+    return str(Path(cache_dir(project_root, sdd_root)) / "index-manifest.md")
+
+
+def lock_path(project_root: str, sdd_root: str) -> str:
+    return str(Path(cache_dir(project_root, sdd_root)) / "index.lock")
+
+
+def dirty_path(project_root: str, sdd_root: str) -> str:
+    return str(Path(cache_dir(project_root, sdd_root)) / "index.dirty")
+
+
+# --- concurrency ----------------------------------------------------------
+
+@contextlib.contextmanager
+def writer_lock(project_root: str, sdd_root: str) -> Iterator[None]:
+    """Hold the cross-process index writer lock for the duration of the block.
+
+    Blocks until the lock is free, so concurrent writers queue up instead of
+    failing with "database is locked" or dropping their update.
+    """
+    lock_file = Path(lock_path(project_root, sdd_root))
+    lock_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_file, "a") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
 # --- schema ---------------------------------------------------------------
 
 def connect(db_file: str) -> sqlite3.Connection:
     Path(db_file).parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(db_file)
+    conn = sqlite3.connect(db_file, timeout=BUSY_TIMEOUT_S)
+    conn.execute(f"PRAGMA busy_timeout = {int(BUSY_TIMEOUT_S * 1000)}")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
     conn.execute("PRAGMA foreign_keys = ON")
     return conn
 
@@ -72,12 +198,46 @@ def _get_schema_version(conn: sqlite3.Connection) -> Optional[str]:
         return None
 
 
+GRAPH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS graph_edges (
+    path TEXT NOT NULL REFERENCES documents(path) ON DELETE CASCADE,
+    src  TEXT NOT NULL,
+    dst  TEXT NOT NULL,
+    kind TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_graph_edges_src ON graph_edges(src);
+CREATE INDEX IF NOT EXISTS idx_graph_edges_dst ON graph_edges(dst);
+CREATE INDEX IF NOT EXISTS idx_graph_edges_path ON graph_edges(path);
+
+CREATE TABLE IF NOT EXISTS graph_closure (
+    ancestor   TEXT NOT NULL,
+    descendant TEXT NOT NULL,
+    depth      INTEGER NOT NULL,
+    PRIMARY KEY (descendant, ancestor)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_graph_closure_ancestor
+    ON graph_closure(ancestor, descendant);
+"""
+
+
 def init_schema(conn: sqlite3.Connection) -> None:
+    """Create the schema, migrating an older index in place where possible.
+
+    An index whose version has a MIGRATIONS path to SCHEMA_VERSION is
+    upgraded in one transaction; any other version is dropped and
+    rebuilt by the next rebuild_all.
+    """
     existing = _get_schema_version(conn)
     if existing == SCHEMA_VERSION:
         return
-    if existing is not None and existing != SCHEMA_VERSION:
+    if existing is not None and not _migrate(conn, existing):
         conn.executescript(
+            "DROP TABLE IF EXISTS sections_fts;"
+            "DROP TABLE IF EXISTS doc_sections;"
+            "DROP TABLE IF EXISTS derived_sections;"
+            "DROP TABLE IF EXISTS derived_rows;"
+            "DROP TABLE IF EXISTS graph_closure;"
+            "DROP TABLE IF EXISTS graph_edges;"
             "DROP TABLE IF EXISTS literals;"
             "DROP TABLE IF EXISTS data_model_fields;"
             "DROP TABLE IF EXISTS sysml_elements;"
@@ -111,7 +271,10 @@ def init_schema(conn: sqlite3.Connection) -> None:
             risk         TEXT,
             created      TEXT,
             updated      TEXT,
-            mtime        REAL
+            mtime        REAL,
+            size         INTEGER,
+            mtime_ns     INTEGER,
+            inode        INTEGER
         );
         CREATE UNIQUE INDEX IF NOT EXISTS idx_documents_doc_id
             ON documents(doc_id) WHERE doc_id IS NOT NULL AND doc_id != '';
@@ -121,6 +284,7 @@ def init_schema(conn: sqlite3.Connection) -> None:
             depends_on TEXT NOT NULL,
             PRIMARY KEY (path, depends_on)
         );
+        CREATE INDEX IF NOT EXISTS idx_dependencies_dep ON dependencies(depends_on);
 
         CREATE TABLE IF NOT EXISTS tags (
             path TEXT NOT NULL REFERENCES documents(path) ON DELETE CASCADE,
@@ -136,6 +300,7 @@ def init_schema(conn: sqlite3.Connection) -> None:
             line    INTEGER
         );
         CREATE INDEX IF NOT EXISTS idx_ids_req ON ids(req_id, kind);
+        CREATE INDEX IF NOT EXISTS idx_ids_path ON ids(path);
 
         CREATE TABLE IF NOT EXISTS sysml_relationships (
             path      TEXT NOT NULL REFERENCES documents(path) ON DELETE CASCADE,
@@ -146,6 +311,7 @@ def init_schema(conn: sqlite3.Connection) -> None:
         );
         CREATE INDEX IF NOT EXISTS idx_sysml_src ON sysml_relationships(source_id);
         CREATE INDEX IF NOT EXISTS idx_sysml_tgt ON sysml_relationships(target_id);
+        CREATE INDEX IF NOT EXISTS idx_sysml_path ON sysml_relationships(path);
 
         CREATE TABLE IF NOT EXISTS data_models (
             path    TEXT NOT NULL REFERENCES documents(path) ON DELETE CASCADE,
@@ -153,12 +319,14 @@ def init_schema(conn: sqlite3.Connection) -> None:
             lang    TEXT,
             body    TEXT
         );
+        CREATE INDEX IF NOT EXISTS idx_data_models_path ON data_models(path);
 
         CREATE TABLE IF NOT EXISTS api_signatures (
             path      TEXT NOT NULL REFERENCES documents(path) ON DELETE CASCADE,
             section   TEXT,
             signature TEXT
         );
+        CREATE INDEX IF NOT EXISTS idx_api_path ON api_signatures(path);
 
         CREATE TABLE IF NOT EXISTS sysml_elements (
             path      TEXT NOT NULL REFERENCES documents(path) ON DELETE CASCADE,
@@ -171,6 +339,7 @@ def init_schema(conn: sqlite3.Connection) -> None:
         );
         CREATE INDEX IF NOT EXISTS idx_sysml_elem_name ON sysml_elements(name);
         CREATE INDEX IF NOT EXISTS idx_sysml_elem_req ON sysml_elements(req_id);
+        CREATE INDEX IF NOT EXISTS idx_sysml_elem_path ON sysml_elements(path);
 
         CREATE TABLE IF NOT EXISTS data_model_fields (
             path          TEXT NOT NULL REFERENCES documents(path) ON DELETE CASCADE,
@@ -178,19 +347,301 @@ def init_schema(conn: sqlite3.Connection) -> None:
             field_name    TEXT NOT NULL
         );
         CREATE INDEX IF NOT EXISTS idx_dmf_field ON data_model_fields(field_name);
+        CREATE INDEX IF NOT EXISTS idx_dmf_path ON data_model_fields(path);
 
+        CREATE TABLE IF NOT EXISTS doc_sections (
+            id      INTEGER PRIMARY KEY,
+            path    TEXT NOT NULL REFERENCES documents(path) ON DELETE CASCADE,
+            section TEXT,
+            body    TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_doc_sections_path ON doc_sections(path);
+
+        CREATE TABLE IF NOT EXISTS derived_rows (
+            section  TEXT NOT NULL,
+            sort_key TEXT NOT NULL,
+            path     TEXT NOT NULL,
+            feature  TEXT NOT NULL,
+            text     TEXT NOT NULL,
+            PRIMARY KEY (section, sort_key)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_derived_rows_path ON derived_rows(path);
+        CREATE INDEX IF NOT EXISTS idx_derived_rows_feature
+            ON derived_rows(feature, section, sort_key);
+
+        {GRAPH_SCHEMA}
     """)
+    _init_fts(conn)
+    conn.commit()
+
+
+def _init_fts(conn: sqlite3.Connection) -> None:
+    """Create the FTS5 index over doc_sections, if this SQLite build has FTS5.
+
+    External-content table kept in sync by triggers, so the documents ->
+    doc_sections ON DELETE CASCADE also removes search entries. Without FTS5
+    the section text is still stored and --search reports it unavailable.
+    """
+    try:
+        conn.executescript("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS sections_fts USING fts5(
+                section, body,
+                content='doc_sections', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            );
+            CREATE TRIGGER IF NOT EXISTS doc_sections_ai AFTER INSERT ON doc_sections
+            BEGIN
+                INSERT INTO sections_fts (rowid, section, body)
+                VALUES (new.id, new.section, new.body);
+            END;
+            CREATE TRIGGER IF NOT EXISTS doc_sections_ad AFTER DELETE ON doc_sections
+            BEGIN
+                INSERT INTO sections_fts (sections_fts, rowid, section, body)
+                VALUES ('delete', old.id, old.section, old.body);
+            END;
+        """)
+    except sqlite3.OperationalError:
+        pass
+
+
+# --- schema migrations ----------------------------------------------------
+# Each step upgrades an index from a released schema version in place (ALTER
+# TABLE, backfills from the rows already stored), so a plugin upgrade costs a
+# re-derive rather than a reparse of the whole corpus. A step that needs facts
+# the old parser never extracted invalidates only the documents concerned
+# (_invalidate_documents); the next rebuild_all reparses just those. Versions
+# with no path to SCHEMA_VERSION (unreleased development builds, or a newer
+# plugin's index) fall back to drop-and-rebuild.
+
+# meta key set by a migration whose changes reach the derived files; the next
+# derive re-renders everything (see _derive_with_pending).
+META_DERIVE_ALL = "derive_all"
+
+
+def _invalidate_documents(conn: sqlite3.Connection, where: str) -> None:
+    """Make rebuild_all reparse the documents matching ``where``.
+
+    Neither their fingerprint nor their content hash matches the file any more.
+    """
+    conn.execute(f"UPDATE documents SET mtime_ns = -1, content_hash = '' WHERE {where}")
+
+
+def _backfill_graph(conn: sqlite3.Connection) -> None:
+    """Fill graph_edges / graph_closure from the stored depends-on, ID and SysML rows."""
+    recs: Dict[str, Dict[str, Any]] = {
+        path: {"path": path, "doc_id": doc_id or "", "depends_on": [], "req_ids": [],
+               "sysml_elements": [], "sysml_relationships": []}
+        for path, doc_id in conn.execute("SELECT path, doc_id FROM documents")
+    }
+    for path, dep in conn.execute("SELECT path, depends_on FROM dependencies"):
+        recs[path]["depends_on"].append(dep)
+    for path, req_id, kind in conn.execute("SELECT path, req_id, kind FROM ids"):
+        recs[path]["req_ids"].append({"req_id": req_id, "kind": kind})
+    for path, name, req_id in conn.execute(
+            "SELECT path, name, req_id FROM sysml_elements ORDER BY rowid"):
+        recs[path]["sysml_elements"].append({"name": name, "req_id": req_id})
+    for path, source_id, rel_type, target_id in conn.execute(
+            "SELECT path, source_id, rel_type, target_id FROM sysml_relationships"):
+        recs[path]["sysml_relationships"].append(
+            {"source_id": source_id, "rel_type": rel_type, "target_id": target_id})
+    conn.execute("DELETE FROM graph_edges")
+    conn.executemany(
+        "INSERT INTO graph_edges (path, src, dst, kind) VALUES (?,?,?,?)",
+        ((path, src, dst, kind) for path, rec in recs.items()
+         for src, dst, kind in _graph_edges(rec)),
+    )
+    refresh_graph(conn, None)
+
+
+def _migrate_1_to_9(conn: sqlite3.Connection) -> None:
+    """v1 (the last released schema) to v9; v2-v8 never shipped.
+
+    - documents gains the (size, mtime_ns, inode) stat fingerprint
+    - the traceability graph is backfilled from the stored rows
+    - v1 stored no section text, and any document with a body has some, so
+      every document is reparsed by the next rebuild_all. Until then its
+      facts stay queryable; only --search comes up empty.
+
+    The new tables and path indexes are created by init_schema afterwards.
+    """
+    for column in ("size", "mtime_ns", "inode"):
+        conn.execute(f"ALTER TABLE documents ADD COLUMN {column} INTEGER DEFAULT 0")
+    for statement in GRAPH_SCHEMA.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_dependencies_dep ON dependencies(depends_on)")
+    _backfill_graph(conn)
+    _invalidate_documents(conn, "1")
+    conn.execute(f"INSERT OR REPLACE INTO meta VALUES('{META_DERIVE_ALL}', '1')")
+
+
+# from-version -> (version it upgrades to, step).
+MIGRATIONS: Dict[str, Tuple[str, Callable[[sqlite3.Connection], None]]] = {
+    "1": ("9", _migrate_1_to_9),
+}
+
+
+def _migrate(conn: sqlite3.Connection, version: str) -> bool:
+    """Run the MIGRATIONS steps from ``version`` in one transaction.
+
+    Returns False (nothing changed) when there is no path to SCHEMA_VERSION.
+    """
+    steps = []
+    while version != SCHEMA_VERSION:
+        if version not in MIGRATIONS:
+            return False
+        version, step = MIGRATIONS[version]
+        steps.append(step)
     conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for step in steps:
+            step(conn)
+        conn.execute(
+            f"INSERT OR REPLACE INTO meta VALUES('schema_version', '{SCHEMA_VERSION}')")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return True
 
 
 # --- hashing --------------------------------------------------------------
 
-def file_hash(abs_path: str) -> str:
-    h = hashlib.sha256()
+def stat_fingerprint(st: os.stat_result) -> Tuple[int, int, int]:
+    """(size, mtime_ns, inode) used to skip reading files that did not change."""
+    return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+def _blob_hasher(size: int) -> Any:
+    return hashlib.sha1(b"blob %d\0" % size)
+
+
+def _digest(abs_path: str, hasher: Any) -> str:
     with open(abs_path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
-    return h.hexdigest()
+        for chunk in iter(lambda: f.read(65536), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def file_hash(abs_path: str) -> str:
+    """Content identity of a document: its git blob id.
+
+    Hashing the way git does lets rebuild_all take the ids git already has
+    for clean tracked files (git_index_entries) instead of reading them.
+    """
+    return _digest(abs_path, _blob_hasher(os.path.getsize(abs_path)))
+
+
+# --- git-aware change detection -------------------------------------------
+# In a git work tree, one ``git ls-files --stage --debug`` lists the blob id
+# of every tracked document together with the stat data git cached when it
+# last hashed the file. Where that stat data still matches the file (the test
+# git itself uses to skip clean files), the blob id is the content hash and
+# the file need not be read. Dirty, untracked and racily-clean files are
+# hashed by file_hash as before.
+
+GIT_TIMEOUT_S = 10.0
+GIT_DEBUG_RE = re.compile(
+    rb"ctime: (\d+):(\d+)\s+mtime: (\d+):(\d+)\s+dev: \d+\s+ino: (\d+)\s+"
+    rb"uid: \d+\s+gid: \d+\s+size: (\d+)")
+
+# (blob id, size, mtime_ns, ctime_ns, inode) as cached in git's index; git
+# keeps the low 32 bits of size and inode.
+GitEntry = Tuple[str, int, int, int, int]
+
+
+def resolve_git_hashes(project_root: str) -> bool:
+    """Return True when rebuild_all may take content hashes from git.
+
+    On by default; ``index_options.git_hashes: false`` turns it off.
+    """
+    value = load_index_options(project_root).get("git_hashes", True)
+    if not isinstance(value, bool):
+        print(
+            "[AI-SDD] Warning: 'index_options.git_hashes' in .sdd-config.json must be a "
+            f"boolean (true/false), got {value!r}. Using default (on).",
+            file=sys.stderr,
+        )
+        return True
+    return value
+
+
+def _git_index_file(project_root: str) -> Optional[Path]:
+    """Locate the index of the work tree containing ``project_root``."""
+    override = os.environ.get("GIT_INDEX_FILE")
+    if override:
+        return Path(project_root) / override
+    root = Path(project_root).resolve()
+    for directory in (root, *root.parents):
+        dot_git = directory / ".git"
+        if dot_git.is_dir():
+            return dot_git / "index"
+        if dot_git.is_file():  # linked worktree or submodule: "gitdir: <path>"
+            try:
+                text = dot_git.read_text(encoding="utf-8").strip()
+            except OSError:
+                return None
+            if not text.startswith("gitdir:"):
+                return None
+            return directory / text[len("gitdir:"):].strip() / "index"
+    return None
+
+
+def git_index_entries(project_root: str, sdd_root: str) -> Dict[str, GitEntry]:
+    """Return sdd-relative path -> GitEntry for the tracked files under sdd_root.
+
+    Empty when git is unavailable, ``project_root`` is not in a work tree, or
+    the repository does not use SHA-1 object ids. Unmerged entries and entries
+    git could not yet vouch for (modified in the same clock tick as the index
+    was written) are left out.
+    """
+    index_file = _git_index_file(project_root)
+    if index_file is None:
+        return {}
+    try:
+        index_mtime_ns = os.stat(index_file).st_mtime_ns
+        proc = subprocess.run(
+            ["git", "ls-files", "--stage", "--debug", "-z", "--", sdd_root],
+            cwd=project_root, capture_output=True, timeout=GIT_TIMEOUT_S,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return {}
+    if proc.returncode != 0:
+        return {}
+    entries: Dict[str, GitEntry] = {}
+    prefix = sdd_root.rstrip("/") + "/"
+    # "<mode> <blob> <stage>\t<path>\0" followed by the entry's debug lines.
+    chunks = proc.stdout.split(b"\0")
+    header = chunks[0]
+    for chunk in chunks[1:]:
+        debug, _sep, next_header = chunk.rpartition(b"\n")
+        meta, _tab, raw_path = header.partition(b"\t")
+        header = next_header
+        fields = meta.split()
+        m = GIT_DEBUG_RE.search(debug)
+        if len(fields) != 3 or m is None or fields[2] != b"0" or len(fields[1]) != 40:
+            continue
+        ctime_s, ctime_ns, mtime_s, mtime_ns, ino, size = (int(g) for g in m.groups())
+        mtime = mtime_s * 1_000_000_000 + mtime_ns
+        if mtime >= index_mtime_ns:
+            continue  # racily clean: the file may have changed after git hashed it
+        path = os.fsdecode(raw_path)
+        if path.startswith(prefix):
+            entries[path[len(prefix):]] = (fields[1].decode("ascii"), size, mtime,
+                                           ctime_s * 1_000_000_000 + ctime_ns, ino)
+    return entries
+
+
+def git_clean_hash(entry: Optional[GitEntry], st: os.stat_result) -> str:
+    """The entry's blob id if ``st`` still matches git's cached stat data, else ""."""
+    if entry is None:
+        return ""
+    blob, size, mtime_ns, ctime_ns, ino = entry
+    if (size != st.st_size & 0xFFFFFFFF or mtime_ns != st.st_mtime_ns
+            or ctime_ns != st.st_ctime_ns or (ino and ino != st.st_ino & 0xFFFFFFFF)):
+        return ""
+    return blob
 
 
 # --- front matter ---------------------------------------------------------
@@ -207,9 +658,22 @@ DATA_MODEL_LANGS = {"json", "ts", "tsx", "typescript", "yaml", "yml", "sql", "py
 TABLE_ROW_ID_RE = re.compile(r"^\|\s*\**\s*([A-Z]{2,3}[-_]\d{3}(?:_\d{2})*)\s*\**\s*\|")
 DEFINE_HINT_RE = re.compile(r"\bid\s*[:=]", re.IGNORECASE)
 HTTP_RE = re.compile(r"\b(GET|POST|PUT|DELETE|PATCH)\s+(/\S+)")
+# Whole-body scan forms of REQ_ID_RE / HTTP_RE, one per leading literal: the
+# regex engine only has a fast search for a literal prefix (a \b, class or
+# alternation first makes it try every offset). _scan_req_ids checks the
+# [A-Z]{2,3} and word boundary in front of each separator hit; _scan_api
+# checks the boundary in front of each method.
+REQ_ID_TAIL_RES = tuple(re.compile(sep + r"\d{3}(?:_\d{2})*\b") for sep in ("-", "_"))
+HTTP_METHOD_RES = tuple(
+    re.compile(f"({method})" + r"[^\S\n]+(/\S+)")
+    for method in ("GET", "POST", "PUT", "DELETE", "PATCH")
+)
+# Line boundaries str.splitlines() honours besides "\n".
+LINE_BREAK_RE = re.compile("\r\n|[\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
 
+SYSML_REL_TYPES = ("deriveReqt", "refine", "satisfy", "verify", "trace", "containment", "copy")
 SYSML_REL_RE = re.compile(
-    r"(\S+)\s+-\s+(deriveReqt|refine|satisfy|verify|trace|containment|copy)\s+->\s+(\S+)"
+    r"(\S+)\s+-\s+(" + "|".join(SYSML_REL_TYPES) + r")\s+->\s+(\S+)"
 )
 
 # SysML requirementDiagram node definitions:
@@ -239,76 +703,291 @@ def _clean_heading(text: str) -> str:
     return text.strip()
 
 
+# Line classes recorded by _BodyScanner for its chunk-wide requirement-ID and
+# API passes. A fence not (yet) closed is _LINE_UNCLOSED: its IDs count, its API
+# lines only once the fence closes.
+_LINE_TEXT, _LINE_FENCED, _LINE_UNCLOSED, _LINE_HEADING, _LINE_DELIM = range(5)
+
+
+def _normalize_breaks(body: str) -> str:
+    """Rewrite every str.splitlines() boundary as a single "\\n"."""
+    if any(c in body for c in "\r\x0b\x0c\x1c\x1d\x1e") or (
+            not body.isascii() and any(c in body for c in "\x85\u2028\u2029")):
+        return LINE_BREAK_RE.sub("\n", body)
+    return body
+
+
+def _structural_lines(text: str) -> List[int]:
+    """Start offsets of lines that may open/close a fence or be a heading."""
+    starts = set()
+    if text.startswith("#"):
+        starts.add(0)
+    pos = text.find("\n#")
+    while pos != -1:
+        starts.add(pos + 1)
+        pos = text.find("\n#", pos + 1)
+    pos = text.find("```")
+    while pos != -1:
+        starts.add(text.rfind("\n", 0, pos) + 1)
+        eol = text.find("\n", pos)
+        if eol == -1:
+            break
+        pos = text.find("```", eol)
+    return sorted(starts)
+
+
 def extract_sections_and_scan(body: str) -> Dict[str, List[Dict[str, Any]]]:
-    req_ids: Dict[str, Dict[str, Any]] = {}
-    data_models: List[Dict[str, Any]] = []
-    data_model_fields: List[Dict[str, Any]] = []
-    api_sigs: List[Dict[str, Any]] = []
-    sysml_rels: List[Dict[str, Any]] = []
-    sysml_elems: List[Dict[str, Any]] = []
-
-    section = ""
-    in_fence = False
-    fence_lang = ""
-    fence_section = ""
-    fence_lines: List[str] = []
-
-    lines = body.splitlines()
-    for idx, line in enumerate(lines, start=1):
-        fence_m = FENCE_RE.match(line.strip())
-        if fence_m:
-            if not in_fence:
-                in_fence = True
-                fence_lang = fence_m.group(1).lower()
-                fence_section = section
-                fence_lines = []
-            else:
-                block = "\n".join(fence_lines)
-                if fence_lang == "mermaid":
-                    _extract_sysml_relationships(
-                        block, fence_section, sysml_rels
-                    )
-                    _extract_sysml_elements(
-                        block, fence_section, sysml_elems
-                    )
-                elif fence_lang in DATA_MODEL_LANGS and block.strip():
-                    data_models.append({
-                        "section": fence_section, "lang": fence_lang,
-                        "body": block,
-                    })
-                    for fname in _extract_data_model_fields(fence_lang, block):
-                        data_model_fields.append({
-                            "model_section": fence_section, "field_name": fname,
-                        })
-                for fl in fence_lines:
-                    _collect_api(fl, fence_section, api_sigs)
-                in_fence = False
-                fence_lang = ""
-                fence_lines = []
-            continue
+    """Extract sections, requirement IDs, SysML, data models and API signatures.
+
+    Works on the body as one string rather than line by line: only lines that
+    start with ``#`` or contain a fence marker are examined individually, the
+    runs of plain lines between them are sliced out whole, and requirement IDs
+    and API signatures come from one regex scan each over the body. Results
+    match a line-by-line scan of ``body.splitlines()``.
+    """
+    scanner = _BodyScanner()
+    sections = scanner.feed(body)
+    sections += scanner.close()
+    return scanner.result(sections)
+
+
+def _is_word_char(c: str) -> bool:
+    """Whether ``c`` is a regex \\w character (the test behind \\b)."""
+    return c.isalnum() or c == "_"
+
+
+class _RunCursor:
+    """Maps ascending body offsets to their run's (line class, section)."""
+
+    def __init__(self, runs: List[List[Any]]) -> None:
+        self.runs = runs
+        self.idx = 0
+
+    def at(self, pos: int) -> Tuple[int, str]:
+        runs = self.runs
+        while self.idx + 1 < len(runs) and runs[self.idx + 1][0] <= pos:
+            self.idx += 1
+        run = runs[self.idx]
+        return run[1], run[2]
+
+
+class _BodyScanner:
+    """extract_sections_and_scan over a body fed in chunks of whole lines.
+
+    Each chunk must end on a line break (or at the end of the body). Section,
+    fence and line-number state carries over between chunks, so feeding a body
+    whole or in pieces gives the same result. feed() returns the sections
+    completed so far; the result lists fill in place as chunks arrive.
+    """
+
+    def __init__(self) -> None:
+        self.req_ids: List[Dict[str, Any]] = []
+        self.data_models: List[Dict[str, Any]] = []
+        self.data_model_fields: List[Dict[str, Any]] = []
+        self.api_signatures: List[Dict[str, Any]] = []
+        self.sysml_relationships: List[Dict[str, Any]] = []
+        self.sysml_elements: List[Dict[str, Any]] = []
+        self._req_index: Dict[str, Dict[str, Any]] = {}
+        self._section = ""
+        self._in_fence = False
+        self._fence_lang = ""
+        self._fence_section = ""
+        self._text_pieces: List[str] = []
+        self._fence_pieces: List[str] = []
+        # API signatures inside a fence still open at the end of a chunk; kept
+        # only if the fence closes.
+        self._fence_api: List[Dict[str, Any]] = []
+        self._line_base = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, str]]:
+        text = _normalize_breaks(chunk)
+        size = len(text)
+        sections: List[Dict[str, str]] = []
+        # [start offset, line class, section]; an open fence is _LINE_UNCLOSED
+        # until its closing line is seen.
+        runs: List[List[Any]] = [
+            [0, _LINE_UNCLOSED if self._in_fence else _LINE_TEXT, self._section]]
+        open_run: Optional[List[Any]] = runs[0] if self._in_fence else None
+        carried_fence = self._in_fence
+        run_start = 0
+        for start in _structural_lines(text):
+            end = text.find("\n", start)
+            if end == -1:
+                end = size
+            line = text[start:end]
+            fence_m = FENCE_RE.match(line.strip()) if "```" in line else None
+            if not fence_m:
+                if self._in_fence or line[:1] != "#":
+                    continue
+                heading_m = HEADING_RE.match(line)
+                if not heading_m:
+                    continue
+                # Lines since the previous structural line (none when start == run_start).
+                if start > run_start:
+                    self._add_piece(text[run_start:start - 1])
+                run_start = end + 1
+                _flush_section(self._section, self._text_pieces, sections)
+                self._text_pieces = []
+                self._section = _clean_heading(heading_m.group(2))
+                runs.append([start, _LINE_HEADING, self._section])
+                runs.append([end + 1, _LINE_TEXT, self._section])
+                continue
 
-        if in_fence:
-            fence_lines.append(line)
-            _collect_req_ids(line, section, idx, req_ids)
-            continue
+            if start > run_start:
+                self._add_piece(text[run_start:start - 1])
+            run_start = end + 1
+            runs.append([start, _LINE_DELIM, self._section])
+            if not self._in_fence:
+                self._in_fence = True
+                self._fence_lang = fence_m.group(1).lower()
+                self._fence_section = self._section
+                self._fence_pieces = []
+                open_run = [end + 1, _LINE_UNCLOSED, self._section]
+                runs.append(open_run)
+                continue
 
-        heading_m = HEADING_RE.match(line)
-        if heading_m:
-            section = _clean_heading(heading_m.group(2))
-            _collect_req_ids(line, section, idx, req_ids, heading=True)
-            continue
+            self._close_fence()
+            if open_run is not None:
+                open_run[1] = _LINE_FENCED
+                open_run = None
+            runs.append([end + 1, _LINE_TEXT, self._section])
+
+        if run_start < size:
+            self._add_piece(text[run_start:size - 1 if text.endswith("\n") else size])
+        if carried_fence and runs[0][1] == _LINE_FENCED:
+            self.api_signatures.extend(self._fence_api)
+            self._fence_api = []
+        self._scan_req_ids(text, runs)
+        self._scan_api(text, runs)
+        self._line_base += text.count("\n")
+        return sections
+
+    def close(self) -> List[Dict[str, str]]:
+        """Finish the body; returns its last section."""
+        sections: List[Dict[str, str]] = []
+        _flush_section(self._section, self._text_pieces, sections)
+        self._text_pieces = []
+        self._fence_pieces = []
+        self._fence_api = []
+        return sections
+
+    def result(self, sections: Iterable[Dict[str, str]]) -> Dict[str, Any]:
+        return {
+            "req_ids": self.req_ids,
+            "data_models": self.data_models,
+            "data_model_fields": self.data_model_fields,
+            "api_signatures": self.api_signatures,
+            "sysml_relationships": self.sysml_relationships,
+            "sysml_elements": self.sysml_elements,
+            "sections": sections,
+        }
 
-        _collect_req_ids(line, section, idx, req_ids)
-        _collect_api(line, section, api_sigs)
+    def _add_piece(self, piece: str) -> None:
+        self._text_pieces.append(piece)
+        if self._in_fence:
+            self._fence_pieces.append(piece)
+
+    def _close_fence(self) -> None:
+        block = "\n".join(self._fence_pieces)
+        fence_lang = self._fence_lang
+        fence_section = self._fence_section
+        if fence_lang == "mermaid":
+            _extract_sysml_relationships(
+                block, fence_section, self.sysml_relationships
+            )
+            _extract_sysml_elements(
+                block, fence_section, self.sysml_elements
+            )
+        elif fence_lang in DATA_MODEL_LANGS and block.strip():
+            self.data_models.append({
+                "section": fence_section, "lang": fence_lang,
+                "body": block,
+            })
+            for fname in _extract_data_model_fields(fence_lang, block):
+                self.data_model_fields.append({
+                    "model_section": fence_section, "field_name": fname,
+                })
+        self._in_fence = False
+        self._fence_lang = ""
+        self._fence_pieces = []
+
+    def _scan_req_ids(self, text: str, runs: List[List[Any]]) -> None:
+        acc = self._req_index
+        cursor = _RunCursor(runs)
+        line_no = self._line_base + 1
+        counted = 0
+        def_ctx_line = -1
+        is_def_ctx = False
+        hits = [m for pattern in REQ_ID_TAIL_RES for m in pattern.finditer(text)]
+        hits.sort(key=lambda m: m.start())
+        for m in hits:
+            sep = m.start()
+            # REQ_ID_RE's [A-Z]{2,3} and leading \b, checked backwards from the separator.
+            if sep < 2 or not ("A" <= text[sep - 1] <= "Z" and "A" <= text[sep - 2] <= "Z"):
+                continue
+            start = sep - 2
+            if start and "A" <= text[start - 1] <= "Z":
+                start -= 1
+            if start and _is_word_char(text[start - 1]):
+                continue
+            line_class, section = cursor.at(start)
+            if line_class == _LINE_DELIM:
+                continue
+            line_no += text.count("\n", counted, start)
+            counted = start
+            if line_no != def_ctx_line:
+                line_start = text.rfind("\n", 0, start) + 1
+                line_end = text.find("\n", start)
+                line = text[line_start:line_end if line_end != -1 else len(text)]
+                is_def_ctx = (
+                        line_class == _LINE_HEADING
+                        or bool(TABLE_ROW_ID_RE.match(line.strip()))
+                        or bool(DEFINE_HINT_RE.search(line))
+                )
+                def_ctx_line = line_no
+            rid = text[start:m.end()]
+            kind = "def" if is_def_ctx else "ref"
+            existing = acc.get(rid)
+            if existing is None:
+                entry = {"req_id": rid, "kind": kind, "section": section, "line": line_no}
+                acc[rid] = entry
+                self.req_ids.append(entry)
+            elif kind == "def" and existing["kind"] != "def":
+                existing["kind"] = "def"
+                existing["section"] = section
+                existing["line"] = line_no
+
+    def _scan_api(self, text: str, runs: List[List[Any]]) -> None:
+        hits = []
+        for pattern in HTTP_METHOD_RES:
+            m = pattern.search(text)
+            while m is not None:
+                hits.append(m)
+                m = pattern.search(text, m.start() + 1)
+        hits.sort(key=lambda m: m.start())
+
+        cursor = _RunCursor(runs)
+        consumed = 0
+        for m in hits:
+            start = m.start()
+            # Leftmost, non-overlapping, \b-anchored: what HTTP_RE.finditer would yield.
+            if start < consumed or (start and _is_word_char(text[start - 1])):
+                continue
+            consumed = m.end()
+            line_class, section = cursor.at(start)
+            sig = {"section": section, "signature": f"{m.group(1)} {m.group(2)}"}
+            if line_class in (_LINE_TEXT, _LINE_FENCED):
+                self.api_signatures.append(sig)
+            elif line_class == _LINE_UNCLOSED:
+                self._fence_api.append(sig)
 
-    return {
-        "req_ids": list(req_ids.values()),
-        "data_models": data_models,
-        "data_model_fields": data_model_fields,
-        "api_signatures": api_sigs,
-        "sysml_relationships": sysml_rels,
-        "sysml_elements": sysml_elems,
-    }
+
+def _flush_section(section: str, lines: List[str],
+                   acc: List[Dict[str, str]]) -> None:
+    """Record one section's full text for the full-text search table."""
+    text = "\n".join(lines).strip()
+    if section or text:
+        acc.append({"section": section, "text": text})
 
 
 def _extract_sysml_relationships(
@@ -317,6 +996,8 @@ def _extract_sysml_relationships(
     if "requirementDiagram" not in block:
         return
     for line in block.splitlines():
+        if "->" not in line:  # every relationship has an arrow
+            continue
         m = SYSML_REL_RE.search(line)
         if m:
             acc.append({
@@ -391,45 +1072,98 @@ def _extract_data_model_fields(lang: str, block: str) -> List[str]:
     return fields
 
 
-def _collect_req_ids(line: str, section: str, line_no: int,
-                     acc: Dict[str, Dict[str, Any]],
-                     heading: bool = False) -> None:
-    matches = REQ_ID_RE.findall(line)
-    if not matches:
-        return
-    is_def_ctx = (
-            heading
-            or bool(TABLE_ROW_ID_RE.match(line.strip()))
-            or bool(DEFINE_HINT_RE.search(line))
-    )
-    for rid in matches:
-        kind = "def" if is_def_ctx else "ref"
-        existing = acc.get(rid)
-        if existing is None:
-            acc[rid] = {"req_id": rid, "kind": kind, "section": section, "line": line_no}
-        elif kind == "def" and existing["kind"] != "def":
-            existing["kind"] = "def"
-            existing["section"] = section
-            existing["line"] = line_no
-
-
-def _collect_api(line: str, section: str, acc: List[Dict[str, Any]]) -> None:
-    for m in HTTP_RE.finditer(line):
-        acc.append({"section": section, "signature": f"{m.group(1)} {m.group(2)}"})
+# --- per-file + orchestration --------------------------------------------
 
+# Documents are read and scanned in chunks of about this many bytes.
+READ_CHUNK_BYTES = 1 << 20
+# Documents at least this large are scanned lazily: their sections stream into
+# doc_sections while upsert_document runs, instead of being held in the record.
+LAZY_SCAN_MIN_BYTES = 8 << 20
+_LINE_BREAK_CHARS = "\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+
+
+def _iter_text_chunks(fb: Any, hasher: Any = None) -> Iterator[str]:
+    """Decode a binary file in chunks that each end on a line break (or EOF).
+
+    A trailing "\\r" is held back in case the next chunk starts with "\\n".
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    carry = ""
+    while True:
+        raw = fb.read(READ_CHUNK_BYTES)
+        if hasher is not None:
+            hasher.update(raw)
+        if not raw:
+            text = carry + decoder.decode(b"", True)
+            if text:
+                yield text
+            return
+        text = carry + decoder.decode(raw)
+        cut = max(text.rfind(c) for c in _LINE_BREAK_CHARS) + 1
+        if cut == len(text) and text.endswith("\r"):
+            cut -= 1
+        carry = text[cut:]
+        if cut:
+            yield text[:cut]
+
+
+def _read_document(fb: Any, hasher: Any = None) -> Tuple[str, Iterator[str]]:
+    """Return (front matter, body chunks) for an open binary document.
+
+    Only the head of the file is examined for front matter; the body is
+    decoded lazily as the returned iterator is consumed.
+    """
+    chunks = _iter_text_chunks(fb, hasher)
+    head = ""
+    for chunk in chunks:
+        head += chunk
+        if head.count("\n") >= FM_MAX_LINES or len(head.splitlines()) >= FM_MAX_LINES:
+            break
+    fm_text, body_offset = split_front_matter_head(head)
+    return fm_text, itertools.chain((head[body_offset:],), chunks)
+
+
+def _scan_body(chunks: Iterable[str], scanner: "_BodyScanner") -> Iterator[Dict[str, str]]:
+    for chunk in chunks:
+        yield from scanner.feed(chunk)
+    yield from scanner.close()
+
+
+def _lazy_sections(abs_path: str, scanner: "_BodyScanner") -> Iterator[Dict[str, str]]:
+    with open(abs_path, "rb") as fb:
+        _fm_text, chunks = _read_document(fb)
+        yield from _scan_body(chunks, scanner)
 
-# --- per-file + orchestration --------------------------------------------
 
 def scan_document(abs_path: str, project_root: str, sdd_root: str,
                   precomputed_hash: str = "") -> Dict[str, Any]:
+    """Parse one document into an index record.
+
+    The file is read in READ_CHUNK_BYTES chunks: front matter from the head,
+    body through _BodyScanner. Documents of LAZY_SCAN_MIN_BYTES or more come
+    back with ``sections`` as an iterator that re-reads the body; the other
+    extracted lists fill in as it is consumed (upsert_document drains it
+    first). Peak memory is then bounded by the largest section, not the file.
+    Such records must be upserted in the process that scanned them.
+    """
     rel = str(Path(abs_path).relative_to(Path(project_root) / sdd_root))
+    # Stat before reading: a write racing the read leaves a stale fingerprint,
+    # which only costs a re-hash on the next rebuild.
+    st = os.stat(abs_path)
+    scanner = _BodyScanner()
+    lazy = st.st_size >= LAZY_SCAN_MIN_BYTES
+    hasher = None if precomputed_hash or lazy else _blob_hasher(st.st_size)
     with open(abs_path, "rb") as fb:
-        raw = fb.read()
-    content_hash = precomputed_hash or hashlib.sha256(raw).hexdigest()
-    text = raw.decode("utf-8", errors="replace")
-    fm_text, body = split_front_matter(text)
+        fm_text, chunks = _read_document(fb, hasher)
+        if lazy:
+            sections: Iterable[Dict[str, str]] = _lazy_sections(abs_path, scanner)
+        else:
+            sections = list(_scan_body(chunks, scanner))
+    if hasher is not None:
+        content_hash = hasher.hexdigest()
+    else:
+        content_hash = precomputed_hash or file_hash(abs_path)
     fm = parse_front_matter(fm_text)
-    extracted = extract_sections_and_scan(body)
     return {
         "path": rel,
         "content_hash": content_hash,
@@ -446,151 +1180,1361 @@ def scan_document(abs_path: str, project_root: str, sdd_root: str,
         "updated": fm.get("updated", ""),
         "depends_on": fm.get("depends-on", []),
         "tags": fm.get("tags", []),
-        "mtime": Path(abs_path).stat().st_mtime,
-        **extracted,
+        "mtime": st.st_mtime,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "inode": st.st_ino,
+        **scanner.result(sections),
     }
 
 
+@functools.lru_cache(maxsize=None)
+def parser_version() -> str:
+    """Digest of the code that turns a document into a record.
+
+    Part of the sdd_parse_cache key, so records cached by another plugin
+    build are never reused.
+    """
+    hasher = hashlib.sha256()
+    for name in ("sdd_index.py", "fm_parser.py"):
+        hasher.update(Path(__file__).with_name(name).read_bytes())
+    return hasher.hexdigest()[:16]
+
+
+def _open_parse_cache(project_root: str) -> Optional[sdd_parse_cache.ParseCache]:
+    cache_file, max_bytes = sdd_parse_cache.resolve_parse_cache(project_root)
+    if not cache_file:
+        return None
+    return sdd_parse_cache.shared(cache_file, parser_version(), max_bytes)
+
+
+def _scan_or_reuse(abs_path: str, project_root: str, sdd_root: str, content_hash: str,
+                   st: os.stat_result,
+                   cache: Optional[sdd_parse_cache.ParseCache]) -> Tuple[Dict[str, Any], bool]:
+    """Return (record, reused): the parse cache's record for ``content_hash``
+    with this file's path and stat fields, or a fresh scan_document.
+
+    ``st`` must be taken before the file was hashed (see scan_document).
+    """
+    if cache is not None and st.st_size < LAZY_SCAN_MIN_BYTES:
+        content = cache.get(content_hash)
+        if content is not None:
+            content.update(
+                path=str(Path(abs_path).relative_to(Path(project_root) / sdd_root)),
+                content_hash=content_hash, mtime=st.st_mtime, size=st.st_size,
+                mtime_ns=st.st_mtime_ns, inode=st.st_ino,
+            )
+            return content, True
+    return scan_document(abs_path, project_root, sdd_root, precomputed_hash=content_hash), False
+
+
+def _remember_parse(cache: Optional[sdd_parse_cache.ParseCache], rec: Dict[str, Any],
+                    reused: bool) -> None:
+    if cache is None:
+        return
+    if reused:
+        cache.hit(rec["content_hash"])
+    elif isinstance(rec["sections"], list):  # lazily scanned records are not cached
+        cache.put(rec)
+
+
 def upsert_document(conn: sqlite3.Connection, rec: Dict[str, Any]) -> None:
     path = rec["path"]
     conn.execute("DELETE FROM documents WHERE path = ?", (path,))
     conn.execute(
         "INSERT INTO documents (path, content_hash, doc_id, title, type, category, "
-        "status, sdd_phase, impl_status, priority, risk, created, updated, mtime) "
-        "VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+        "status, sdd_phase, impl_status, priority, risk, created, updated, mtime, "
+        "size, mtime_ns, inode) "
+        "VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
         (path, rec["content_hash"], rec["doc_id"], rec["title"], rec["type"],
          rec["category"], rec["status"], rec["sdd_phase"], rec["impl_status"],
-         rec["priority"], rec["risk"], rec["created"], rec["updated"], rec["mtime"]),
+         rec["priority"], rec["risk"], rec["created"], rec["updated"], rec["mtime"],
+         rec["size"], rec["mtime_ns"], rec["inode"]),
     )
-    for dep in rec["depends_on"]:
-        conn.execute(
-            "INSERT OR IGNORE INTO dependencies (path, depends_on) VALUES (?,?)",
-            (path, dep),
-        )
-    for tag in rec.get("tags", []):
+    # Sections first: for a lazily scanned record (scan_document) draining them
+    # is what fills the other extracted lists.
+    conn.executemany(
+        "INSERT INTO doc_sections (path, section, body) VALUES (?,?,?)",
+        ((path, sec["section"], sec["text"]) for sec in rec.get("sections", [])),
+    )
+    # One executemany per child table; every child table is indexed on path so
+    # the ON DELETE CASCADE above stays a point lookup on large indexes.
+    conn.executemany(
+        "INSERT OR IGNORE INTO dependencies (path, depends_on) VALUES (?,?)",
+        [(path, dep) for dep in rec["depends_on"]],
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO tags (path, tag) VALUES (?,?)",
+        [(path, tag) for tag in rec.get("tags", [])],
+    )
+    conn.executemany(
+        "INSERT INTO ids (path, req_id, kind, section, line) VALUES (?,?,?,?,?)",
+        [(path, r["req_id"], r["kind"], r["section"], r["line"])
+         for r in rec["req_ids"]],
+    )
+    conn.executemany(
+        "INSERT INTO sysml_relationships (path, source_id, rel_type, target_id, section) "
+        "VALUES (?,?,?,?,?)",
+        [(path, sr["source_id"], sr["rel_type"], sr["target_id"], sr["section"])
+         for sr in rec.get("sysml_relationships", [])],
+    )
+    conn.executemany(
+        "INSERT INTO data_models (path, section, lang, body) VALUES (?,?,?,?)",
+        [(path, d["section"], d["lang"], d["body"]) for d in rec["data_models"]],
+    )
+    conn.executemany(
+        "INSERT INTO data_model_fields (path, model_section, field_name) "
+        "VALUES (?,?,?)",
+        [(path, f["model_section"], f["field_name"])
+         for f in rec.get("data_model_fields", [])],
+    )
+    conn.executemany(
+        "INSERT INTO api_signatures (path, section, signature) VALUES (?,?,?)",
+        [(path, a["section"], a["signature"]) for a in rec["api_signatures"]],
+    )
+    conn.executemany(
+        "INSERT INTO sysml_elements "
+        "(path, kind, keyword, name, req_id, elem_type, section) "
+        "VALUES (?,?,?,?,?,?,?)",
+        [(path, se["kind"], se["keyword"], se["name"], se["req_id"],
+          se["elem_type"], se["section"])
+         for se in rec.get("sysml_elements", [])],
+    )
+    conn.executemany(
+        "INSERT INTO graph_edges (path, src, dst, kind) VALUES (?,?,?,?)",
+        [(path, src, dst, kind) for src, dst, kind in _graph_edges(rec)],
+    )
+
+
+# Tables holding one document's extracted rows (documents.path ON DELETE CASCADE).
+DOCUMENT_TABLES = ("dependencies", "tags", "ids", "sysml_relationships", "data_models",
+                   "api_signatures", "sysml_elements", "data_model_fields", "doc_sections")
+
+
+def rename_documents(conn: sqlite3.Connection,
+                     renames: List[Tuple[str, str, os.stat_result]]) -> None:
+    """Re-key documents that moved with unchanged content: (old, new, new stat).
+
+    One UPDATE per table covers the whole batch; foreign keys are checked at
+    commit, when parent and child rows agree again. graph_edges also rewrites
+    the document's own ``doc:`` node (only its own edges name it).
+    graph_closure and derived_rows are left to refresh_graph and the derive,
+    which must be given both paths.
+    """
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS renames ("
+                 " old TEXT PRIMARY KEY, new TEXT NOT NULL,"
+                 " mtime REAL, mtime_ns INTEGER, inode INTEGER)")
+    conn.execute("DELETE FROM temp.renames")
+    conn.executemany(
+        "INSERT INTO temp.renames (old, new, mtime, mtime_ns, inode) VALUES (?,?,?,?,?)",
+        [(old, new, st.st_mtime, st.st_mtime_ns, st.st_ino) for old, new, st in renames],
+    )
+    conn.execute("PRAGMA defer_foreign_keys = ON")  # reset by the next commit
+    moved = "WHERE path IN (SELECT old FROM temp.renames)"
+    conn.execute(
+        "UPDATE documents SET (path, mtime, mtime_ns, inode) = "
+        "(SELECT new, mtime, mtime_ns, inode FROM temp.renames WHERE old = documents.path) "
+        + moved)
+    for table in DOCUMENT_TABLES:
         conn.execute(
-            "INSERT OR IGNORE INTO tags (path, tag) VALUES (?,?)",
-            (path, tag),
-        )
+            f"UPDATE {table} SET path = "
+            f"(SELECT new FROM temp.renames WHERE old = {table}.path) " + moved)
+    new_node = f"'{GRAPH_DOC}' || (SELECT new FROM temp.renames WHERE old = graph_edges.path)"
+    conn.execute(
+        "UPDATE graph_edges SET "
+        "path = (SELECT new FROM temp.renames WHERE old = graph_edges.path), "
+        f"src = CASE WHEN src = '{GRAPH_DOC}' || path THEN {new_node} ELSE src END, "
+        f"dst = CASE WHEN dst = '{GRAPH_DOC}' || path THEN {new_node} ELSE dst END "
+        + moved)
+    conn.execute("DELETE FROM temp.renames")
+
+
+# --- traceability graph ---------------------------------------------------
+#
+# graph_edges holds every document's traceability edges in impact direction:
+# src -> dst means "a change to src may affect dst". Nodes are prefixed
+# strings:
+#   doc:<path>     a document
+#   id:<doc_id>    a document's ID, as named by other documents' depends-on
+#   req:<REQ_ID>   a requirement ID
+#   sysml:<name>   a SysML element without a requirement ID
+# A document links itself to its ID ("alias"), so a depends-on edge resolves
+# whenever the target document is (re)indexed, without rewriting dependents.
+# Edges are owned by the document that declares them and replaced with it.
+#
+# graph_closure materializes the transitive depends-on relation between
+# documents (ancestor -> descendant, shortest depth). refresh_graph keeps it
+# current after upserts by recomputing only the documents downstream of a
+# change. Requirement-level impact crosses far more edges (a PRD that "builds
+# on" another feature's IDs links whole features), so its closure is walked on
+# demand over the src/dst indexes instead of being stored.
+
+GRAPH_DOC, GRAPH_ALIAS, GRAPH_REQ, GRAPH_SYSML = "doc:", "id:", "req:", "sysml:"
+
+# Relationships whose source depends on the target (an element satisfies or
+# verifies a requirement); the others (deriveReqt, refine, trace, containment,
+# copy) flow from source to target.
+SYSML_UPSTREAM_RELS = {"satisfy", "verify"}
+
+
+def _graph_edges(rec: Dict[str, Any]) -> Set[Tuple[str, str, str]]:
+    """(src, dst, kind) impact edges declared by one scanned document."""
+    doc = GRAPH_DOC + rec["path"]
+    edges: Set[Tuple[str, str, str]] = set()
+    if rec["doc_id"]:
+        edges.add((doc, GRAPH_ALIAS + rec["doc_id"], "alias"))
+    for dep in rec["depends_on"]:
+        edges.add((GRAPH_ALIAS + dep, doc, "depends-on"))
     for r in rec["req_ids"]:
-        conn.execute(
-            "INSERT INTO ids (path, req_id, kind, section, line) VALUES (?,?,?,?,?)",
-            (path, r["req_id"], r["kind"], r["section"], r["line"]),
-        )
+        if r["kind"] == "def":
+            edges.add((doc, GRAPH_REQ + r["req_id"], "defines"))
+        else:
+            edges.add((GRAPH_REQ + r["req_id"], doc, "references"))
+    req_of = {se["name"]: se["req_id"]
+              for se in rec.get("sysml_elements", []) if se["req_id"]}
+
+    def node(name: str) -> str:
+        return GRAPH_REQ + req_of[name] if name in req_of else GRAPH_SYSML + name
+
     for sr in rec.get("sysml_relationships", []):
-        conn.execute(
-            "INSERT INTO sysml_relationships (path, source_id, rel_type, target_id, section) "
-            "VALUES (?,?,?,?,?)",
-            (path, sr["source_id"], sr["rel_type"], sr["target_id"], sr["section"]),
+        src, dst = node(sr["source_id"]), node(sr["target_id"])
+        if sr["rel_type"] in SYSML_UPSTREAM_RELS:
+            src, dst = dst, src
+        if src != dst:
+            edges.add((src, dst, sr["rel_type"]))
+    return edges
+
+
+def _upstream_of(path: str, parents: Callable[[str], List[str]]) -> Dict[str, int]:
+    """Transitive depends-on targets of ``path`` -> shortest depth (BFS).
+
+    A document on a depends-on cycle is its own ancestor.
+    """
+    depths: Dict[str, int] = {}
+    frontier = [path]
+    depth = 0
+    while frontier:
+        depth += 1
+        nxt = []
+        for node in frontier:
+            for parent in parents(node):
+                if parent not in depths:
+                    depths[parent] = depth
+                    nxt.append(parent)
+        frontier = nxt
+    return depths
+
+
+def _parent_lookup(conn: sqlite3.Connection,
+                   preload: bool) -> Callable[[str], List[str]]:
+    """Return path -> documents it depends on (resolved through doc_id).
+
+    ``preload`` reads the whole relation in one query (full refresh);
+    otherwise parents are fetched per document and memoized.
+    """
+    cache: Dict[str, List[str]] = {}
+    sql = ("SELECT x.path, d.path FROM dependencies x JOIN documents d "
+           "ON d.doc_id = x.depends_on AND d.doc_id != ''")
+    if preload:
+        for child, parent in conn.execute(sql + " ORDER BY x.path, d.path"):
+            cache.setdefault(child, []).append(parent)
+        return lambda path: cache.get(path, [])
+
+    def lookup(path: str) -> List[str]:
+        found = cache.get(path)
+        if found is None:
+            found = cache[path] = [r[1] for r in conn.execute(
+                sql + " WHERE x.path = ? ORDER BY d.path", (path,))]
+        return found
+
+    return lookup
+
+
+def refresh_graph(conn: sqlite3.Connection,
+                  changed_paths: Optional[List[str]]) -> Optional[Set[str]]:
+    """Bring graph_closure up to date after documents were upserted or deleted.
+
+    Runs inside the writer's transaction, before commit. Only the changed
+    documents and those downstream of them (before or after the change,
+    including dependents of a newly appeared doc_id) are recomputed. Returns
+    the documents whose transitive upstream changed, so their derived rows can
+    be re-rendered; None after a full recompute (``changed_paths`` None or
+    larger than INCREMENTAL_DERIVE_MAX).
+    """
+    if changed_paths is None or len(changed_paths) > INCREMENTAL_DERIVE_MAX:
+        conn.execute("DELETE FROM graph_closure")
+        parents = _parent_lookup(conn, preload=True)
+        conn.executemany(
+            "INSERT INTO graph_closure (ancestor, descendant, depth) VALUES (?,?,?)",
+            ((anc, path, depth)
+             for (path,) in conn.execute("SELECT path FROM documents ORDER BY path")
+             for anc, depth in _upstream_of(path, parents).items()),
         )
-    for d in rec["data_models"]:
-        conn.execute(
-            "INSERT INTO data_models (path, section, lang, body) VALUES (?,?,?,?)",
-            (path, d["section"], d["lang"], d["body"]),
+        return None
+
+    def downstream(path: str) -> List[str]:
+        return [r[0] for r in conn.execute(
+            "SELECT descendant FROM graph_closure WHERE ancestor = ?", (path,))]
+
+    stale: Set[str] = set()
+    for path in changed_paths:
+        stale.add(path)
+        stale.update(downstream(path))
+        # Documents naming this one's (possibly new) doc_id in depends-on.
+        for (dependent,) in conn.execute(
+                "SELECT x.path FROM documents d JOIN dependencies x "
+                "ON x.depends_on = d.doc_id WHERE d.path = ? AND d.doc_id != ''", (path,)):
+            stale.add(dependent)
+            stale.update(downstream(dependent))
+
+    parents = _parent_lookup(conn, preload=False)
+    affected: Set[str] = set()
+    for path in sorted(stale):
+        old = dict(conn.execute(
+            "SELECT ancestor, depth FROM graph_closure WHERE descendant = ?", (path,)))
+        exists = conn.execute("SELECT 1 FROM documents WHERE path = ?", (path,)).fetchone()
+        new = _upstream_of(path, parents) if exists else {}
+        if new == old:
+            continue
+        conn.execute("DELETE FROM graph_closure WHERE descendant = ?", (path,))
+        conn.executemany(
+            "INSERT INTO graph_closure (ancestor, descendant, depth) VALUES (?,?,?)",
+            [(anc, path, depth) for anc, depth in new.items()],
         )
-    for f in rec.get("data_model_fields", []):
-        conn.execute(
-            "INSERT INTO data_model_fields (path, model_section, field_name) "
-            "VALUES (?,?,?)",
-            (path, f["model_section"], f["field_name"]),
+        affected.add(path)
+    return affected
+
+
+def _trace_facts(conn: sqlite3.Connection, path: str) -> Dict[str, Set[Any]]:
+    """One document's traceability as stored: defined / referenced IDs,
+    depends-on entries, SysML relations (endpoints as requirement IDs where
+    the diagram gives one) and its transitive dependents."""
+    facts: Dict[str, Set[Any]] = {
+        "defined_ids": set(), "referenced_ids": set(), "depends_on": set(),
+        "sysml": set(), "dependents": set(),
+    }
+    for req_id, kind in conn.execute("SELECT req_id, kind FROM ids WHERE path = ?", (path,)):
+        facts["defined_ids" if kind == "def" else "referenced_ids"].add(req_id)
+    facts["depends_on"].update(r[0] for r in conn.execute(
+        "SELECT depends_on FROM dependencies WHERE path = ?", (path,)))
+    req_of = dict(conn.execute(
+        "SELECT name, req_id FROM sysml_elements WHERE path = ? AND req_id != ''", (path,)))
+    facts["sysml"].update(
+        (req_of.get(src, src), rel, req_of.get(tgt, tgt))
+        for src, rel, tgt in conn.execute(
+            "SELECT source_id, rel_type, target_id FROM sysml_relationships WHERE path = ?",
+            (path,)))
+    facts["dependents"].update(conn.execute(
+        "SELECT descendant, depth FROM graph_closure WHERE ancestor = ? AND descendant != ?",
+        (path, path)))
+    return facts
+
+
+def _diff(old: Set[Any], new: Set[Any]) -> Dict[str, List[Any]]:
+    return {"added": sorted(new - old), "removed": sorted(old - new)}
+
+
+def _impact(conn: sqlite3.Connection, path: str, old: Dict[str, Set[Any]],
+            new: Dict[str, Set[Any]], deleted: bool = False) -> Dict[str, Any]:
+    """What an edit of ``path`` changed and what lies downstream of it.
+
+    IDs: definitions added or removed, requirement endpoints of added or
+    removed SysML relations, and what those derive through SysML relations
+    in any document. Documents: those that depend on ``path`` (transitively,
+    before or after the edit) and those referencing one of the IDs.
+    """
+    changed = {key: _diff(old[key], new[key])
+               for key in ("defined_ids", "referenced_ids", "depends_on")}
+    changed["sysml"] = {
+        side: [f"{src} - {rel} -> {tgt}" for src, rel, tgt in rels]
+        for side, rels in _diff(old["sysml"], new["sysml"]).items()
+    }
+    ids = set(changed["defined_ids"]["added"] + changed["defined_ids"]["removed"])
+    for src, _rel, tgt in old["sysml"] ^ new["sysml"]:
+        ids.update(x for x in (src, tgt) if REQ_ID_RE.fullmatch(x))
+    for req_id in list(ids):
+        ids.update(node[len(GRAPH_REQ):] for node in _walk_graph(
+            conn, GRAPH_REQ + req_id, downstream=True, kinds=SYSML_REL_TYPES)
+            if node.startswith(GRAPH_REQ))
+
+    depth: Dict[str, int] = {}
+    for dependent, hops in old["dependents"] | new["dependents"]:
+        depth[dependent] = min(hops, depth.get(dependent, hops))
+    references: Dict[str, List[str]] = {}
+    for p, req_id in conn.execute(
+            "SELECT DISTINCT path, req_id FROM ids WHERE kind = 'ref' AND path != ? "
+            "AND req_id IN (SELECT value FROM json_each(?)) ORDER BY path, req_id",
+            (path, json.dumps(sorted(ids)))):
+        references.setdefault(p, []).append(req_id)
+    documents = []
+    for p in sorted(set(depth) | set(references),
+                    key=lambda p: (depth.get(p, 1 << 30), p)):
+        row = conn.execute("SELECT doc_id FROM documents WHERE path = ?", (p,)).fetchone()
+        if row is None:
+            continue
+        documents.append({"path": p, "doc_id": row[0] or "", "depends_on_depth": depth.get(p, 0),
+                          "references": references.get(p, [])})
+    return {"path": path, "deleted": deleted, "changed": changed,
+            "ids": sorted(ids), "documents": documents}
+
+
+def _derive_targets(changed_paths: List[str],
+                    affected: Optional[Set[str]]) -> Optional[List[str]]:
+    """Documents to re-derive: the changed ones plus those refresh_graph moved."""
+    if affected is None:
+        return None
+    return sorted(set(changed_paths) | affected)
+
+
+def resolve_workers(project_root: str, override: Optional[int] = None) -> int:
+    """Return the number of rebuild worker processes (1 means serial).
+
+    ``override`` (the ``--workers`` CLI flag) wins over ``index_options.workers``
+    in .sdd-config.json. ``0`` selects one worker per CPU. Invalid values fall
+    back to serial with a warning.
+    """
+    value: Any = override
+    if value is None:
+        value = load_index_options(project_root).get("workers", 1)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        print(
+            "[AI-SDD] Warning: 'index_options.workers' in .sdd-config.json must be a "
+            f"non-negative integer, got {value!r}. Using serial rebuild.",
+            file=sys.stderr,
         )
-    for a in rec["api_signatures"]:
-        conn.execute(
-            "INSERT INTO api_signatures (path, section, signature) VALUES (?,?,?)",
-            (path, a["section"], a["signature"]),
+        return 1
+    if value == 0:
+        return os.cpu_count() or 1
+    return value
+
+
+def resolve_lazy_derive(project_root: str) -> bool:
+    """Return True when update_many leaves the derive to ensure_derived.
+
+    Enabled by ``index_options.lazy_derive: true``.
+    """
+    value = load_index_options(project_root).get("lazy_derive", False)
+    if not isinstance(value, bool):
+        print(
+            "[AI-SDD] Warning: 'index_options.lazy_derive' in .sdd-config.json must be a "
+            f"boolean (true/false), got {value!r}. Using default (off).",
+            file=sys.stderr,
         )
-    for se in rec.get("sysml_elements", []):
-        conn.execute(
-            "INSERT INTO sysml_elements "
-            "(path, kind, keyword, name, req_id, elem_type, section) "
-            "VALUES (?,?,?,?,?,?,?)",
-            (path, se["kind"], se["keyword"], se["name"], se["req_id"],
-             se["elem_type"], se["section"]),
+        return False
+    return value
+
+
+def resolve_paranoid(project_root: str, override: bool = False) -> bool:
+    """Return True when every target must be hashed regardless of its fingerprint.
+
+    Enabled by ``--paranoid`` or ``index_options.paranoid: true``.
+    """
+    if override:
+        return True
+    value = load_index_options(project_root).get("paranoid", False)
+    if not isinstance(value, bool):
+        print(
+            "[AI-SDD] Warning: 'index_options.paranoid' in .sdd-config.json must be a "
+            f"boolean (true/false), got {value!r}. Using default (off).",
+            file=sys.stderr,
         )
+        return False
+    return value
 
 
-def rebuild_all(project_root: str) -> None:
-    sdd_root, req_dir, spec_dir = load_sdd_paths(project_root)
-    conn = connect(db_path(project_root, sdd_root))
+# (abs_path, project_root, sdd_root, old content hash, git index entry or
+# None, (parse cache file or "", its size limit)).
+ScanJob = Tuple[str, str, str, str, Optional[GitEntry], Tuple[str, int]]
+
+# _scan_if_changed outcomes: ("changed", record), ("cached", record) for a
+# record taken from the parse cache, ("unchanged", fingerprint) for a file
+# whose stat moved but whose content did not, ("large", content hash) for a
+# changed file the writer must scan itself, or ("error", None). The third
+# item is (hash seconds, parse or cache lookup seconds) for sdd_metrics,
+# measured where the work ran (possibly a worker process).
+ScanResult = Tuple[str, Any, Tuple[float, float]]
+
+
+def _scan_if_changed(job: ScanJob) -> ScanResult:
+    """Hash one file and scan it when its hash differs from ``old_hash``.
+
+    A file git reports clean is not read for hashing. Module-level (and
+    argument-tuple based) so it can run in a worker process.
+    """
+    abs_path, project_root, sdd_root, old_hash, git_entry, (cache_file, cache_max) = job
     try:
-        init_schema(conn)
-        existing_hashes: Dict[str, str] = {}
+        t0 = time.perf_counter()
+        st = os.stat(abs_path)
+        fingerprint = stat_fingerprint(st)
+        new_hash = git_clean_hash(git_entry, st) or file_hash(abs_path)
+        t1 = time.perf_counter()
+        if old_hash == new_hash:
+            return ("unchanged", fingerprint, (t1 - t0, 0.0))
+        if st.st_size >= LAZY_SCAN_MIN_BYTES:
+            # Lazy records cannot cross a process boundary; the writer scans it.
+            return ("large", new_hash, (t1 - t0, 0.0))
+        cache = (sdd_parse_cache.shared(cache_file, parser_version(), cache_max)
+                 if cache_file else None)
+        rec, reused = _scan_or_reuse(abs_path, project_root, sdd_root, new_hash, st, cache)
+        return ("cached" if reused else "changed", rec, (t1 - t0, time.perf_counter() - t1))
+    except OSError:
+        return ("error", None, (0.0, 0.0))
+
+
+def _scan_changed(jobs: List[ScanJob],
+                  workers: int) -> Iterable[ScanResult]:
+    """Yield _scan_if_changed results in job order, in-process or via a pool."""
+    if workers <= 1 or len(jobs) < PARALLEL_MIN_FILES:
+        for job in jobs:
+            yield _scan_if_changed(job)
+        return
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_scan_if_changed, jobs, chunksize=chunksize)
+
+
+def _match_renames(stale: List[str], existing_hashes: Dict[str, str],
+                   fingerprints: Dict[str, Tuple[int, int, int]], jobs: List[ScanJob],
+                   job_paths: List[str]) -> List[Tuple[str, str, os.stat_result]]:
+    """Pair removed documents with new paths holding identical content.
+
+    Returns (old path, new path, new stat) triples. Only new files whose size
+    matches a removed document are hashed (unless git knows the hash);
+    several candidates with one hash pair up in path order.
+    """
+    if not stale:
+        return []
+    by_hash: Dict[str, List[str]] = {}
+    for path in stale:
+        by_hash.setdefault(existing_hashes[path], []).append(path)
+    sizes = {fingerprints[path][0] for path in stale}
+    renames = []
+    for rel, job in zip(job_paths, jobs):
+        if rel in existing_hashes:
+            continue
         try:
-            for row in conn.execute("SELECT path, content_hash FROM documents"):
-                existing_hashes[row[0]] = row[1]
-        except sqlite3.OperationalError:
-            pass
+            st = os.stat(job[0])
+            if st.st_size not in sizes:
+                continue
+            candidates = by_hash.get(git_clean_hash(job[4], st) or file_hash(job[0]))
+        except OSError:
+            continue
+        if candidates:
+            renames.append((candidates.pop(0), rel, st))
+    return renames
 
-        target_files = iter_target_files(project_root, sdd_root, req_dir, spec_dir)
-        current_paths = set()
-        changed = False
 
-        for abs_path in target_files:
+def rebuild_all(project_root: str, workers: Optional[int] = None,
+                paranoid: bool = False) -> None:
+    sdd_root, req_dir, spec_dir = load_sdd_paths(project_root)
+    workers = resolve_workers(project_root, workers)
+    paranoid = resolve_paranoid(project_root, paranoid)
+    use_git = not paranoid and resolve_git_hashes(project_root)
+    with sdd_metrics.record(project_root, "rebuild"), writer_lock(project_root, sdd_root):
+        conn = connect(db_path(project_root, sdd_root))
+        try:
+            init_schema(conn)
+            existing_hashes: Dict[str, str] = {}
+            fingerprints: Dict[str, Tuple[int, int, int]] = {}
             try:
-                rel = str(Path(abs_path).relative_to(Path(project_root) / sdd_root))
+                for row in conn.execute(
+                        "SELECT path, content_hash, size, mtime_ns, inode FROM documents"
+                ):
+                    existing_hashes[row[0]] = row[1]
+                    fingerprints[row[0]] = (row[2], row[3], row[4])
+            except sqlite3.OperationalError:
+                pass
+
+            walk_start = time.perf_counter()
+            target_files = iter_target_files(project_root, sdd_root, req_dir, spec_dir)
+            sdd_base = Path(project_root) / sdd_root
+            current_paths = set()
+            cache = _open_parse_cache(project_root)
+            cache_spec = (cache.path, cache.max_bytes) if cache is not None else ("", 0)
+            jobs: List[ScanJob] = []
+            job_paths: List[str] = []
+            for abs_path in target_files:
+                rel = str(Path(abs_path).relative_to(sdd_base))
                 current_paths.add(rel)
-                new_hash = file_hash(abs_path)
-                if existing_hashes.get(rel) == new_hash:
-                    continue
-                rec = scan_document(abs_path, project_root, sdd_root,
-                                    precomputed_hash=new_hash)
-                upsert_document(conn, rec)
-                changed = True
-            except OSError:
-                continue
+                if not paranoid and rel in fingerprints:
+                    try:
+                        if stat_fingerprint(os.stat(abs_path)) == fingerprints[rel]:
+                            continue
+                    except OSError:
+                        continue
+                jobs.append((abs_path, project_root, sdd_root,
+                             existing_hashes.get(rel, ""), None, cache_spec))
+                job_paths.append(rel)
+            sdd_metrics.add_phase("walk", time.perf_counter() - walk_start, len(current_paths))
+
+            # Files git can vouch for are not read to be hashed. Asked only
+            # when the walk found candidates, so an unchanged tree costs no
+            # subprocess.
+            if use_git and jobs:
+                git_start = time.perf_counter()
+                git_entries = git_index_entries(project_root, sdd_root)
+                sdd_metrics.add_phase("git", time.perf_counter() - git_start, len(git_entries))
+                jobs = [(*job[:4], git_entries.get(rel), job[5])
+                        for rel, job in zip(job_paths, jobs)]
+
+            # A removed document whose content reappears at a new path was
+            # moved: its rows are re-keyed instead of deleted and reparsed.
+            stale = sorted(set(existing_hashes.keys()) - current_paths)
+            with sdd_metrics.phase("hash"):
+                renames = _match_renames(stale, existing_hashes, fingerprints, jobs, job_paths)
+            if renames:
+                moved_to = {new for _old, new, _st in renames}
+                moved_from = {old for old, _new, _st in renames}
+                kept = [(rel, job) for rel, job in zip(job_paths, jobs) if rel not in moved_to]
+                job_paths, jobs = [rel for rel, _job in kept], [job for _rel, job in kept]
+                stale = [path for path in stale if path not in moved_from]
+            # Removed documents go before the upserts: a document's doc_id is
+            # unique, and a moved-and-edited one keeps it at its new path.
+            with sdd_metrics.phase("upsert", len(stale) + len(renames)):
+                if renames:
+                    rename_documents(conn, renames)
+                for path in stale:
+                    conn.execute("DELETE FROM documents WHERE path = ?", (path,))
+
+            # Single writer: records arrive in path order whatever the worker count.
+            # Hash and parse times are measured where they ran, so with workers
+            # they add up across processes rather than wall time.
+            changed_paths: List[str] = [path for old, new, _st in renames for path in (old, new)]
+            touched = False
+            for rel, job, (status, result, (hash_s, parse_s)) in zip(
+                    job_paths, jobs, _scan_changed(jobs, workers)):
+                if status == "large":
+                    scan_start = time.perf_counter()
+                    result = scan_document(job[0], project_root, sdd_root,
+                                           precomputed_hash=result)
+                    status, parse_s = "changed", time.perf_counter() - scan_start
+                if status != "error":
+                    sdd_metrics.add_phase("hash", hash_s)
+                if status in ("changed", "cached"):
+                    if status == "changed":
+                        sdd_metrics.add_phase("parse", parse_s)
+                        sdd_metrics.document(rel, parse_s, result["size"])
+                    else:
+                        sdd_metrics.add_phase("cache", parse_s)
+                    _remember_parse(cache, result, status == "cached")
+                    with sdd_metrics.phase("upsert"):
+                        upsert_document(conn, result)
+                    changed_paths.append(rel)
+                elif status == "unchanged" and fingerprints.get(rel) != result:
+                    # Content identical (touch, checkout): refresh the fingerprint
+                    # so the next rebuild skips the read again.
+                    conn.execute(
+                        "UPDATE documents SET size = ?, mtime_ns = ?, inode = ? "
+                        "WHERE path = ?",
+                        (*result, rel),
+                    )
+                    touched = True
+            changed_paths.extend(stale)
+            derive_paths: Optional[List[str]] = []
+            if changed_paths:
+                with sdd_metrics.phase("graph"):
+                    affected = refresh_graph(
+                        conn, changed_paths if existing_hashes else None)
+                derive_paths = _derive_targets(changed_paths, affected)
+            if changed_paths or touched:
+                conn.commit()
+            if cache is not None:
+                cache.flush()
 
-        stale = set(existing_hashes.keys()) - current_paths
-        for path in stale:
-            conn.execute("DELETE FROM documents WHERE path = ?", (path,))
-            changed = True
-        if changed or stale:
-            conn.commit()
+            _derive_with_pending(conn, project_root, sdd_root,
+                                 derive_paths if existing_hashes else None)
+        finally:
+            conn.close()
+
+
+def update_one(project_root: str, rel_path: str,
+               conn: Optional[sqlite3.Connection] = None) -> Optional[Dict[str, Any]]:
+    """Re-index one document and refresh the derived files it touches.
+
+    Returns the edit's impact (see _impact): the requirement IDs, depends-on
+    entries and SysML relations that changed, and the downstream documents
+    and IDs to re-check. None when there is no index or the content is
+    unchanged.
+
+    ``conn`` lets a long-lived caller (sdd_daemon) reuse a warm connection;
+    it is left open. Without it a connection is opened for this call.
+    """
+    return update_many(project_root, [rel_path], conn).get(rel_path)
 
-        if changed or not existing_hashes:
-            derive_index(conn, project_root, sdd_root)
-    finally:
-        conn.close()
 
+def update_many(project_root: str, rel_paths: Iterable[str],
+                conn: Optional[sqlite3.Connection] = None,
+                lazy: Optional[bool] = None) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Re-index several documents in one transaction with one derive.
 
-def update_one(project_root: str, rel_path: str) -> None:
+    ``rel_paths`` are project- or sdd-root-relative; files that no longer
+    exist (or are not .md) are removed from the index. Returns each given
+    path's impact as update_one does (None when unchanged); empty when there
+    is no index.
+
+    ``lazy`` (default: ``index_options.lazy_derive``) commits the upsert and
+    marks the derived files dirty instead of regenerating them; see
+    ensure_derived.
+    """
     sdd_root, _req_dir, _spec_dir = load_sdd_paths(project_root)
+    if lazy is None:
+        lazy = resolve_lazy_derive(project_root)
     db_file = db_path(project_root, sdd_root)
     if not Path(db_file).is_file():
+        return {}
+    targets: Dict[str, str] = {}
+    for rel_path in rel_paths:
+        rel = Path(rel_path)
+        targets[rel_path] = (str(rel.relative_to(sdd_root)) if rel.is_relative_to(sdd_root)
+                             else rel_path)
+
+    with sdd_metrics.record(project_root, "update"), writer_lock(project_root, sdd_root):
+        own_conn = conn is None
+        if conn is None:
+            conn = connect(db_file)
+        try:
+            init_schema(conn)
+            cache = _open_parse_cache(project_root)
+            before: Dict[str, Dict[str, Set[Any]]] = {}
+            deleted: Set[str] = set()
+            for sdd_rel in sorted(set(targets.values())):
+                abs_path = str(Path(project_root) / sdd_root / sdd_rel)
+                if not Path(abs_path).is_file() or Path(abs_path).suffix != ".md":
+                    row = conn.execute(
+                        "SELECT 1 FROM documents WHERE path = ?", (sdd_rel,)
+                    ).fetchone()
+                    if row:
+                        before[sdd_rel] = _trace_facts(conn, sdd_rel)
+                        conn.execute("DELETE FROM documents WHERE path = ?", (sdd_rel,))
+                        deleted.add(sdd_rel)
+                    continue
+
+                with sdd_metrics.phase("hash"):
+                    st = os.stat(abs_path)
+                    new_hash = file_hash(abs_path)
+                existing = conn.execute(
+                    "SELECT content_hash FROM documents WHERE path = ?", (sdd_rel,)
+                ).fetchone()
+                if existing and existing[0] == new_hash:
+                    continue
+
+                scan_start = time.perf_counter()
+                rec, reused = _scan_or_reuse(abs_path, project_root, sdd_root, new_hash, st,
+                                             cache)
+                parse_s = time.perf_counter() - scan_start
+                if reused:
+                    sdd_metrics.add_phase("cache", parse_s)
+                else:
+                    sdd_metrics.add_phase("parse", parse_s)
+                    sdd_metrics.document(sdd_rel, parse_s, rec["size"])
+                _remember_parse(cache, rec, reused)
+                before[sdd_rel] = _trace_facts(conn, sdd_rel)
+                with sdd_metrics.phase("upsert"):
+                    upsert_document(conn, rec)
+            if cache is not None:
+                cache.flush()
+            if not before:
+                return {rel_path: None for rel_path in targets}
+
+            changed = sorted(before)
+            with sdd_metrics.phase("graph"):
+                affected = refresh_graph(conn, changed)
+                impacts = {
+                    path: _impact(conn, path, before[path], _trace_facts(conn, path),
+                                  deleted=path in deleted)
+                    for path in changed
+                }
+            derive_paths = _derive_targets(changed, affected)
+            if lazy:
+                # Marked before the commit: a crash in between costs a
+                # redundant derive, never a missed one.
+                _mark_dirty(project_root, sdd_root, derive_paths)
+                conn.commit()
+            else:
+                conn.commit()
+                _derive_with_pending(conn, project_root, sdd_root, derive_paths)
+            return {rel_path: impacts.get(sdd_rel) for rel_path, sdd_rel in targets.items()}
+        finally:
+            if own_conn:
+                conn.close()
+
+
+# --- deferred derive -------------------------------------------------------
+# With index_options.lazy_derive, a hook's update stops after parse, upsert
+# and graph refresh: the documents whose derived output is stale are appended
+# to .cache/index.dirty (one sdd-relative path per line, DIRTY_ALL for
+# everything) and the derived files are regenerated on demand by
+# ensure_derived (--ensure-derived, the daemon once requests go quiet,
+# user-prompt-submit). Any eager derive also absorbs the pending paths. The
+# marker is only written and cleared under the writer lock.
+
+DIRTY_ALL = "*"
+
+
+def _mark_dirty(project_root: str, sdd_root: str, paths: Optional[List[str]]) -> None:
+    lines = [DIRTY_ALL] if paths is None else paths
+    with open(dirty_path(project_root, sdd_root), "a", encoding="utf-8") as fh:
+        fh.write("".join(f"{line}\n" for line in lines))
+
+
+def _pending_derive(project_root: str,
+                    sdd_root: str) -> Tuple[bool, Optional[List[str]]]:
+    """Return (pending, paths) from index.dirty; paths None means everything."""
+    try:
+        text = Path(dirty_path(project_root, sdd_root)).read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return False, []
+    paths = set(text.splitlines()) - {""}
+    if DIRTY_ALL in paths:
+        return True, None
+    return True, sorted(paths)
+
+
+def _derive_with_pending(conn: sqlite3.Connection, project_root: str, sdd_root: str,
+                         changed_paths: Optional[List[str]]) -> None:
+    """derive_index ``changed_paths`` plus any deferred paths, then clear the marker.
+
+    An empty ``changed_paths`` with nothing deferred is a no-op. A full derive
+    requested by a schema migration (META_DERIVE_ALL) is done here too.
+    """
+    pending, deferred = _pending_derive(project_root, sdd_root)
+    migrated = conn.execute(
+        "SELECT 1 FROM meta WHERE key = ?", (META_DERIVE_ALL,)).fetchone() is not None
+    if migrated:
+        changed_paths = None
+        conn.execute("DELETE FROM meta WHERE key = ?", (META_DERIVE_ALL,))  # committed by the derive
+    elif not pending and changed_paths == []:
         return
-    rel = Path(rel_path)
-    sdd_rel = str(rel.relative_to(sdd_root)) if rel.is_relative_to(sdd_root) else rel_path
-    abs_path = str(Path(project_root) / sdd_root / sdd_rel)
+    if pending:
+        changed_paths = (None if changed_paths is None or deferred is None
+                         else sorted(set(changed_paths) | set(deferred)))
+    derive_index(conn, project_root, sdd_root, changed_paths)
+    if pending:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(dirty_path(project_root, sdd_root))
+
+
+def ensure_derived(project_root: str, conn: Optional[sqlite3.Connection] = None) -> bool:
+    """Regenerate the derived files if a lazy update left them dirty.
+
+    Returns True when a derive ran. Costs one stat when nothing is pending.
+    ``conn`` is reused (and left open) as in update_one.
+    """
+    sdd_root, _req_dir, _spec_dir = load_sdd_paths(project_root)
+    db_file = db_path(project_root, sdd_root)
+    if not os.path.exists(dirty_path(project_root, sdd_root)) or not Path(db_file).is_file():
+        return False
+    with sdd_metrics.record(project_root, "derive"), writer_lock(project_root, sdd_root):
+        if not os.path.exists(dirty_path(project_root, sdd_root)):
+            return False  # another process got there first
+        own_conn = conn is None
+        if conn is None:
+            conn = connect(db_file)
+        try:
+            if _get_schema_version(conn) != SCHEMA_VERSION:
+                return False  # the next rebuild resets the schema and derives everything
+            _derive_with_pending(conn, project_root, sdd_root, [])
+            return True
+        finally:
+            if own_conn:
+                conn.close()
+
+
+# --- watch mode -----------------------------------------------------------
+# Keeps the index fresh against edits made outside the agent (checkout, pull,
+# rebase, other editors) by polling. A poll costs one stat per directory and
+# per tracked document; directories are only re-listed when their mtime moves
+# (entries created, removed or renamed), and in-place edits show up as a
+# changed file fingerprint. Changes are coalesced until a poll finds nothing
+# new, then applied as one batch.
+
+WATCH_INTERVAL_S = 1.0
+# Apply a pending batch after this long even if changes keep arriving.
+WATCH_MAX_DELAY_S = 10.0
+# Re-list every directory this often, for filesystems with coarse mtimes.
+WATCH_RESCAN_POLLS = 60
+
+
+class _TreeSnapshot:
+    """Directory mtimes and document fingerprints under the indexed dirs."""
+
+    def __init__(self, roots: List[Tuple[str, Callable[[str], bool]]]) -> None:
+        self.roots = roots
+        # dir -> (mtime_ns, subdirs, target files)
+        self.dirs: Dict[str, Tuple[int, List[str], List[str]]] = {}
+        self.files: Dict[str, Tuple[int, int, int]] = {}
+        self.polls = 0
+
+    def poll(self) -> Set[str]:
+        """Walk the tree once; return absolute paths added, removed or modified."""
+        self.polls += 1
+        relist_all = self.polls % WATCH_RESCAN_POLLS == 0
+        changed: Set[str] = set()
+        seen_dirs: Set[str] = set()
+        live_files: Set[str] = set()
+        for root, is_target in self.roots:
+            stack = [root]
+            while stack:
+                d = stack.pop()
+                try:
+                    mtime = os.stat(d).st_mtime_ns
+                except OSError:
+                    continue
+                seen_dirs.add(d)
+                entry = self.dirs.get(d)
+                if entry is None or entry[0] != mtime or relist_all:
+                    entry = self._list(d, mtime, is_target)
+                    self.dirs[d] = entry
+                stack.extend(entry[1])
+                live_files.update(entry[2])
+
+        for d in set(self.dirs) - seen_dirs:
+            del self.dirs[d]
+        for f in set(self.files) - live_files:
+            del self.files[f]
+            changed.add(f)
+        for f in live_files:
+            try:
+                fingerprint = stat_fingerprint(os.stat(f))
+            except OSError:
+                fingerprint = None
+            if self.files.get(f) != fingerprint:
+                changed.add(f)
+                if fingerprint is None:
+                    self.files.pop(f, None)
+                else:
+                    self.files[f] = fingerprint
+        return changed
+
+    @staticmethod
+    def _list(d: str, mtime: int,
+              is_target: Callable[[str], bool]) -> Tuple[int, List[str], List[str]]:
+        subdirs: List[str] = []
+        files: List[str] = []
+        try:
+            with os.scandir(d) as it:
+                for e in it:
+                    if e.is_dir(follow_symlinks=False):
+                        subdirs.append(e.path)
+                    elif e.name.endswith(".md") and is_target(e.name):
+                        files.append(e.path)
+        except OSError:
+            pass
+        return (mtime, subdirs, files)
 
+
+def _watch_roots(project_root: str) -> List[Tuple[str, Callable[[str], bool]]]:
+    """(directory, target filter) pairs matching doc_walker.iter_target_files."""
+    sdd_root, req_dir, spec_dir = load_sdd_paths(project_root)
+    base = Path(project_root) / sdd_root
+    return [
+        (str(base / req_dir), lambda name: True),
+        (str(base / spec_dir), lambda name: has_spec_suffix(name[:-3])),
+    ]
+
+
+def apply_changes(project_root: str, abs_paths: Iterable[str]) -> None:
+    """Re-index a coalesced batch of changed documents.
+
+    The batch (one edit, or a branch switch or pull touching hundreds of
+    files) goes through update_many: one transaction and one derive, reading
+    only the files the snapshot saw change. Watch mode runs in the
+    background, so it always derives right away.
+    """
+    rels = [rel for rel in (relative_to_project(p, project_root) for p in sorted(abs_paths))
+            if rel]
+    if rels:
+        update_many(project_root, rels, lazy=False)
+
+
+def watch(project_root: str, interval: float = WATCH_INTERVAL_S) -> None:
+    """Poll the requirement/specification dirs and re-index changes until interrupted."""
+    rebuild_all(project_root)
+    snapshot = _TreeSnapshot(_watch_roots(project_root))
+    snapshot.poll()
+    pending: Set[str] = set()
+    first_pending = 0.0
+    while True:
+        time.sleep(interval)
+        changed = snapshot.poll()
+        if changed:
+            if not pending:
+                first_pending = time.monotonic()
+            pending |= changed
+            if time.monotonic() - first_pending < WATCH_MAX_DELAY_S:
+                continue
+        if not pending:
+            continue
+        try:
+            apply_changes(project_root, pending)
+            print(f"[AI-SDD] Re-indexed {len(pending)} changed document(s).",
+                  file=sys.stderr, flush=True)
+        except Exception as e:  # noqa: BLE001 - keep watching
+            print(f"[AI-SDD] Warning: index update failed: {e}", file=sys.stderr, flush=True)
+        pending = set()
+
+
+# --- readers --------------------------------------------------------------
+
+def open_index(project_root: str) -> Optional[sqlite3.Connection]:
+    """Connect to an already-built index for reading, or None if there is none."""
+    sdd_root, _req_dir, _spec_dir = load_sdd_paths(project_root)
+    db_file = db_path(project_root, sdd_root)
+    if not Path(db_file).is_file():
+        return None
     conn = connect(db_file)
+    if _get_schema_version(conn) != SCHEMA_VERSION:
+        conn.close()
+        return None
+    return conn
+
+
+# --- full-text search -----------------------------------------------------
+
+SEARCH_SNIPPET_TOKENS = 12
+
+
+FTS_OPERATORS = {"AND", "OR", "NOT"}
+
+
+def _fts_phrase_query(terms: str) -> str:
+    """Quote every whitespace-separated term so FTS5 syntax characters are literal.
+
+    Bare AND / OR / NOT are kept as operators.
+    """
+    return " ".join(
+        t if t in FTS_OPERATORS else '"' + t.replace('"', '""') + '"'
+        for t in terms.split()
+    )
+
+
+def search(project_root: str, terms: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """Rank document sections matching ``terms`` (FTS5 query syntax, bm25 order).
+
+    A query that is not valid FTS5 syntax is retried with every term quoted.
+    Returns [] when the index has not been built. Raises RuntimeError when this
+    SQLite build lacks FTS5.
+    """
+    if not terms.strip():
+        return []
+    conn = open_index(project_root)
+    if conn is None:
+        return []
     try:
-        init_schema(conn)
-        if not Path(abs_path).is_file() or Path(abs_path).suffix != ".md":
-            row = conn.execute(
-                "SELECT 1 FROM documents WHERE path = ?", (sdd_rel,)
-            ).fetchone()
-            if row:
-                conn.execute("DELETE FROM documents WHERE path = ?", (sdd_rel,))
-                conn.commit()
-                derive_index(conn, project_root, sdd_root)
-            return
+        return search_sections(conn, terms, limit)
+    finally:
+        conn.close()
 
-        new_hash = file_hash(abs_path)
-        existing = conn.execute(
-            "SELECT content_hash FROM documents WHERE path = ?", (sdd_rel,)
-        ).fetchone()
-        if existing and existing[0] == new_hash:
-            return
 
-        rec = scan_document(abs_path, project_root, sdd_root,
-                            precomputed_hash=new_hash)
-        upsert_document(conn, rec)
-        conn.commit()
-        derive_index(conn, project_root, sdd_root)
+def search_sections(conn: sqlite3.Connection, terms: str,
+                    limit: int = 20) -> List[Dict[str, Any]]:
+    """search() against an open index connection."""
+    if not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sections_fts'"
+    ).fetchone():
+        raise RuntimeError("full-text search requires SQLite built with FTS5")
+    sql = (
+        "SELECT s.path, s.section, "
+        f"snippet(sections_fts, 1, '[', ']', '...', {SEARCH_SNIPPET_TOKENS}), "
+        "bm25(sections_fts) "
+        "FROM sections_fts JOIN doc_sections s ON s.id = sections_fts.rowid "
+        "WHERE sections_fts MATCH ? ORDER BY rank LIMIT ?"
+    )
+    try:
+        rows = conn.execute(sql, (terms, limit)).fetchall()
+    except sqlite3.OperationalError:
+        rows = conn.execute(sql, (_fts_phrase_query(terms), limit)).fetchall()
+    return [
+        {"path": path, "section": section or "", "snippet": snippet,
+         "score": round(-score, 4)}
+        for path, section, snippet, score in rows
+    ]
+
+
+# --- point queries --------------------------------------------------------
+# Each query_* function answers one question from the index tables and
+# returns a compact JSON-serializable value (see `sdd_index.py query -h`).
+
+def _like_prefix(prefix: str) -> str:
+    return prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def query_requirement(conn: sqlite3.Connection, req_id: str) -> Dict[str, Any]:
+    """Where ``req_id`` is defined and referenced, plus its SysML elements."""
+    result: Dict[str, Any] = {"req_id": req_id, "def": [], "ref": []}
+    for kind, path, doc_id, section, line in conn.execute(
+            "SELECT i.kind, i.path, d.doc_id, i.section, i.line "
+            "FROM ids i JOIN documents d ON d.path = i.path "
+            "WHERE i.req_id = ? ORDER BY i.kind, i.path", (req_id,)
+    ):
+        result.setdefault(kind, []).append(
+            {"path": path, "doc_id": doc_id or "", "section": section or "", "line": line})
+    result["sysml"] = [
+        {"name": name, "keyword": keyword, "path": path}
+        for name, keyword, path in conn.execute(
+            "SELECT name, keyword, path FROM sysml_elements WHERE req_id = ? "
+            "ORDER BY path, name", (req_id,))
+    ]
+    return result
+
+
+def query_documents(conn: sqlite3.Connection, column: str, value: str,
+                    doc_type: str = "") -> List[Dict[str, str]]:
+    """Documents whose ``status`` or ``impl_status`` equals ``value``."""
+    if column not in ("status", "impl_status"):
+        raise ValueError(f"unsupported document filter: {column}")
+    sql = (f"SELECT path, doc_id, type, status, impl_status FROM documents "
+           f"WHERE {column} = ?")
+    params: Tuple[str, ...] = (value,)
+    if doc_type:
+        sql += " AND type = ?"
+        params += (doc_type,)
+    return [
+        {"path": path, "doc_id": doc_id or "", "type": dtype or "",
+         "status": status or "", "impl_status": impl_st or ""}
+        for path, doc_id, dtype, status, impl_st in conn.execute(sql + " ORDER BY path", params)
+    ]
+
+
+def query_field(conn: sqlite3.Connection, name: str) -> List[Dict[str, str]]:
+    """Data model fields named ``name`` (``*`` / ``?`` glob wildcards allowed)."""
+    op = "GLOB" if any(c in name for c in "*?[") else "="
+    return [
+        {"field": field, "path": path, "doc_id": doc_id or "", "section": section or ""}
+        for field, path, doc_id, section in conn.execute(
+            "SELECT DISTINCT f.field_name, f.path, d.doc_id, f.model_section "
+            "FROM data_model_fields f JOIN documents d ON d.path = f.path "
+            f"WHERE f.field_name {op} ? ORDER BY f.field_name, f.path", (name,))
+    ]
+
+
+def query_api(conn: sqlite3.Connection, prefix: str) -> List[Dict[str, str]]:
+    """API signatures whose URL path starts with ``prefix``."""
+    return [
+        {"signature": sig, "path": path, "doc_id": doc_id or "", "section": section or ""}
+        for sig, path, doc_id, section in conn.execute(
+            "SELECT DISTINCT a.signature, a.path, d.doc_id, a.section "
+            "FROM api_signatures a JOIN documents d ON d.path = a.path "
+            "WHERE substr(a.signature, instr(a.signature, ' ') + 1) LIKE ? ESCAPE '\\' "
+            "ORDER BY substr(a.signature, instr(a.signature, ' ') + 1), a.signature, a.path",
+            (_like_prefix(prefix),))
+    ]
+
+
+def _graph_node(conn: sqlite3.Connection, value: str) -> str:
+    """Resolve a requirement ID, document path or doc_id, or SysML name to a node."""
+    if REQ_ID_RE.fullmatch(value):
+        return GRAPH_REQ + value
+    row = conn.execute(
+        "SELECT path FROM documents WHERE path = ? UNION ALL "
+        "SELECT path FROM documents WHERE doc_id = ? LIMIT 1", (value, value)
+    ).fetchone()
+    return GRAPH_DOC + row[0] if row else GRAPH_SYSML + value
+
+
+def _walk_graph(conn: sqlite3.Connection, start: str, downstream: bool,
+                max_depth: int = 0, kinds: Iterable[str] = ()) -> Dict[str, int]:
+    """Nodes reachable from ``start`` -> hop count (BFS over graph_edges).
+
+    Downstream follows src -> dst (what a change affects), upstream the
+    reverse. Hops through a document's ID alias are free, so a depends-on
+    link counts as one. ``max_depth`` 0 means unbounded; ``kinds`` restricts
+    the edge kinds followed.
+    """
+    near, far = ("src", "dst") if downstream else ("dst", "src")
+    sql = f"SELECT {far} FROM graph_edges WHERE {near} = ?"
+    kinds = tuple(kinds)
+    if kinds:
+        sql += f" AND kind IN ({','.join('?' * len(kinds))})"
+    depths = {start: 0}
+    queue = [start]
+    depth = 0
+    while queue and (not max_depth or depth < max_depth):
+        depth += 1
+        nxt: List[str] = []
+        while queue:
+            for (other,) in conn.execute(sql, (queue.pop(), *kinds)):
+                if other in depths:
+                    continue
+                if other.startswith(GRAPH_ALIAS):
+                    depths[other] = depth - 1
+                    queue.append(other)
+                else:
+                    depths[other] = depth
+                    nxt.append(other)
+        queue = nxt
+    del depths[start]
+    return depths
+
+
+def query_traceability(conn: sqlite3.Connection, value: str, downstream: bool,
+                       max_depth: int = 0) -> Dict[str, Any]:
+    """Documents, requirement IDs and SysML elements transitively downstream
+    (affected by a change to ``value``) or upstream (what it derives from)."""
+    result: Dict[str, Any] = {
+        "node": value,
+        "direction": "downstream" if downstream else "upstream",
+        "documents": [], "req_ids": [], "elements": [],
+    }
+    reached = _walk_graph(conn, _graph_node(conn, value), downstream, max_depth)
+    for node, depth in sorted(reached.items(), key=lambda item: (item[1], item[0])):
+        if node.startswith(GRAPH_DOC):
+            path = node[len(GRAPH_DOC):]
+            row = conn.execute("SELECT doc_id FROM documents WHERE path = ?",
+                               (path,)).fetchone()
+            result["documents"].append(
+                {"path": path, "doc_id": (row[0] if row else "") or "", "depth": depth})
+        elif node.startswith(GRAPH_REQ):
+            result["req_ids"].append({"req_id": node[len(GRAPH_REQ):], "depth": depth})
+        elif node.startswith(GRAPH_SYSML):
+            result["elements"].append({"name": node[len(GRAPH_SYSML):], "depth": depth})
+    return result
+
+
+def query_cycles(conn: sqlite3.Connection) -> List[List[Dict[str, str]]]:
+    """depends-on cycles, one list of member documents per strongly connected set."""
+    cycles: List[List[Dict[str, str]]] = []
+    seen: Set[str] = set()
+    for (path,) in conn.execute(
+            "SELECT descendant FROM graph_closure WHERE ancestor = descendant "
+            "ORDER BY descendant").fetchall():
+        if path in seen:
+            continue
+        members = conn.execute(
+            "SELECT a.descendant, d.doc_id FROM graph_closure a "
+            "JOIN graph_closure b ON b.descendant = a.ancestor AND b.ancestor = a.descendant "
+            "JOIN documents d ON d.path = a.descendant "
+            "WHERE a.ancestor = ? ORDER BY a.descendant", (path,)).fetchall()
+        seen.update(m for m, _doc_id in members)
+        cycles.append([{"path": m, "doc_id": doc_id or ""} for m, doc_id in members])
+    return cycles
+
+
+def query_order(conn: sqlite3.Connection, prefix: str = "",
+                doc_type: str = "") -> List[Dict[str, Any]]:
+    """Documents under path ``prefix`` in depends-on topological order (upstream first).
+
+    Ordered by transitive upstream count, which every document's ancestors
+    undercut; members of a cycle have no valid position and are flagged.
+    """
+    sql = ("SELECT d.path, d.doc_id, d.type, COUNT(c.ancestor), "
+           "COALESCE(MAX(c.ancestor = d.path), 0) "
+           "FROM documents d LEFT JOIN graph_closure c ON c.descendant = d.path "
+           "WHERE d.path LIKE ? ESCAPE '\\'")
+    params: Tuple[str, ...] = (_like_prefix(prefix),)
+    if doc_type:
+        sql += " AND d.type = ?"
+        params += (doc_type,)
+    return [
+        {"path": path, "doc_id": doc_id or "", "type": dtype or "",
+         "upstream": count, "cycle": bool(cycle)}
+        for path, doc_id, dtype, count, cycle in conn.execute(
+            sql + " GROUP BY d.path ORDER BY COUNT(c.ancestor), d.path", params)
+    ]
+
+
+def dispatch_query(conn: sqlite3.Connection, lookup: str, value: str,
+                   doc_type: str = "", depth: int = 0) -> Any:
+    """Answer one ``query`` lookup (req/status/impl-status/field/api, or the
+    graph lookups impact/upstream/cycles/order)."""
+    if lookup == "req":
+        return query_requirement(conn, value)
+    if lookup == "status":
+        return query_documents(conn, "status", value, doc_type)
+    if lookup == "impl-status":
+        return query_documents(conn, "impl_status", value, doc_type)
+    if lookup == "field":
+        return query_field(conn, value)
+    if lookup == "api":
+        return query_api(conn, value)
+    if lookup in ("impact", "upstream"):
+        return query_traceability(conn, value, lookup == "impact", depth)
+    if lookup == "cycles":
+        return query_cycles(conn)
+    if lookup == "order":
+        return query_order(conn, value, doc_type)
+    raise ValueError(f"unknown query: {lookup}")
+
+
+def run_query(project_root: str, lookup: str, value: str, doc_type: str = "",
+              depth: int = 0) -> Any:
+    """dispatch_query() against the project's index; None when none is built."""
+    conn = open_index(project_root)
+    if conn is None:
+        return None
+    try:
+        return dispatch_query(conn, lookup, value, doc_type, depth)
     finally:
         conn.close()
 
 
 # --- derived compact index (v2: table format) -----------------------------
+#
+# Every row of index.md / index.json comes from exactly one document, so the
+# derived output is kept as per-document fragments (derived_rows, one rendered
+# line or block per row plus a sort key reproducing the section's ORDER BY).
+# A single-document change re-renders only that document's fragments. The
+# output files are then streamed section by section from derived_rows, whose
+# (section, sort_key) primary key makes every section one ordered range scan,
+# into temp files in bounded chunks: memory stays flat and time is linear in
+# row count.
+#
+# Each fragment is also tagged with its document's feature (naming.feature_name),
+# and derive writes one shard per feature under .cache/index/<feature>.md plus
+# .cache/index-manifest.md listing them. Only shards of features whose member
+# documents changed are regenerated.
+
+# Above this many changed documents a full fragment rebuild is cheaper than
+# per-document queries.
+INCREMENTAL_DERIVE_MAX = 256
+
+# Fragments concatenated per round trip while streaming a section.
+STREAM_CHUNK_ROWS = 2000
+
+# (name, heading lines) in output order. Sections other than "metadata" are
+# omitted entirely when they have no rows.
+MD_SECTIONS = [
+    ("metadata", [
+        "## Metadata",
+        "| doc_id | type | path | status | impl-status | depends-on | category |",
+        "|--------|------|------|--------|-------------|------------|----------|",
+    ]),
+    ("dependency_order", [
+        "## Dependency Order",
+        "| doc_id | upstream (transitive, nearest first) | cycle |",
+        "|--------|--------------------------------------|-------|",
+    ]),
+    ("ids", [
+        "## Requirement IDs",
+        "| req_id | kind | doc_id | section |",
+        "|--------|------|--------|---------|",
+    ]),
+    ("sysml_relationships", [
+        "## SysML Relationships",
+        "| source | rel | target | doc_id |",
+        "|--------|-----|--------|--------|",
+    ]),
+    ("sysml_elements", [
+        "## SysML Elements",
+        "| name | kind | keyword | req_id | type | doc_id | section |",
+        "|------|------|---------|--------|------|--------|---------|",
+    ]),
+    ("api_signatures", [
+        "## API Signatures",
+        "| signature | doc_id | section |",
+        "|-----------|--------|---------|",
+    ]),
+    ("data_models", [
+        "## Data Models",
+    ]),
+    ("data_model_fields", [
+        "## Data Model Fields",
+        "| field | doc_id | section |",
+        "|-------|--------|---------|",
+    ]),
+]
+JSON_SECTION = "json"
+
 
 def _truncate_block(body: str, max_lines: int = 12) -> str:
     lines = [ln for ln in body.splitlines() if ln.strip()]
@@ -599,166 +2543,433 @@ def _truncate_block(body: str, max_lines: int = 12) -> str:
     return "\n".join(lines[:max_lines]) + "\n    ... (truncated)"
 
 
-def derive_index(conn: sqlite3.Connection, project_root: str, sdd_root: str) -> None:
-    Path(cache_dir(project_root, sdd_root)).mkdir(parents=True, exist_ok=True)
+def _sort_key(*parts: Any) -> str:
+    """Join ORDER BY components so that TEXT ordering equals tuple ordering."""
+    return "\x00".join(f"{p:012d}" if isinstance(p, int) else (p or "") for p in parts)
 
-    doc_count = conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
 
-    out: List[str] = []
-    out.append(f"# .sdd Index (v{SCHEMA_VERSION}, {doc_count} docs)")
-    out.append("")
-    out.append("Structured facts extracted from front matter and body. "
-               "Read this instead of raw Glob/Grep/Read over .sdd/.")
-    out.append("")
-
-    # -- pre-fetch dependencies for reuse --
-    deps_by_path: Dict[str, List[str]] = {}
-    for dep_path, dep_on in conn.execute(
-            "SELECT path, depends_on FROM dependencies ORDER BY path, depends_on"
-    ).fetchall():
-        deps_by_path.setdefault(dep_path, []).append(dep_on)
-
-    # -- Metadata table --
-    out.append("## Metadata")
-    out.append("| doc_id | type | path | status | impl-status | depends-on | category |")
-    out.append("|--------|------|------|--------|-------------|------------|----------|")
-    rows = conn.execute(
-        "SELECT path, doc_id, type, status, impl_status, category "
-        "FROM documents ORDER BY path"
-    ).fetchall()
-    for path, doc_id, dtype, status, impl_st, category in rows:
-        label = doc_id if doc_id else f"({path})"
-        deps = ", ".join(deps_by_path.get(path, []))
-        out.append(
-            f"| {label} | {dtype or ''} | {path} | {status or ''} "
-            f"| {impl_st or ''} | {deps} | {category or ''} |"
+def _label(doc_id: Optional[str], path: str) -> str:
+    return doc_id if doc_id else f"({path})"
+
+
+def _json_str(value: Optional[str]) -> str:
+    return json.dumps(value or "", ensure_ascii=False)
+
+
+def _json_list(items: List[str], pad: str) -> str:
+    if not items:
+        return "[]"
+    inner = ",\n".join(f"{pad} {_json_str(i)}" for i in items)
+    return f"[\n{inner}\n{pad}]"
+
+
+def _json_document(path: str, doc_id: Optional[str], dtype: Optional[str],
+                   status: Optional[str], impl_st: Optional[str],
+                   category: Optional[str], depends_on: List[str],
+                   defs: List[str], refs: List[str]) -> str:
+    """One index.json document entry, laid out exactly as json.dumps(indent=1)
+    would inside payload["documents"] (built directly: the indenting encoder
+    is pure Python and dominated full derives)."""
+    return (
+        "  {\n"
+        f'   "path": {_json_str(path)},\n'
+        f'   "doc_id": {_json_str(doc_id)},\n'
+        f'   "type": {_json_str(dtype)},\n'
+        f'   "status": {_json_str(status)},\n'
+        f'   "impl_status": {_json_str(impl_st)},\n'
+        f'   "category": {_json_str(category)},\n'
+        f'   "depends_on": {_json_list(depends_on, "   ")},\n'
+        '   "req_ids": {\n'
+        f'    "def": {_json_list(defs, "    ")},\n'
+        f'    "ref": {_json_list(refs, "    ")}\n'
+        "   }\n"
+        "  }"
+    )
+
+
+def _render_fragments(conn: sqlite3.Connection,
+                      path: Optional[str] = None) -> Iterator[Tuple[str, str, str, str]]:
+    """Yield (path, section, sort_key, text) for one document, or all when path is None."""
+    where, params = ("WHERE x.path = ?", (path,)) if path is not None else ("", ())
+
+    # One row per document; dependencies and def/ref IDs are aggregated by
+    # correlated subqueries (path-indexed) instead of per-document queries.
+    for (p, doc_id, dtype, status, impl_st, category,
+         deps, defs, refs) in conn.execute(
+            "SELECT x.path, x.doc_id, x.type, x.status, x.impl_status, x.category, "
+            "(SELECT group_concat(depends_on, char(31)) FROM "
+            " (SELECT depends_on FROM dependencies WHERE path = x.path "
+            "  ORDER BY depends_on)), "
+            "(SELECT group_concat(req_id, char(31)) FROM "
+            " (SELECT DISTINCT req_id FROM ids WHERE path = x.path AND kind = 'def' "
+            "  ORDER BY req_id)), "
+            "(SELECT group_concat(req_id, char(31)) FROM "
+            " (SELECT DISTINCT req_id FROM ids WHERE path = x.path AND kind = 'ref' "
+            "  ORDER BY req_id)) "
+            f"FROM documents x {where}", params
+    ):
+        dep_list = deps.split("\x1f") if deps else []
+        yield (p, "metadata", _sort_key(p),
+               f"| {_label(doc_id, p)} | {dtype or ''} | {p} | {status or ''} "
+               f"| {impl_st or ''} | {', '.join(dep_list)} | {category or ''} |")
+        yield (p, JSON_SECTION, _sort_key(p), _json_document(
+            p, doc_id, dtype, status, impl_st, category, dep_list,
+            defs.split("\x1f") if defs else [],
+            refs.split("\x1f") if refs else [],
+        ))
+
+    # Documents with a transitive upstream, ordered by its size: a document
+    # always has more ancestors than any of its ancestors (off a cycle), so the
+    # section lists depends-on chains in topological order.
+    upstream = conn.execute(
+        "SELECT x.path, x.doc_id, c.ancestor, a.doc_id FROM documents x "
+        "JOIN graph_closure c ON c.descendant = x.path "
+        f"JOIN documents a ON a.path = c.ancestor {where} "
+        "ORDER BY x.path, c.depth, c.ancestor", params
+    )
+    for (p, doc_id), rows in itertools.groupby(upstream, key=lambda r: (r[0], r[1])):
+        ancestors = [(anc, anc_id) for _p, _d, anc, anc_id in rows]
+        labels = [_label(anc_id, anc) for anc, anc_id in ancestors if anc != p]
+        cycle = "yes" if len(labels) < len(ancestors) else ""
+        yield (p, "dependency_order", _sort_key(len(ancestors), p),
+               f"| {_label(doc_id, p)} | {', '.join(labels)} | {cycle} |")
+
+    for req_id, kind, doc_id, p, section, line in conn.execute(
+            "SELECT x.req_id, x.kind, d.doc_id, x.path, x.section, x.line "
+            f"FROM ids x JOIN documents d ON x.path = d.path {where}", params
+    ):
+        yield (p, "ids", _sort_key(req_id, kind, p, line or 0),
+               f"| {req_id} | {kind} | {_label(doc_id, p)} | {section or ''} |")
+
+    for rowid, src, rel, tgt, doc_id, p in conn.execute(
+            "SELECT x.rowid, x.source_id, x.rel_type, x.target_id, d.doc_id, x.path "
+            f"FROM sysml_relationships x JOIN documents d ON x.path = d.path {where}",
+            params
+    ):
+        yield (p, "sysml_relationships", _sort_key(src, rel, p, rowid),
+               f"| {src} | {rel} | {tgt} | {_label(doc_id, p)} |")
+
+    for rowid, name, kind, keyword, req_id, elem_type, doc_id, p, section in conn.execute(
+            "SELECT x.rowid, x.name, x.kind, x.keyword, x.req_id, x.elem_type, d.doc_id, "
+            "x.path, x.section "
+            f"FROM sysml_elements x JOIN documents d ON x.path = d.path {where}", params
+    ):
+        yield (p, "sysml_elements", _sort_key(kind, name, p, rowid),
+               f"| {name} | {kind} | {keyword or ''} | {req_id or ''} "
+               f"| {elem_type or ''} | {_label(doc_id, p)} | {section or ''} |")
+
+    for sig, doc_id, p, section in conn.execute(
+            "SELECT DISTINCT x.signature, d.doc_id, x.path, x.section "
+            f"FROM api_signatures x JOIN documents d ON x.path = d.path {where}", params
+    ):
+        yield (p, "api_signatures", _sort_key(p, section, sig),
+               f"| {sig} | {_label(doc_id, p)} | {section or ''} |")
+
+    for rowid, p, doc_id, section, lang, body in conn.execute(
+            "SELECT x.rowid, x.path, d.doc_id, x.section, x.lang, x.body "
+            f"FROM data_models x JOIN documents d ON x.path = d.path {where}", params
+    ):
+        sect = f" [{section}]" if section else ""
+        yield (p, "data_models", _sort_key(p, section, rowid),
+               f"### {_label(doc_id, p)}{sect}\n```{lang}\n"
+               f"{_truncate_block(body)}\n```\n")
+
+    for field_name, doc_id, p, section in conn.execute(
+            "SELECT DISTINCT x.field_name, d.doc_id, x.path, x.model_section "
+            f"FROM data_model_fields x JOIN documents d ON x.path = d.path {where}",
+            params
+    ):
+        yield (p, "data_model_fields", _sort_key(p, section, field_name),
+               f"| {field_name} | {_label(doc_id, p)} | {section or ''} |")
+
+
+def _feature_resolver(req_dir: str, spec_dir: str) -> Callable[[str], str]:
+    """Map an sdd-root-relative document path to its feature (memoized)."""
+    cache: Dict[str, str] = {}
+
+    def resolve(path: str) -> str:
+        feature = cache.get(path)
+        if feature is None:
+            rel = Path(path)
+            for base in (req_dir, spec_dir):
+                if rel.is_relative_to(base):
+                    rel = rel.relative_to(base)
+                    break
+            feature = cache[path] = feature_name(str(rel))
+        return feature
+
+    return resolve
+
+
+def _refresh_fragments(conn: sqlite3.Connection,
+                       changed_paths: Optional[List[str]],
+                       feature_of: Callable[[str], str]) -> Optional[Set[str]]:
+    """Re-render fragments of ``changed_paths``, or of every document when None.
+
+    Returns the features whose shards are stale (None = all of them).
+    """
+    insert = ("INSERT INTO derived_rows (path, feature, section, sort_key, text) "
+              "VALUES (?,?,?,?,?)")
+    if changed_paths is None:
+        conn.execute("DELETE FROM derived_rows")
+        conn.executemany(insert, (
+            (p, feature_of(p), section, key, text)
+            for p, section, key, text in _render_fragments(conn)
+        ))
+        return None
+    dirty: Set[str] = set()
+    for path in changed_paths:
+        dirty.update(r[0] for r in conn.execute(
+            "SELECT DISTINCT feature FROM derived_rows WHERE path = ?", (path,)))
+        conn.execute("DELETE FROM derived_rows WHERE path = ?", (path,))
+        feature = feature_of(path)
+        conn.executemany(insert, (
+            (p, feature, section, key, text)
+            for p, section, key, text in _render_fragments(conn, path)
+        ))
+        dirty.add(feature)
+    return dirty
+
+
+def _iter_section(conn: sqlite3.Connection, name: str, sep: str,
+                  feature: Optional[str] = None) -> Iterator[str]:
+    """Yield a section's fragments joined by ``sep``, STREAM_CHUNK_ROWS at a time.
+
+    Each chunk is concatenated inside SQLite and resumes after the previous
+    chunk's last sort key, so no chunk materializes more than a bounded slice.
+    ``feature`` restricts the section to one shard's documents.
+    """
+    source = "derived_rows"
+    where = "section = ? AND sort_key > ?"
+    scope: Tuple[str, ...] = ()
+    if feature is not None:
+        # Without ANALYZE statistics SQLite prefers the (section, sort_key)
+        # primary key and filters the whole section per shard.
+        source = "derived_rows INDEXED BY idx_derived_rows_feature"
+        where = "feature = ? AND " + where
+        scope = (feature,)
+    last_key = ""
+    first = True
+    while True:
+        text, last, count = conn.execute(
+            "SELECT group_concat(text, ?), max(sort_key), count(*) FROM "
+            f"(SELECT text, sort_key FROM {source} WHERE {where} "
+            " ORDER BY sort_key LIMIT ?)",
+            (sep, *scope, name, last_key, STREAM_CHUNK_ROWS),
+        ).fetchone()
+        if not count:
+            return
+        yield text if first else sep + text
+        first = False
+        if count < STREAM_CHUNK_ROWS:
+            return
+        last_key = last
+
+
+def _write_section(conn: sqlite3.Connection, out: "_StreamedFile", name: str,
+                   heading: List[str], feature: Optional[str] = None) -> None:
+    chunks = _iter_section(conn, name, "\n", feature)
+    first = next(chunks, None)
+    if first is None and name != "metadata":
+        return
+    out.write("\n".join(heading) + "\n")
+    if first is not None:
+        out.write(first)
+        for chunk in chunks:
+            out.write(chunk)
+        out.write("\n")
+    if name != "data_models":
+        out.write("\n")
+
+
+class _StreamedFile:
+    """Incrementally written replacement for ``target``.
+
+    Text goes to a uniquely named temp file while its SHA-256 is tracked.
+    ``commit()`` replaces ``target`` only when the bytes differ, so identical
+    output keeps the old file (and its mtime) for editors and watchers.
+    """
+
+    def __init__(self, target: Path) -> None:
+        self.target = target
+        fd, self.tmp = tempfile.mkstemp(dir=str(target.parent),
+                                        prefix=target.name + ".", suffix=".tmp")
+        self._fh = os.fdopen(fd, "wb")
+        self._hash = hashlib.sha256()
+        self._size = 0
+
+    def write(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self._hash.update(data)
+        self._size += len(data)
+        self._fh.write(data)
+
+    def commit(self) -> bool:
+        self._fh.close()
+        try:
+            if (self.target.stat().st_size == self._size
+                    and _digest(str(self.target), hashlib.sha256()) == self._hash.hexdigest()):
+                os.unlink(self.tmp)
+                return False
+        except OSError:
+            pass
+        os.replace(self.tmp, self.target)
+        return True
+
+    def discard(self) -> None:
+        self._fh.close()
+        with contextlib.suppress(OSError):
+            os.unlink(self.tmp)
+
+
+@contextlib.contextmanager
+def streamed_write(target: Path) -> Iterator[_StreamedFile]:
+    out = _StreamedFile(target)
+    try:
+        yield out
+    except BaseException:
+        out.discard()
+        raise
+    out.commit()
+
+
+def _write_shard(conn: sqlite3.Connection, project_root: str, sdd_root: str,
+                 feature: str) -> None:
+    """Regenerate one feature shard, or remove it when the feature has no documents."""
+    target = Path(shard_path(project_root, sdd_root, feature))
+    doc_count = conn.execute(
+        "SELECT COUNT(*) FROM derived_rows WHERE feature = ? AND section = 'metadata'",
+        (feature,),
+    ).fetchone()[0]
+    if not doc_count:
+        with contextlib.suppress(OSError):
+            target.unlink()
+        return
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with streamed_write(target) as out:
+        out.write(
+            f"# .sdd Index: {feature} (v{SCHEMA_VERSION}, {doc_count} docs)\n"
+            "\n"
+            "Feature subset of index.md. Read this instead of the full index when "
+            "working on this feature.\n"
+            "\n"
         )
-    out.append("")
-
-    # -- Requirement IDs table --
-    id_rows = conn.execute(
-        "SELECT i.req_id, i.kind, d.doc_id, i.path, i.section "
-        "FROM ids i JOIN documents d ON i.path = d.path "
-        "ORDER BY i.req_id, i.kind"
-    ).fetchall()
-    if id_rows:
-        out.append("## Requirement IDs")
-        out.append("| req_id | kind | doc_id | section |")
-        out.append("|--------|------|--------|---------|")
-        for req_id, kind, doc_id, path, section in id_rows:
-            label = doc_id if doc_id else f"({path})"
-            out.append(f"| {req_id} | {kind} | {label} | {section or ''} |")
-        out.append("")
-
-    # -- SysML Relationships table --
-    sysml_rows = conn.execute(
-        "SELECT s.source_id, s.rel_type, s.target_id, d.doc_id, s.path "
-        "FROM sysml_relationships s JOIN documents d ON s.path = d.path "
-        "ORDER BY s.source_id, s.rel_type"
-    ).fetchall()
-    if sysml_rows:
-        out.append("## SysML Relationships")
-        out.append("| source | rel | target | doc_id |")
-        out.append("|--------|-----|--------|--------|")
-        for src, rel, tgt, doc_id, path in sysml_rows:
-            label = doc_id if doc_id else f"({path})"
-            out.append(f"| {src} | {rel} | {tgt} | {label} |")
-        out.append("")
-
-    # -- SysML Elements table (requirementDiagram node definitions) --
-    elem_rows = conn.execute(
-        "SELECT e.name, e.kind, e.keyword, e.req_id, e.elem_type, d.doc_id, e.path, e.section "
-        "FROM sysml_elements e JOIN documents d ON e.path = d.path "
-        "ORDER BY e.kind, e.name"
-    ).fetchall()
-    if elem_rows:
-        out.append("## SysML Elements")
-        out.append("| name | kind | keyword | req_id | type | doc_id | section |")
-        out.append("|------|------|---------|--------|------|--------|---------|")
-        for name, kind, keyword, req_id, elem_type, doc_id, path, section in elem_rows:
-            label = doc_id if doc_id else f"({path})"
-            out.append(
-                f"| {name} | {kind} | {keyword or ''} | {req_id or ''} "
-                f"| {elem_type or ''} | {label} | {section or ''} |"
-            )
-        out.append("")
-
-    # -- API Signatures table --
-    api_rows = conn.execute(
-        "SELECT DISTINCT a.signature, d.doc_id, a.path, a.section "
-        "FROM api_signatures a JOIN documents d ON a.path = d.path "
-        "ORDER BY a.path, a.section"
-    ).fetchall()
-    if api_rows:
-        out.append("## API Signatures")
-        out.append("| signature | doc_id | section |")
-        out.append("|-----------|--------|---------|")
-        for sig, doc_id, path, section in api_rows:
-            label = doc_id if doc_id else f"({path})"
-            out.append(f"| {sig} | {label} | {section or ''} |")
-        out.append("")
-
-    # -- Data Models (per-document, body content needs grouping) --
-    dm_rows = conn.execute(
-        "SELECT dm.path, d.doc_id, dm.section, dm.lang, dm.body "
-        "FROM data_models dm JOIN documents d ON dm.path = d.path "
-        "ORDER BY dm.path, dm.section"
-    ).fetchall()
-    if dm_rows:
-        out.append("## Data Models")
-        for path, doc_id, section, lang, body in dm_rows:
-            label = doc_id if doc_id else f"({path})"
-            sect = f" [{section}]" if section else ""
-            out.append(f"### {label}{sect}")
-            out.append(f"```{lang}")
-            for ln in _truncate_block(body).splitlines():
-                out.append(ln)
-            out.append("```")
-            out.append("")
-
-    # -- Data Model Fields table --
-    dmf_rows = conn.execute(
-        "SELECT DISTINCT f.field_name, d.doc_id, f.path, f.model_section "
-        "FROM data_model_fields f JOIN documents d ON f.path = d.path "
-        "ORDER BY f.path, f.model_section, f.field_name"
-    ).fetchall()
-    if dmf_rows:
-        out.append("## Data Model Fields")
-        out.append("| field | doc_id | section |")
-        out.append("|-------|--------|---------|")
-        for field_name, doc_id, path, section in dmf_rows:
-            label = doc_id if doc_id else f"({path})"
-            out.append(f"| {field_name} | {label} | {section or ''} |")
-        out.append("")
-
-    # -- JSON form --
-    docs_json = []
-    for path, doc_id, dtype, status, impl_st, category in rows:
-        d: Dict[str, Any] = {
-            "path": path, "doc_id": doc_id or "", "type": dtype or "",
-            "status": status or "", "impl_status": impl_st or "",
-            "category": category or "",
-        }
-        d["depends_on"] = deps_by_path.get(path, [])
-        d["req_ids"] = {
-            "def": [r[0] for r in conn.execute(
-                "SELECT DISTINCT req_id FROM ids WHERE path=? AND kind='def'", (path,))],
-            "ref": [r[0] for r in conn.execute(
-                "SELECT DISTINCT req_id FROM ids WHERE path=? AND kind='ref'", (path,))],
-        }
-        docs_json.append(d)
+        for name, heading in MD_SECTIONS:
+            _write_section(conn, out, name, heading, feature)
+
 
-    payload = {"schema": f"sdd-index/{SCHEMA_VERSION}",
-               "document_count": doc_count, "documents": docs_json}
-    json_target = Path(json_path(project_root, sdd_root))
-    tmp = json_target.with_name(json_target.name + ".tmp")
-    tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=1), encoding="utf-8")
-    tmp.replace(json_target)
+def _prune_shards(project_root: str, sdd_root: str, live: Set[str]) -> None:
+    """Delete shard files (and emptied directories) of features that no longer exist."""
+    root = Path(shard_dir(project_root, sdd_root))
+    if not root.is_dir():
+        return
+    for shard in root.rglob("*.md"):
+        if shard.relative_to(root).with_suffix("").as_posix() not in live:
+            with contextlib.suppress(OSError):
+                shard.unlink()
+    for d in sorted((p for p in root.rglob("*") if p.is_dir()), reverse=True):
+        with contextlib.suppress(OSError):
+            d.rmdir()
+
+
+def _write_manifest(conn: sqlite3.Connection, project_root: str,
+                    sdd_root: str) -> List[str]:
+    """Write index-manifest.md (feature -> shard) and return the live features."""
+    features: List[str] = []
+    with streamed_write(Path(manifest_path(project_root, sdd_root))) as out:
+        feature_count = conn.execute(
+            "SELECT COUNT(DISTINCT feature) FROM derived_rows WHERE section = 'metadata'"
+        ).fetchone()[0]
+        out.write(
+            f"# .sdd Index Shards (v{SCHEMA_VERSION}, {feature_count} features)\n"
+            "\n"
+            "Per-feature subsets of index.md (metadata, requirement IDs, SysML, "
+            "API signatures, data models). Paths are relative to this file.\n"
+            "\n"
+            "| feature | shard | documents |\n"
+            "|---------|-------|-----------|\n"
+        )
+        current = None
+        labels: List[str] = []
+        rows = conn.execute(
+            "SELECT r.feature, d.path, d.doc_id FROM derived_rows r "
+            "JOIN documents d ON d.path = r.path "
+            "WHERE r.section = 'metadata' ORDER BY r.feature, d.path"
+        )
+        for feature, path, doc_id in itertools.chain(rows, [(None, "", "")]):
+            if feature != current:
+                if current is not None:
+                    out.write(f"| {current} | index/{current}.md | {', '.join(labels)} |\n")
+                    features.append(current)
+                current, labels = feature, []
+            labels.append(_label(doc_id, path))
+    return features
+
+
+def derive_index(conn: sqlite3.Connection, project_root: str, sdd_root: str,
+                 changed_paths: Optional[Iterable[str]] = None) -> None:
+    """Regenerate index.md / index.json, the feature shards and their manifest.
+
+    ``changed_paths`` limits fragment re-rendering (and shard regeneration) to
+    those documents (added, modified or deleted); None (or a large batch)
+    rebuilds everything.
+    """
+    Path(cache_dir(project_root, sdd_root)).mkdir(parents=True, exist_ok=True)
+    _sdd_root, req_dir, spec_dir = load_sdd_paths(project_root)
+
+    paths = list(changed_paths) if changed_paths is not None else None
+    if paths is not None and len(paths) > INCREMENTAL_DERIVE_MAX:
+        paths = None
+    with sdd_metrics.phase("derive"):
+        dirty_features = _refresh_fragments(conn, paths, _feature_resolver(req_dir, spec_dir))
+        conn.commit()
+
+    with sdd_metrics.phase("write"):
+        _write_derived(conn, project_root, sdd_root, dirty_features)
+
+
+def _write_derived(conn: sqlite3.Connection, project_root: str, sdd_root: str,
+                   dirty_features: Optional[Set[str]]) -> None:
+    """Stream index.json, index.md, the manifest and the dirty shards from derived_rows."""
+    doc_count = conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
 
-    md_target = Path(md_path(project_root, sdd_root))
-    tmp_md = md_target.with_name(md_target.name + ".tmp")
-    tmp_md.write_text("\n".join(out) + "\n", encoding="utf-8")
-    tmp_md.replace(md_target)
+    with streamed_write(Path(json_path(project_root, sdd_root))) as out:
+        out.write(
+            "{\n"
+            f' "schema": "sdd-index/{SCHEMA_VERSION}",\n'
+            f' "document_count": {doc_count},\n'
+        )
+        chunks = _iter_section(conn, JSON_SECTION, ",\n")
+        first = next(chunks, None)
+        if first is None:
+            out.write(' "documents": []\n')
+        else:
+            out.write(' "documents": [\n')
+            out.write(first)
+            for chunk in chunks:
+                out.write(chunk)
+            out.write("\n ]\n")
+        out.write("}")
+
+    with streamed_write(Path(md_path(project_root, sdd_root))) as out:
+        out.write(
+            f"# .sdd Index (v{SCHEMA_VERSION}, {doc_count} docs)\n"
+            "\n"
+            "Structured facts extracted from front matter and body. "
+            "Read this instead of raw Glob/Grep/Read over .sdd/.\n"
+            "\n"
+        )
+        for name, heading in MD_SECTIONS:
+            _write_section(conn, out, name, heading)
+
+    live = _write_manifest(conn, project_root, sdd_root)
+    if dirty_features is None:
+        for feature in live:
+            _write_shard(conn, project_root, sdd_root, feature)
+        _prune_shards(project_root, sdd_root, set(live))
+    else:
+        for feature in sorted(dirty_features):
+            _write_shard(conn, project_root, sdd_root, feature)
 
 
 # --- CLI ------------------------------------------------------------------
@@ -769,15 +2980,116 @@ def main() -> None:
                         help="Project root (defaults to env/git/cwd)")
     group = parser.add_mutually_exclusive_group()
     group.add_argument("--rebuild", action="store_true", help="Full rebuild (default)")
-    group.add_argument("--update", metavar="RELPATH",
-                       help="Incremental update of a single file")
+    group.add_argument("--update", metavar="RELPATH", nargs="+",
+                       help="Incremental update of one or more files in one transaction "
+                            "(prints their impact as JSON)")
+    group.add_argument("--ensure-derived", action="store_true",
+                       help="Regenerate index.md / index.json and the shards if a lazy "
+                            "update left them stale (no-op otherwise)")
+    group.add_argument("--watch", action="store_true",
+                       help="Poll the document dirs and keep the index fresh until interrupted")
+    group.add_argument("--search", metavar="TERMS",
+                       help="Full-text search over document sections (JSON output)")
+    group.add_argument("--export-snapshot", metavar="FILE",
+                       help="Write the index to a checksummed snapshot archive tagged "
+                            "with the current git commit (prints its manifest)")
+    group.add_argument("--import-snapshot", metavar="FILE",
+                       help="Install a snapshot as the index and reprocess only the "
+                            "documents that differ from it")
+    group.add_argument("--stats", action="store_true",
+                       help="Summarize profiled runs in .cache/metrics.jsonl "
+                            "(p50/p95 per entry point and phase, JSON output)")
+    parser.add_argument("--interval", type=float, default=WATCH_INTERVAL_S,
+                        help=f"--watch polling interval in seconds (default: {WATCH_INTERVAL_S})")
+    parser.add_argument("--limit", type=int, default=20,
+                        help="Maximum --search results (default: 20)")
+    parser.add_argument("--paranoid", action="store_true",
+                        help="Hash every target instead of trusting unchanged "
+                             "(size, mtime_ns, inode) fingerprints")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Rebuild worker processes (0 = one per CPU; "
+                             "overrides index_options.workers)")
+    commands = parser.add_subparsers(dest="command")
+    query = commands.add_parser(
+        "query", help="Point lookups against the index (compact JSON output)")
+    query.add_argument("--project-root", default=argparse.SUPPRESS,
+                       help="Project root (defaults to env/git/cwd)")
+    lookups = query.add_subparsers(dest="query", required=True)
+    lookups.add_parser("req", help="Where a requirement ID is defined / referenced") \
+        .add_argument("value", metavar="REQ_ID")
+    for name, what in (("status", "status"), ("impl-status", "impl-status")):
+        sub = lookups.add_parser(name, help=f"Documents by {what}")
+        sub.add_argument("value", metavar=name.upper().replace("-", "_"))
+        sub.add_argument("--type", default="", help="Restrict to a document type (prd/spec/design)")
+    lookups.add_parser("field", help="Data model fields by name (glob wildcards allowed)") \
+        .add_argument("value", metavar="NAME")
+    lookups.add_parser("api", help="API signatures by URL path prefix") \
+        .add_argument("value", metavar="PREFIX")
+    for name, what in (("impact", "a change to NODE transitively affects"),
+                       ("upstream", "NODE transitively derives from")):
+        sub = lookups.add_parser(
+            name, help=f"Documents, requirement IDs and SysML elements {what}")
+        sub.add_argument("value", metavar="NODE",
+                         help="Requirement ID, document path or doc_id, or SysML element")
+        sub.add_argument("--depth", type=int, default=0,
+                         help="Stop after this many hops (default: unbounded)")
+    lookups.add_parser("cycles", help="depends-on cycles between documents")
+    order = lookups.add_parser(
+        "order", help="Documents in depends-on topological order (upstream first)")
+    order.add_argument("value", metavar="PATH_PREFIX", nargs="?", default="",
+                       help="Restrict to documents under this .sdd-relative path")
+    order.add_argument("--type", default="", help="Restrict to a document type (prd/spec/design)")
     args = parser.parse_args()
 
     project_root = resolve_project_root(args.project_root)
-    if args.update:
-        update_one(project_root, args.update)
+    if args.command == "query":
+        result = run_query(project_root, args.query, getattr(args, "value", ""),
+                           getattr(args, "type", ""), getattr(args, "depth", 0))
+        if result is None:
+            print("[AI-SDD] Error: no .sdd index found; run sdd_index.py --rebuild first.",
+                  file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(result, ensure_ascii=False, separators=(",", ":")))
+    elif args.stats:
+        summary = sdd_metrics.summarize(project_root)
+        if summary is None:
+            print("[AI-SDD] Error: no metrics recorded; enable index_options.profile "
+                  f"or {sdd_metrics.PROFILE_ENV}=1 first.", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+    elif args.search is not None:
+        try:
+            hits = search(project_root, args.search, args.limit)
+        except RuntimeError as e:
+            print(f"[AI-SDD] Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(hits, ensure_ascii=False))
+    elif args.export_snapshot or args.import_snapshot:
+        import sdd_snapshot
+        try:
+            if args.export_snapshot:
+                manifest = sdd_snapshot.export_snapshot(project_root, args.export_snapshot)
+            else:
+                manifest = sdd_snapshot.import_snapshot(project_root, args.import_snapshot,
+                                                        workers=args.workers)
+        except (RuntimeError, ValueError) as e:
+            print(f"[AI-SDD] Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(manifest, ensure_ascii=False))
+    elif args.ensure_derived:
+        ensure_derived(project_root)
+    elif args.watch:
+        try:
+            watch(project_root, args.interval)
+        except KeyboardInterrupt:
+            pass
+    elif args.update:
+        impacts = {path: impact for path, impact in update_many(project_root, args.update).items()
+                   if impact is not None}
+        if impacts:
+            print(json.dumps(impacts, ensure_ascii=False, separators=(",", ":")))
     else:
-        rebuild_all(project_root)
+        rebuild_all(project_root, workers=args.workers, paranoid=args.paranoid)
 
 
 if __name__ == "__main__":
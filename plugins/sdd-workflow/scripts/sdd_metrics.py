@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""sdd_metrics.py - Opt-in per-phase timing for the indexer and hook scripts.
+
+Enabled by ``index_options.profile: true`` in .sdd-config.json or by the
+SDD_INDEX_PROFILE environment variable (``1``/``true``/``on``; ``0`` turns it
+off even when the config enables it). Each profiled invocation appends one
+JSON line to .sdd/.cache/metrics.jsonl:
+
+    {"ts": 1760000000.123, "name": "rebuild", "pid": 4242, "ms": 81.4,
+     "phases": {"walk": {"ms": 3.1, "n": 600}, "hash": {...}, "parse": {...},
+                "upsert": {...}, "derive": {...}, "write": {...}},
+     "docs": [{"path": "requirement/auth.md", "ms": 2.7, "bytes": 18234}]}
+
+``name`` is the outermost entry point: a hook script (session-start,
+post-tool-use, ...) or an sdd_index writer (rebuild, update, derive) run from the CLI,
+the daemon or watch mode. A writer running inside a profiled hook adds its
+total as a phase of the hook's record instead of writing its own line.
+``docs`` keeps the TOP_DOCS slowest documents parsed by the invocation.
+
+``sdd_index.py --stats`` summarizes the file (p50/p95 per entry point and
+phase) via summarize(). The file is rotated to metrics.jsonl.1 once it
+exceeds METRICS_MAX_BYTES; summarize() reads both.
+
+When profiling is off, record() costs one config read and phase() one
+attribute check, so the instrumentation stays in place permanently.
+"""
+
+import contextlib
+import heapq
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from hook_common import load_index_options, load_sdd_paths  # noqa: E402
+
+PROFILE_ENV = "SDD_INDEX_PROFILE"
+# Slowest documents kept per record; a cold rebuild parses every document.
+TOP_DOCS = 20
+METRICS_MAX_BYTES = 4 << 20
+
+_TRUE_VALUES = {"1", "true", "on", "yes"}
+
+
+def metrics_path(project_root: str, sdd_root: str) -> str:
+    return str(Path(project_root) / sdd_root / ".cache" / "metrics.jsonl")
+
+
+def profiling_enabled(project_root: str) -> bool:
+    """Return True when invocations should append to metrics.jsonl.
+
+    A non-empty SDD_INDEX_PROFILE wins over ``index_options.profile``.
+    """
+    env = os.environ.get(PROFILE_ENV, "").strip().lower()
+    if env:
+        return env in _TRUE_VALUES
+    value = load_index_options(project_root).get("profile", False)
+    if not isinstance(value, bool):
+        print(
+            "[AI-SDD] Warning: 'index_options.profile' in .sdd-config.json must be a "
+            f"boolean (true/false), got {value!r}. Using default (off).",
+            file=sys.stderr,
+        )
+        return False
+    return value
+
+
+class _Record:
+    """Phase totals of one profiled invocation."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.start = time.perf_counter()
+        self.phases: Dict[str, List[float]] = {}
+        self.docs: List[Tuple[float, str, int]] = []
+
+    def add(self, name: str, seconds: float, n: int) -> None:
+        acc = self.phases.get(name)
+        if acc is None:
+            self.phases[name] = [seconds, n]
+        else:
+            acc[0] += seconds
+            acc[1] += n
+
+    def document(self, path: str, seconds: float, size: int) -> None:
+        item = (seconds, path, size)
+        if len(self.docs) < TOP_DOCS:
+            heapq.heappush(self.docs, item)
+        elif item > self.docs[0]:
+            heapq.heapreplace(self.docs, item)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "ts": round(time.time(), 3),
+            "name": self.name,
+            "pid": os.getpid(),
+            "ms": _ms(time.perf_counter() - self.start),
+            "phases": {name: {"ms": _ms(s), "n": int(n)}
+                       for name, (s, n) in self.phases.items()},
+            "docs": [{"path": path, "ms": _ms(s), "bytes": size}
+                     for s, path, size in sorted(self.docs, reverse=True)],
+        }
+
+
+_active: Optional[_Record] = None
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def active() -> bool:
+    return _active is not None
+
+
+@contextlib.contextmanager
+def record(project_root: str, name: str) -> Iterator[None]:
+    """Profile the enclosed block as entry point ``name``.
+
+    Nested inside another record() this is just phase(name), so a writer
+    called from a hook contributes to the hook's line.
+    """
+    global _active
+    if _active is not None:
+        with phase(name):
+            yield
+        return
+    if not profiling_enabled(project_root):
+        yield
+        return
+    rec = _Record(name)
+    _active = rec
+    try:
+        yield
+    finally:
+        _active = None
+        _append(project_root, rec.to_json())
+
+
+@contextlib.contextmanager
+def phase(name: str, n: int = 1) -> Iterator[None]:
+    """Add the enclosed block's wall time (and ``n`` items) to phase ``name``."""
+    rec = _active
+    if rec is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        rec.add(name, time.perf_counter() - t0, n)
+
+
+def add_phase(name: str, seconds: float, n: int = 1) -> None:
+    """Add a duration measured elsewhere (e.g. in a rebuild worker process)."""
+    if _active is not None:
+        _active.add(name, seconds, n)
+
+
+def document(path: str, seconds: float, size: int) -> None:
+    """Report the parse cost of one document."""
+    if _active is not None:
+        _active.document(path, seconds, size)
+
+
+def _append(project_root: str, entry: Dict[str, Any]) -> None:
+    sdd_root, _req_dir, _spec_dir = load_sdd_paths(project_root)
+    target = metrics_path(project_root, sdd_root)
+    line = (json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+    try:
+        Path(target).parent.mkdir(parents=True, exist_ok=True)
+        with contextlib.suppress(OSError):
+            if os.path.getsize(target) > METRICS_MAX_BYTES:
+                os.replace(target, target + ".1")
+        # One O_APPEND write per line keeps concurrent hooks from interleaving.
+        fd = os.open(target, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+    except OSError as e:
+        print(f"[AI-SDD] Warning: failed to write {target}: {e}", file=sys.stderr)
+
+
+# --- summary --------------------------------------------------------------
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending, non-empty list."""
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def _distribution(values: List[float]) -> Dict[str, Any]:
+    values.sort()
+    return {
+        "count": len(values),
+        "p50_ms": round(_percentile(values, 50), 3),
+        "p95_ms": round(_percentile(values, 95), 3),
+        "max_ms": round(values[-1], 3),
+    }
+
+
+def load_entries(project_root: str) -> Optional[List[Dict[str, Any]]]:
+    """Return the recorded entries, oldest first; None when nothing was recorded."""
+    sdd_root, _req_dir, _spec_dir = load_sdd_paths(project_root)
+    target = metrics_path(project_root, sdd_root)
+    entries: List[Dict[str, Any]] = []
+    found = False
+    for path in (target + ".1", target):
+        try:
+            with open(path, encoding="utf-8") as fh:
+                found = True
+                for line in fh:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by a crash or rotation
+                    if isinstance(entry, dict) and isinstance(entry.get("ms"), (int, float)):
+                        entries.append(entry)
+        except OSError:
+            continue
+    return entries if found else None
+
+
+def summarize(project_root: str) -> Optional[Dict[str, Any]]:
+    """p50/p95/max latency per entry point, and per phase within each.
+
+    Phase figures are per invocation that ran the phase (summed over its
+    documents), so they compare directly with the entry point's total.
+    """
+    entries = load_entries(project_root)
+    if entries is None:
+        return None
+    totals: Dict[str, List[float]] = {}
+    phases: Dict[str, Dict[str, List[float]]] = {}
+    for entry in entries:
+        name = str(entry.get("name", ""))
+        totals.setdefault(name, []).append(float(entry["ms"]))
+        per_phase = phases.setdefault(name, {})
+        for phase_name, stats in (entry.get("phases") or {}).items():
+            if isinstance(stats, dict) and isinstance(stats.get("ms"), (int, float)):
+                per_phase.setdefault(phase_name, []).append(float(stats["ms"]))
+    summary: Dict[str, Any] = {}
+    for name in sorted(totals):
+        summary[name] = _distribution(totals[name])
+        summary[name]["phases"] = {
+            phase_name: _distribution(values)
+            for phase_name, values in sorted(phases[name].items())
+        }
+    return summary
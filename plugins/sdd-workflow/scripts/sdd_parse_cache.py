@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""sdd_parse_cache.py - Content-addressed cache of sdd_index.scan_document results.
+
+The index keys documents by path, so a moved file (``auth_spec.md`` ->
+``auth/index_spec.md``), a copy, or a second git worktree of the same project
+would otherwise be parsed again from scratch. With ``index_options.parse_cache:
+true`` in .sdd-config.json, the content-derived part of every parsed record
+(front matter fields and the extracted lists, not the path or stat fields) is
+stored under (content hash, parser version) in one SQLite file per user:
+
+    $XDG_CACHE_HOME/ai-sdd/parse-cache.sqlite   (default ~/.cache/ai-sdd/)
+
+sdd_index looks a document up after hashing it and before parsing it. The
+parser version is a digest of the extraction code, so an upgraded plugin
+never reads records produced by an older parser.
+
+Entries are marshal-encoded: decoding one costs a tenth of parsing the
+document (JSON is several times slower). The format is tied to the
+interpreter, so the key also carries the Python version. Each entry has a
+last-used time; once the file holds more than
+``index_options.parse_cache_max_mb`` (default 256) the least recently used
+entries are evicted down to EVICT_TO of the limit. Writes happen once per
+rebuild or update (flush()), not per document.
+
+The cache is an accelerator only: any error opening or using it prints one
+warning and turns it off for the process; indexing proceeds by parsing.
+"""
+
+import marshal
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from hook_common import load_index_options  # noqa: E402
+
+DEFAULT_MAX_MB = 256
+# Eviction frees space down to this fraction of the limit, so a cache at its
+# limit does not evict on every flush.
+EVICT_TO = 0.9
+BUSY_TIMEOUT_S = 5.0
+
+# Record keys that describe the file rather than its content; never cached.
+LOCATION_KEYS = ("path", "content_hash", "mtime", "size", "mtime_ns", "inode")
+
+
+def cache_file() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return str(Path(base) / "ai-sdd" / "parse-cache.sqlite")
+
+
+def resolve_parse_cache(project_root: str) -> Tuple[str, int]:
+    """Return (cache file, size limit in bytes); the file is "" when disabled.
+
+    Enabled by ``index_options.parse_cache: true``; the limit comes from
+    ``index_options.parse_cache_max_mb``. Invalid values warn and fall back
+    to the defaults (off, DEFAULT_MAX_MB).
+    """
+    options = load_index_options(project_root)
+    enabled = options.get("parse_cache", False)
+    if not isinstance(enabled, bool):
+        print(
+            "[AI-SDD] Warning: 'index_options.parse_cache' in .sdd-config.json must be a "
+            f"boolean (true/false), got {enabled!r}. Using default (off).",
+            file=sys.stderr,
+        )
+        enabled = False
+    max_mb = options.get("parse_cache_max_mb", DEFAULT_MAX_MB)
+    if isinstance(max_mb, bool) or not isinstance(max_mb, int) or max_mb <= 0:
+        print(
+            "[AI-SDD] Warning: 'index_options.parse_cache_max_mb' in .sdd-config.json must "
+            f"be a positive integer, got {max_mb!r}. Using {DEFAULT_MAX_MB}.",
+            file=sys.stderr,
+        )
+        max_mb = DEFAULT_MAX_MB
+    return (cache_file() if enabled else ""), max_mb << 20
+
+
+class ParseCache:
+    """One process's handle on the cache file, for one parser version."""
+
+    def __init__(self, path: str, parser: str, max_bytes: int) -> None:
+        self.path = path
+        self.parser = f"{parser}/py{sys.version_info[0]}.{sys.version_info[1]}"
+        self.max_bytes = max_bytes
+        self.conn: Optional[sqlite3.Connection] = None
+        self.disabled = False
+        self._hits: List[str] = []
+        self._pending: Dict[str, bytes] = {}
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if self.conn is None and not self.disabled:
+            try:
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_S)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS entries ("
+                    " content_hash TEXT NOT NULL, parser TEXT NOT NULL,"
+                    " data BLOB NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL,"
+                    " PRIMARY KEY (content_hash, parser)) WITHOUT ROWID"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_used ON entries(used)")
+                conn.commit()
+                self.conn = conn
+            except (OSError, sqlite3.Error) as e:
+                self._disable(e)
+        return self.conn
+
+    def _disable(self, error: Exception) -> None:
+        print(f"[AI-SDD] Warning: parse cache {self.path} unavailable: {error}",
+              file=sys.stderr)
+        self.disabled = True
+        self.close()
+
+    def get(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Return the cached content fields for ``content_hash``, or None."""
+        conn = self._connection()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(
+                "SELECT data FROM entries WHERE content_hash = ? AND parser = ?",
+                (content_hash, self.parser),
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._disable(e)
+            return None
+        if row is None:
+            return None
+        try:
+            return marshal.loads(row[0])
+        except (EOFError, ValueError, TypeError):
+            return None  # a corrupt entry is overwritten by the next put
+
+    def hit(self, content_hash: str) -> None:
+        """Note a lookup that was used, for LRU order (written by flush)."""
+        self._hits.append(content_hash)
+
+    def put(self, rec: Dict[str, Any]) -> None:
+        """Queue a freshly parsed record (its sections fully materialized)."""
+        if self.disabled:
+            return
+        content = {k: v for k, v in rec.items() if k not in LOCATION_KEYS}
+        self._pending[rec["content_hash"]] = marshal.dumps(content)
+
+    def flush(self) -> None:
+        """Write queued entries and hit times in one transaction, then evict."""
+        if not (self._pending or self._hits):
+            return
+        conn = self._connection()
+        if conn is None:
+            return
+        now = time.time()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO entries (content_hash, parser, data, size, used) "
+                    "VALUES (?,?,?,?,?)",
+                    [(h, self.parser, data, len(data), now)
+                     for h, data in self._pending.items()],
+                )
+                conn.executemany(
+                    "UPDATE entries SET used = ? WHERE content_hash = ? AND parser = ?",
+                    [(now, h, self.parser) for h in self._hits],
+                )
+                if self._pending:
+                    self._evict(conn)
+        except sqlite3.Error as e:
+            self._disable(e)
+        self._pending.clear()
+        self._hits.clear()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * EVICT_TO)
+        victims = []
+        for content_hash, parser, size in conn.execute(
+                "SELECT content_hash, parser, size FROM entries ORDER BY used"):
+            if total <= target:
+                break
+            victims.append((content_hash, parser))
+            total -= size
+        conn.executemany(
+            "DELETE FROM entries WHERE content_hash = ? AND parser = ?", victims)
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+# One handle per (file, parser, process): rebuild workers are forked, and a
+# SQLite connection must not cross a fork.
+_handles: Dict[Tuple[str, str, int], ParseCache] = {}
+
+
+def shared(path: str, parser: str, max_bytes: int) -> ParseCache:
+    key = (path, parser, os.getpid())
+    handle = _handles.get(key)
+    if handle is None:
+        handle = _handles[key] = ParseCache(path, parser, max_bytes)
+    return handle
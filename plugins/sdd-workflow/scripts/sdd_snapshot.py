@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""sdd_snapshot.py - Portable, checksum-verified archives of the .sdd index.
+
+A fresh clone, CI job or worktree starts without .sdd/.cache/index.sqlite and
+pays for a full cold rebuild. ``sdd_index.py --export-snapshot FILE`` writes
+the index to a zip archive that a team can share; ``--import-snapshot FILE``
+installs it and brings it up to date:
+
+    manifest.json   format, schema and parser versions, the git commit the
+                    index reflects, the requirement / specification dirs,
+                    document count, sha256 of index.sqlite
+    index.sqlite    a VACUUM INTO copy of the index (deflated)
+
+The copy drops each document's machine-specific stat fingerprint (mtime_ns,
+inode), so after an import rebuild_all checks every document's content hash.
+Hashes are git blob ids and clean tracked files get theirs from git's index
+(sdd_index.git_index_entries), so only the documents that differ from the
+snapshot's commit are read and reparsed. The snapshot's rendered fragments
+(derived_rows) are kept for the rest, so the derived files are written
+without re-rendering every document, unless the importing project maps
+documents to features differently (other requirement / specification dirs).
+
+A snapshot is refused (and the index left untouched) when its checksum does
+not match, or when it was written by a different schema or parser version
+(see sdd_index.parser_version), since its rows would not match what this
+build extracts.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import sdd_index  # noqa: E402
+from hook_common import load_sdd_paths  # noqa: E402
+
+FORMAT = "sdd-index-snapshot/1"
+MANIFEST_NAME = "manifest.json"
+DB_NAME = "index.sqlite"
+
+
+def _git(project_root: str, *args: str) -> str:
+    """Run git in ``project_root``; "" when git is unavailable or fails."""
+    try:
+        proc = subprocess.run(["git", *args], cwd=project_root, capture_output=True,
+                              timeout=sdd_index.GIT_TIMEOUT_S)
+    except (OSError, subprocess.SubprocessError):
+        return ""
+    return os.fsdecode(proc.stdout) if proc.returncode == 0 else ""
+
+
+def _commit_blobs(project_root: str, sdd_root: str, commit: str) -> Dict[str, str]:
+    """sdd-relative path -> blob id of the .md files under sdd_root at ``commit``."""
+    blobs: Dict[str, str] = {}
+    prefix = sdd_root.rstrip("/") + "/"
+    for entry in _git(project_root, "ls-tree", "-r", "-z", commit, "--", sdd_root).split("\0"):
+        meta, _tab, path = entry.partition("\t")
+        fields = meta.split()
+        if len(fields) == 3 and fields[1] == "blob" and path.startswith(prefix):
+            blobs[path[len(prefix):]] = fields[2]
+    return blobs
+
+
+def _sha256(path: str) -> str:
+    return sdd_index._digest(path, hashlib.sha256())
+
+
+def export_snapshot(project_root: str, out_file: str) -> Dict[str, Any]:
+    """Archive the index to ``out_file``; return the manifest.
+
+    Raises RuntimeError when there is no current index.
+    """
+    sdd_root, req_dir, spec_dir = load_sdd_paths(project_root)
+    conn = sdd_index.open_index(project_root)
+    if conn is None:
+        raise RuntimeError("no current .sdd index; run sdd_index.py --rebuild first")
+    commit = _git(project_root, "rev-parse", "HEAD").strip()
+    out = Path(out_file).resolve()
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=str(out.parent)) as tmp:
+        copy = os.path.join(tmp, DB_NAME)
+        try:
+            conn.execute("VACUUM INTO ?", (copy,))  # one consistent read snapshot
+        finally:
+            conn.close()
+        copy_conn = sqlite3.connect(copy)
+        try:
+            with copy_conn:
+                copy_conn.execute("UPDATE documents SET mtime_ns = 0, inode = 0")
+            hashes = dict(copy_conn.execute("SELECT path, content_hash FROM documents"))
+            copy_conn.execute("VACUUM")
+        finally:
+            copy_conn.close()
+
+        if commit:
+            blobs = _commit_blobs(project_root, sdd_root, commit)
+            differs = sum(1 for path, h in hashes.items() if blobs.get(path) != h)
+            if differs:
+                print(f"[AI-SDD] Warning: the index has {differs} document(s) that differ "
+                      f"from commit {commit[:12]}; importers reparse them.", file=sys.stderr)
+        manifest = {
+            "format": FORMAT,
+            "schema": sdd_index.SCHEMA_VERSION,
+            "parser": sdd_index.parser_version(),
+            "commit": commit,
+            "directories": [req_dir, spec_dir],
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(
+                timespec="seconds"),
+            "documents": len(hashes),
+            "sha256": _sha256(copy),
+        }
+        archive = os.path.join(tmp, out.name)
+        with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr(MANIFEST_NAME, json.dumps(manifest, indent=2) + "\n")
+            zf.write(copy, DB_NAME)
+        os.replace(archive, out)
+    return manifest
+
+
+def _read_snapshot(snapshot_file: str, dest: str) -> Dict[str, Any]:
+    """Extract and verify the archive's database to ``dest``; return the manifest.
+
+    Raises ValueError when the archive is unusable by this build.
+    """
+    try:
+        with zipfile.ZipFile(snapshot_file) as zf:
+            manifest = json.loads(zf.read(MANIFEST_NAME))
+            if not isinstance(manifest, dict) or manifest.get("format") != FORMAT:
+                raise ValueError("not an .sdd index snapshot")
+            with zf.open(DB_NAME) as src, open(dest, "wb") as dst:
+                while True:
+                    chunk = src.read(1 << 20)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+    except (OSError, KeyError, zipfile.BadZipFile) as e:
+        raise ValueError(f"cannot read snapshot: {e}") from e
+    except json.JSONDecodeError as e:
+        raise ValueError(f"corrupt snapshot manifest: {e}") from e
+    if _sha256(dest) != manifest.get("sha256"):
+        raise ValueError("snapshot checksum mismatch")
+    if manifest.get("schema") != sdd_index.SCHEMA_VERSION:
+        raise ValueError(f"snapshot schema v{manifest.get('schema')} does not match "
+                         f"this plugin's v{sdd_index.SCHEMA_VERSION}")
+    if manifest.get("parser") != sdd_index.parser_version():
+        raise ValueError("snapshot was written by a different plugin build")
+    return manifest
+
+
+def import_snapshot(project_root: str, snapshot_file: str,
+                    workers: Optional[int] = None) -> Dict[str, Any]:
+    """Install a snapshot as the index, then rebuild_all what differs from it.
+
+    Returns the manifest plus ``reprocessed``: documents added, removed or
+    reparsed relative to the snapshot. Raises ValueError (index untouched)
+    when the snapshot is refused.
+    """
+    sdd_root, req_dir, spec_dir = load_sdd_paths(project_root)
+    db_file = sdd_index.db_path(project_root, sdd_root)
+    Path(db_file).parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=str(Path(db_file).parent)) as tmp:
+        copy = os.path.join(tmp, DB_NAME)
+        manifest = _read_snapshot(snapshot_file, copy)
+        src = sqlite3.connect(copy)
+        try:
+            imported = dict(src.execute("SELECT path, content_hash FROM documents"))
+            with sdd_index.writer_lock(project_root, sdd_root):
+                # The backup API replaces the live database page by page, WAL
+                # included, so open readers never see a torn file.
+                dst = sdd_index.connect(db_file)
+                try:
+                    src.backup(dst)
+                finally:
+                    dst.close()
+                same_features = manifest.get("directories") == [req_dir, spec_dir]
+                if not same_features:
+                    sdd_index._mark_dirty(project_root, sdd_root, None)
+        finally:
+            src.close()
+
+    # Re-renders the fragments of the documents that differ (or of all of
+    # them, see above); the files of the untouched features are written here.
+    sdd_index.rebuild_all(project_root, workers=workers)
+    conn = sdd_index.connect(db_file)
+    try:
+        if same_features:
+            with sdd_index.writer_lock(project_root, sdd_root):
+                sdd_index._write_derived(conn, project_root, sdd_root, None)
+        current = dict(conn.execute("SELECT path, content_hash FROM documents"))
+    finally:
+        conn.close()
+    reprocessed = sum(1 for path in imported.keys() | current.keys()
+                      if imported.get(path) != current.get(path))
+    return {**manifest, "reprocessed": reprocessed}
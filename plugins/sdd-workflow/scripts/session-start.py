@@ -18,6 +18,7 @@ from typing import Any, Dict
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 from env_export import rewrite_exports  # noqa: E402
 from hook_common import resolve_project_root  # noqa: E402
+import sdd_metrics  # noqa: E402
 
 
 @dataclass
@@ -297,23 +298,24 @@ This file will be automatically deleted after running /sdd-init.
 def rebuild_index(project_root: str) -> None:
     try:
         sys.path.insert(0, str(Path(__file__).resolve().parent))
-        import sdd_index
+        with sdd_metrics.phase("import"):
+            import sdd_index
         sdd_index.rebuild_all(project_root)
     except Exception as e:  # noqa: BLE001
         print(f"[AI-SDD] Warning: failed to rebuild .sdd index: {e}", file=sys.stderr)
+        return
+    try:
+        import sdd_daemon
+        sdd_daemon.ensure_running(project_root)
+    except Exception as e:  # noqa: BLE001
+        print(f"[AI-SDD] Warning: failed to start .sdd index daemon: {e}", file=sys.stderr)
 
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="AI-SDD session start script")
-    parser.add_argument("--default-lang", default="en", help="Default language (en/ja)")
-    args = parser.parse_args()
-
-    plugin_root = get_plugin_root()
-    project_root = get_project_root()
+def start_session(plugin_root: str, project_root: str, default_lang: str) -> None:
     config_path = str(Path(project_root) / ".sdd-config.json")
 
-    raw_config = load_or_create_config(config_path, args.default_lang)
-    cfg = build_sdd_config(raw_config, args.default_lang)
+    raw_config = load_or_create_config(config_path, default_lang)
+    cfg = build_sdd_config(raw_config, default_lang)
 
     sdd_dir = str(Path(project_root) / cfg.root)
     ensure_sdd_directory(sdd_dir, cfg.root)
@@ -330,5 +332,16 @@ def main() -> None:
     check_claude_md(project_root, sdd_dir, plugin_version)
 
 
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AI-SDD session start script")
+    parser.add_argument("--default-lang", default="en", help="Default language (en/ja)")
+    args = parser.parse_args()
+
+    plugin_root = get_plugin_root()
+    project_root = get_project_root()
+    with sdd_metrics.record(project_root, "session-start"):
+        start_session(plugin_root, project_root, args.default_lang)
+
+
 if __name__ == "__main__":
     main()
@@ -4,6 +4,10 @@
 Detects Vibe Coding signals (vague instructions) in the user prompt
 and injects additional context prompting a vibe-detector style analysis.
 Detection only; never blocks the prompt.
+
+Also regenerates the .sdd index's derived files when a lazy post-tool-use
+update (index_options.lazy_derive) left them dirty, so every turn starts from
+a current index.md.
 """
 
 import os
@@ -11,7 +15,13 @@ import re
 import sys
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from hook_common import emit_additional_context, read_stdin_json  # noqa: E402
+from hook_common import (  # noqa: E402
+    emit_additional_context,
+    get_project_root,
+    load_sdd_paths,
+    read_stdin_json,
+)
+import sdd_metrics  # noqa: E402
 
 # (label, regex) pairs based on the vibe-detector skill detection patterns
 VAGUE_PATTERNS = [
@@ -35,13 +45,35 @@ def detect_vague_expressions(prompt: str) -> list:
     return matched
 
 
+def derive_pending(project_root: str) -> bool:
+    """True when a lazy index update left the .sdd derived files dirty.
+
+    Runs before every prompt, so it is a plain stat of the marker; sdd_index
+    is imported only when a derive is pending.
+    """
+    sdd_root, _req_dir, _spec_dir = load_sdd_paths(project_root)
+    return os.path.exists(os.path.join(project_root, sdd_root, ".cache", "index.dirty"))
+
+
+def ensure_index_derived(project_root: str) -> None:
+    """Run the derive deferred by lazy index updates."""
+    try:
+        with sdd_metrics.phase("import"):
+            import sdd_index
+        sdd_index.ensure_derived(project_root)
+    except Exception as e:  # noqa: BLE001
+        print(f"[AI-SDD] Warning: failed to derive .sdd index: {e}", file=sys.stderr)
+
+
 def main() -> None:
     payload = read_stdin_json()
+    project_root = get_project_root(payload)
     prompt = payload.get("prompt", "")
-    if not prompt:
-        return
 
-    matched = detect_vague_expressions(prompt)
+    with sdd_metrics.record(project_root, "user-prompt-submit"):
+        if derive_pending(project_root):
+            ensure_index_derived(project_root)
+        matched = detect_vague_expressions(prompt) if prompt else []
     if not matched:
         return
 